@@ -44,13 +44,32 @@ class Settings(BaseSettings):
     
     # Century21 Scraping Configuration
     scraping_concurrency_limit: int = Field(default=8, env="SCRAPING_CONCURRENCY_LIMIT")
+    # Piso y techo del control adaptativo de concurrencia (scraping_concurrency_limit es el valor inicial)
+    scraping_concurrency_min: int = Field(default=2, env="SCRAPING_CONCURRENCY_MIN")
+    scraping_concurrency_max: int = Field(default=32, env="SCRAPING_CONCURRENCY_MAX")
     scraping_timeout: int = Field(default=30000, env="SCRAPING_TIMEOUT")
     scraping_headless: bool = Field(default=True, env="SCRAPING_HEADLESS")
+    # Procesos de Chromium (0 = según scraping_concurrency_limit) y contextos por proceso
+    scraping_browsers: int = Field(default=0, env="SCRAPING_BROWSERS")
+    scraping_contexts_per_browser: int = Field(default=1, env="SCRAPING_CONTEXTS_PER_BROWSER")
+    # Detección de cambios entre recrawls: las páginas sin cambios no se parsean ni se vuelven a publicar
+    scraping_track_changes: bool = Field(default=True, env="SCRAPING_TRACK_CHANGES")
+    scraping_fingerprint_db: str = Field(default="./data/page_fingerprints.sqlite3", env="SCRAPING_FINGERPRINT_DB")
     
     # Image Storage
     image_storage_path: str = Field(default="./images", env="IMAGE_STORAGE_PATH")
     max_image_size_mb: int = Field(default=10, env="MAX_IMAGE_SIZE_MB")
     supported_image_formats: list[str] = ["jpg", "jpeg", "png", "webp"]
+    # Espacio máximo de la caché de imágenes en image_storage_path (se descartan las menos usadas)
+    image_cache_max_mb: int = Field(default=2048, env="IMAGE_CACHE_MAX_MB")
+    # Normalización antes de subir a Facebook: lado mayor, calidad JPEG y tamaño objetivo (0 = sin objetivo)
+    image_max_edge: int = Field(default=2048, env="IMAGE_MAX_EDGE")
+    image_jpeg_quality: int = Field(default=85, env="IMAGE_JPEG_QUALITY")
+    image_target_kb: int = Field(default=0, env="IMAGE_TARGET_KB")
+    # Procesos del pool de normalización (0 = uno por CPU)
+    image_normalize_workers: int = Field(default=0, env="IMAGE_NORMALIZE_WORKERS")
+    # Espacio máximo de las imágenes normalizadas en image_storage_path/normalized (se descartan las menos usadas)
+    image_normalized_max_mb: int = Field(default=512, env="IMAGE_NORMALIZED_MAX_MB")
     
     # Google Cloud Firestore Cache (Optional)
     use_firestore_cache: bool = Field(default=True, env="USE_FIRESTORE_CACHE")
@@ -60,8 +79,12 @@ class Settings(BaseSettings):
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     log_format: str = Field(default="json", env="LOG_FORMAT")  # json or text
     
-    # Rate Limiting
+    # Rate Limiting de la API propia (no se aplica al sitio scrapeado; ver scraper_rate_*)
     rate_limit_per_minute: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")
+    # Ritmo del scraper contra cada host de Century21 (página de detalle, imágenes, búsquedas),
+    # compartido por todos los procesos de la máquina; independiente de los límites de la API
+    scraper_rate_per_minute: int = Field(default=120, env="SCRAPER_RATE_PER_MINUTE")
+    scraper_rate_burst: int = Field(default=0, env="SCRAPER_RATE_BURST")  # 0 = 10 segundos de ritmo
     
     # Monitoring
     enable_metrics: bool = Field(default=False, env="ENABLE_METRICS")
@@ -73,7 +96,7 @@ class Settings(BaseSettings):
     # Logging Configuration
     log_file: str = Field(default="./logs/app.log", env="LOG_FILE")
     
-    # Rate Limiting Configuration
+    # Rate Limiting Configuration de la API propia (no se aplica al sitio scrapeado)
     rate_limit_requests: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
     rate_limit_window: int = Field(default=3600, env="RATE_LIMIT_WINDOW")
     
@@ -0,0 +1,63 @@
+"""
+Ajustes de esquema que create_all no hace sobre tablas existentes.
+
+create_all crea las tablas que faltan pero no agrega restricciones nuevas a una
+tabla que ya existía. ensure_property_key agrega la clave única de Property
+(source_platform, external_id) que necesita el upsert de los scrapers, después de
+fusionar los duplicados que pudiera haber.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+from app.models.database import MarketplaceListing, Property
+
+PROPERTY_KEY = ["source_platform", "external_id"]
+PROPERTY_KEY_NAME = "uq_properties_source_external_id"
+
+
+def ensure_property_key(engine: Engine) -> int:
+    """
+    Garantiza el índice único (source_platform, external_id) que necesita el upsert en una tabla
+    creada antes de la restricción. Los duplicados se fusionan en la fila más nueva (mayor id) y
+    los marketplace_listings que apuntaban a las otras pasan a ella. Devuelve las filas borradas.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(Property.__tablename__):
+        return 0
+    keys = [constraint["column_names"] for constraint in inspector.get_unique_constraints(Property.__tablename__)]
+    keys += [index["column_names"] for index in inspector.get_indexes(Property.__tablename__) if index["unique"]]
+    if PROPERTY_KEY in keys:
+        return 0
+
+    removed = 0
+    with engine.begin() as connection:
+        # Con NULL en la clave no hay conflicto posible: esas filas se dejan como están
+        duplicated = connection.execute(
+            select(Property.source_platform, Property.external_id, func.max(Property.id))
+            .where(Property.source_platform.is_not(None), Property.external_id.is_not(None))
+            .group_by(Property.source_platform, Property.external_id)
+            .having(func.count() > 1)
+        ).all()
+        for source_platform, external_id, keep_id in duplicated:
+            drop_ids = connection.scalars(
+                select(Property.id).where(
+                    Property.source_platform == source_platform,
+                    Property.external_id == external_id,
+                    Property.id != keep_id,
+                )
+            ).all()
+            connection.execute(
+                update(MarketplaceListing).where(MarketplaceListing.property_id.in_(drop_ids)).values(property_id=keep_id)
+            )
+            removed += connection.execute(delete(Property).where(Property.id.in_(drop_ids))).rowcount
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {PROPERTY_KEY_NAME} "
+            f"ON {Property.__tablename__} ({', '.join(PROPERTY_KEY)})"
+        ))
+    logging.info(f"Índice único de properties creado ({removed} duplicados fusionados)")
+    return removed
@@ -7,6 +7,7 @@ from contextlib import contextmanager
 from typing import Generator
 
 from app.config import settings
+from app.db.schema import ensure_property_key
 from app.models.database import Base
 
 # Create engine
@@ -24,6 +25,8 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
+    # create_all no agrega restricciones a tablas existentes
+    ensure_property_key(engine)
 
 
 def get_db() -> Generator[Session, None, None]:
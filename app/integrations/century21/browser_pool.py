@@ -0,0 +1,269 @@
+"""
+Pool de procesos de Chromium para el scraper de Century21.
+
+Un solo navegador con un solo contexto se vuelve el cuello de botella con
+concurrencia alta, y si el proceso se cae se pierde todo el lote. El pool
+mantiene N navegadores × M contextos, asigna cada página al contexto menos
+cargado y reemplaza automáticamente los navegadores que se desconectan.
+
+Con `recycle_pages` las páginas no se cierran tras cada URL: vuelven al pool
+(reseteadas con about:blank) y se descartan después de `max_navigations`
+usos o si su heap de JS pasa de `max_heap_mb`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright
+
+# Páginas simultáneas que conviene dar a cada proceso de Chromium antes de abrir otro
+PAGES_PER_BROWSER = 8
+# Reciclaje de páginas: navegaciones máximas por página y heap de JS máximo antes de cerrarla
+MAX_NAVIGATIONS_PER_PAGE = 50
+MAX_PAGE_HEAP_MB = 256
+
+# performance.memory solo existe en Chromium
+_HEAP_USED_JS = "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+
+def browsers_for_concurrency(concurrency: int, pages_per_browser: int = PAGES_PER_BROWSER) -> int:
+    """Número de navegadores para una concurrencia dada (p. ej. settings.scraping_concurrency_limit)."""
+    return max(1, math.ceil(concurrency / pages_per_browser))
+
+
+class _BrowserSlot:
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.contexts: list[_ContextSlot] = []
+        self.alive = False
+        self.generation = 0  # veces que se ha lanzado este slot
+
+    @property
+    def active(self) -> int:
+        return sum(c.active for c in self.contexts)
+
+
+class _ContextSlot:
+    def __init__(self, browser_slot: _BrowserSlot, context: BrowserContext):
+        self.browser_slot = browser_slot
+        self.context = context
+        self.active = 0
+        self.idle_pages: list[_PooledPage] = []
+
+
+class _PooledPage:
+    def __init__(self, page: Page):
+        self.page = page
+        self.navigations = 0
+
+
+class BrowserPool:
+    """N navegadores × M contextos con asignación por menor carga y reemplazo tras caídas."""
+
+    def __init__(
+        self,
+        playwright: Playwright,
+        browsers: int = 1,
+        contexts_per_browser: int = 1,
+        launch_options: Optional[dict] = None,
+        context_options: Optional[dict] = None,
+        context_setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+        page_setup: Optional[Callable[[BrowserContext, Page], Awaitable[None]]] = None,
+        recycle_pages: bool = False,
+        pages_per_context: int = 0,
+        max_navigations: int = MAX_NAVIGATIONS_PER_PAGE,
+        max_heap_mb: float = MAX_PAGE_HEAP_MB,
+    ):
+        if browsers < 1 or contexts_per_browser < 1:
+            raise ValueError("browsers y contexts_per_browser deben ser >= 1")
+        self.playwright = playwright
+        self.launch_options = launch_options or {}
+        self.context_options = context_options or {}
+        # Se llaman una vez por contexto / por página nueva (p. ej. bloqueo de requests)
+        self.context_setup = context_setup
+        self.page_setup = page_setup
+        self.contexts_per_browser = contexts_per_browser
+        self._slots = [_BrowserSlot(i) for i in range(browsers)]
+        self._available = asyncio.Condition()
+        self._closing = False
+        self._replacements: set[asyncio.Task] = set()
+        self.crashes = 0
+        self.recycle_pages = recycle_pages
+        self.pages_per_context = pages_per_context if recycle_pages else 0
+        self.max_navigations = max_navigations
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+        self.pages_created = 0
+        self.pages_reused = 0
+        self.pages_retired = 0
+
+    async def start(self) -> None:
+        await asyncio.gather(*(self._launch(slot) for slot in self._slots))
+        logging.info(
+            f"BrowserPool listo: {len(self._slots)} navegadores × {self.contexts_per_browser} contextos"
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._slots)
+
+    async def grow(self, browsers: int) -> None:
+        """Lanza navegadores hasta tener `browsers` (p. ej. cuando el límite de concurrencia sube)."""
+        if self._closing or browsers <= len(self._slots):
+            return
+        new_slots = [_BrowserSlot(i) for i in range(len(self._slots), browsers)]
+        self._slots.extend(new_slots)
+        results = await asyncio.gather(*(self._launch(slot) for slot in new_slots), return_exceptions=True)
+        for slot, result in zip(new_slots, results):
+            if isinstance(result, Exception):
+                # El pool sigue con los que ya tiene; este slot se relanza en segundo plano
+                logging.error(f"No se pudo lanzar el navegador {slot.index}: {result}")
+                task = asyncio.ensure_future(self._replace(slot))
+                self._replacements.add(task)
+                task.add_done_callback(self._replacements.discard)
+        logging.info(f"BrowserPool ampliado a {len(self._slots)} navegadores")
+
+    async def _launch(self, slot: _BrowserSlot) -> None:
+        browser = await self.playwright.chromium.launch(**self.launch_options)
+        contexts = []
+        for _ in range(self.contexts_per_browser):
+            context = await browser.new_context(**self.context_options)
+            if self.context_setup is not None:
+                await self.context_setup(context)
+            context_slot = _ContextSlot(slot, context)
+            # Páginas precreadas: la primera ronda de URLs no paga la creación
+            for _ in range(self.pages_per_context):
+                context_slot.idle_pages.append(_PooledPage(await self._new_page(context)))
+            contexts.append(context_slot)
+
+        slot.browser = browser
+        slot.contexts = contexts
+        slot.generation += 1
+        slot.alive = True
+        generation = slot.generation
+        browser.on("disconnected", lambda _: self._on_disconnected(slot, generation))
+        async with self._available:
+            self._available.notify_all()
+
+    def _on_disconnected(self, slot: _BrowserSlot, generation: int) -> None:
+        if self._closing or slot.generation != generation:
+            return
+        self.crashes += 1
+        slot.alive = False
+        logging.warning(f"Navegador {slot.index} desconectado; lanzando reemplazo...")
+        task = asyncio.ensure_future(self._replace(slot))
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    async def _replace(self, slot: _BrowserSlot) -> None:
+        delay = 1.0
+        while not self._closing:
+            try:
+                await self._launch(slot)
+                logging.info(f"Navegador {slot.index} reemplazado (generación {slot.generation})")
+                return
+            except Exception as e:
+                logging.error(f"No se pudo relanzar el navegador {slot.index}: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _least_loaded(self) -> Optional[_ContextSlot]:
+        candidates = [c for slot in self._slots if slot.alive for c in slot.contexts]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: (c.active, c.browser_slot.active))
+
+    async def _acquire(self) -> _ContextSlot:
+        async with self._available:
+            await self._available.wait_for(lambda: self._closing or self._least_loaded() is not None)
+            if self._closing:
+                raise RuntimeError("BrowserPool cerrado")
+            slot = self._least_loaded()
+            slot.active += 1
+        return slot
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Reserva el contexto menos cargado mientras dura el bloque `async with`."""
+        slot = await self._acquire()
+        try:
+            yield slot.context
+        finally:
+            slot.active -= 1
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Página en el contexto menos cargado. Sin `recycle_pages` se crea y se cierra en cada
+        uso; con él se toma una página libre del contexto y al terminar se devuelve al pool.
+        """
+        slot = await self._acquire()
+        try:
+            if slot.idle_pages:
+                pooled = slot.idle_pages.pop()
+                self.pages_reused += 1
+            else:
+                pooled = _PooledPage(await self._new_page(slot.context))
+            try:
+                yield pooled.page
+            finally:
+                await self._release_page(slot, pooled)
+        finally:
+            slot.active -= 1
+
+    async def _new_page(self, context: BrowserContext) -> Page:
+        page = await context.new_page()
+        self.pages_created += 1
+        if self.page_setup is not None:
+            await self.page_setup(context, page)
+        return page
+
+    async def _release_page(self, slot: _ContextSlot, pooled: _PooledPage) -> None:
+        pooled.navigations += 1
+        try:
+            # El contexto ya no está en el pool si su navegador se cayó y fue reemplazado
+            if self.recycle_pages and not self._closing and slot in slot.browser_slot.contexts \
+                    and pooled.navigations < self.max_navigations \
+                    and await pooled.page.evaluate(_HEAP_USED_JS) < self.max_heap_bytes:
+                await pooled.page.goto("about:blank")
+                slot.idle_pages.append(pooled)
+                return
+        except Exception:
+            pass
+        if self.recycle_pages:
+            self.pages_retired += 1
+        try:
+            await pooled.page.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "browsers": len(self._slots),
+            "alive": sum(1 for s in self._slots if s.alive),
+            "contexts_per_browser": self.contexts_per_browser,
+            "active_pages": [s.active for s in self._slots],
+            "crashes": self.crashes,
+            "pages_created": self.pages_created,
+            "pages_reused": self.pages_reused,
+            "pages_retired": self.pages_retired,
+        }
+
+    async def close(self) -> None:
+        self._closing = True
+        for task in list(self._replacements):
+            task.cancel()
+        async with self._available:
+            self._available.notify_all()
+        for slot in self._slots:
+            if slot.browser is not None and slot.alive:
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+            slot.alive = False
@@ -0,0 +1,91 @@
+"""
+Detección de cambios a partir de las tarjetas de resultados de Century21.
+
+Las tarjetas ya muestran ID, título y precio. Si un anuncio conocido (fila de
+Property con el mismo `external_id`) conserva precio y título, no hace falta
+abrir su ficha; solo los anuncios nuevos o cambiados pasan al scraping de detalle.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.database import Property
+
+SOURCE_PLATFORM = "century21"
+# Diferencia de precio que se considera redondeo y no un cambio real
+PRICE_TOLERANCE = 0.5
+# Máximo de IDs por consulta IN (...) (SQLite admite 999 parámetros en versiones antiguas)
+QUERY_BATCH_SIZE = 500
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Título comparable: sin acentos, mayúsculas ni whitespace repetido."""
+    if not title:
+        return ""
+    text = unicodedata.normalize("NFKD", title)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+class CardDeltaDetector:
+    """Clasifica tarjetas en "new", "changed" o "unchanged" contra las filas de Property."""
+
+    def __init__(self, session_factory: Callable[[], Session], source_platform: str = SOURCE_PLATFORM):
+        self.session_factory = session_factory
+        self.source_platform = source_platform
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    def load_known(self, property_ids: Iterable[str]) -> dict[str, tuple[Optional[float], Optional[str]]]:
+        """(price, title) guardados por external_id, consultados por lotes."""
+        ids = list(dict.fromkeys(property_ids))
+        known: dict[str, tuple[Optional[float], Optional[str]]] = {}
+        session = self.session_factory()
+        try:
+            for start in range(0, len(ids), QUERY_BATCH_SIZE):
+                rows = (
+                    session.query(Property.external_id, Property.price, Property.title)
+                    .filter(Property.source_platform == self.source_platform)
+                    .filter(Property.external_id.in_(ids[start:start + QUERY_BATCH_SIZE]))
+                    .all()
+                )
+                for external_id, price, title in rows:
+                    known[external_id] = (price, title)
+        finally:
+            session.close()
+        return known
+
+    @staticmethod
+    def card_status(card: dict, stored: Optional[tuple[Optional[float], Optional[str]]]) -> str:
+        if stored is None:
+            return "new"
+        price, title = stored
+        # Sin precio en la tarjeta no se puede confirmar nada: se trata como cambio
+        if card.get("price") is None or price is None or abs(card["price"] - price) > PRICE_TOLERANCE:
+            return "changed"
+        if normalize_title(card.get("title")) != normalize_title(title):
+            return "changed"
+        return "unchanged"
+
+    def classify(self, cards: list[dict]) -> list[tuple[dict, str]]:
+        """Cada tarjeta con su estado; una sola ida a la base por lote de tarjetas."""
+        known = self.load_known(card["property_id"] for card in cards)
+        result = []
+        for card in cards:
+            status = self.card_status(card, known.get(card["property_id"]))
+            self.counts[status] += 1
+            result.append((card, status))
+        return result
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {
+            **self.counts,
+            "skip_rate": round(self.counts["unchanged"] / total, 3) if total else 0.0,
+        }
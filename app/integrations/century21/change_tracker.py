@@ -0,0 +1,149 @@
+"""
+Detección de cambios entre recrawls de páginas de Century21.
+
+Para cada URL se guarda la última huella conocida: los validadores HTTP
+(ETag / Last-Modified) cuando el servidor los envía, y el sha256 del
+fragmento `#detallePropiedad` normalizado. Si en el siguiente recrawl
+coinciden, el scraper puede saltarse el parsing y las escrituras.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+import lxml.html
+
+# Devuelve el HTML del bloque de detalle (o del body en layouts sin #detallePropiedad)
+DETAIL_FRAGMENT_JS = """() => {
+    const el = document.querySelector('#detallePropiedad') || document.body;
+    return el ? el.outerHTML : '';
+}"""
+
+_DETAIL_XPATH = '//*[@id="detallePropiedad"]'
+
+_SCRIPT_RE = re.compile(r'<(script|style|noscript)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+_TAG_GAP_RE = re.compile(r'\s*([<>])\s*')
+
+
+def fingerprint_fragment(fragment_html: str) -> str:
+    """
+    sha256 del fragmento normalizado: sin scripts/estilos ni comentarios (suelen llevar
+    nonces, timestamps o IDs de tracking), con el whitespace colapsado y sin espacios
+    junto a los tags.
+    """
+    normalized = _SCRIPT_RE.sub('', fragment_html)
+    normalized = _COMMENT_RE.sub('', normalized)
+    normalized = _WHITESPACE_RE.sub(' ', normalized)
+    normalized = _TAG_GAP_RE.sub(r'\1', normalized).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def detail_fragment(html: str) -> str:
+    """
+    Equivalente de DETAIL_FRAGMENT_JS sobre el HTML del servidor (camino HTTP). El HTML
+    serializado por lxml no es idéntico al outerHTML del navegador, así que al cambiar de
+    camino la página cuenta una vez como modificada.
+    """
+    if not html or not html.strip():
+        return ''
+    root = lxml.html.document_fromstring(html)
+    found = root.xpath(_DETAIL_XPATH)
+    el = found[0] if found else root.find('body')
+    return lxml.html.tostring(el, encoding='unicode', with_tail=False) if el is not None else ''
+
+
+def html_fingerprint(html: str) -> str:
+    """Huella del fragmento de detalle a partir del HTML del servidor (camino HTTP)."""
+    return fingerprint_fragment(detail_fragment(html))
+
+
+class ChangeTracker:
+    """
+    Huellas por URL persistidas en SQLite, con contadores de páginas sin cambios. Los métodos
+    que consultan o escriben la base son síncronos: desde el event loop van a un hilo.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS page_fingerprints (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at TEXT
+            )"""
+        )
+        self._conn.commit()
+
+        self.checked = 0
+        self.unchanged = 0
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, etag, last_modified FROM page_fingerprints WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def validators_match(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """True si el servidor envió un ETag o Last-Modified igual al guardado."""
+        stored = self.get(url)
+        if stored is None:
+            return False
+        if etag and stored["etag"] == etag:
+            return True
+        if last_modified and stored["last_modified"] == last_modified:
+            return True
+        return False
+
+    def fingerprint_matches(self, url: str, fingerprint: str) -> bool:
+        stored = self.get(url)
+        return stored is not None and stored["fingerprint"] == fingerprint
+
+    def record_check(self, unchanged: bool) -> None:
+        self.checked += 1
+        if unchanged:
+            self.unchanged += 1
+
+    def update(self, url: str, fingerprint: Optional[str], etag: Optional[str] = None,
+               last_modified: Optional[str] = None) -> None:
+        """Guarda la huella de una página recién parseada (fingerprint=None conserva la anterior)."""
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO page_fingerprints (url, fingerprint, etag, last_modified, checked_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       fingerprint = COALESCE(excluded.fingerprint, page_fingerprints.fingerprint),
+                       etag = excluded.etag,
+                       last_modified = excluded.last_modified,
+                       checked_at = excluded.checked_at""",
+                (url, fingerprint, etag, last_modified, datetime.datetime.utcnow().isoformat()),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "unchanged": self.unchanged,
+            "skip_rate": round(self.unchanged / self.checked, 3) if self.checked else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
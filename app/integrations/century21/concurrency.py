@@ -0,0 +1,153 @@
+"""
+Control adaptativo de concurrencia (AIMD) para el scraper de Century21.
+
+Sustituye al semáforo fijo: el límite sube de uno en uno mientras el p95 de
+latencia y la tasa de errores se mantienen sanos, y se reduce a la mitad ante
+timeouts o respuestas 429/5xx, siempre entre un piso y un techo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from prometheus_client import Gauge
+
+CONCURRENCY_LIMIT_GAUGE = Gauge(
+    "century21_scraper_concurrency_limit",
+    "Límite actual de páginas simultáneas del controlador AIMD",
+)
+
+THROTTLE_STATUSES = {429, 502, 503, 504}
+
+
+class RequestSlot:
+    """Turno concedido por el limitador; el código que hace el request anota aquí el resultado."""
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.started = time.perf_counter()
+        self.outcome = "ok"  # "ok", "error" o "throttled"
+
+    def status(self, status: Optional[int]) -> None:
+        """Registra el status HTTP de la respuesta (429/5xx cuentan como throttling)."""
+        if status is not None and (status in THROTTLE_STATUSES or status >= 500):
+            self.outcome = "throttled"
+
+    def timeout(self) -> None:
+        self.outcome = "throttled"
+
+    def error(self) -> None:
+        if self.outcome == "ok":
+            self.outcome = "error"
+
+
+class AdaptiveLimiter:
+    """
+    Semáforo con límite variable. Aumento aditivo: +1 por cada "ronda" (tantos requests
+    terminados como el límite actual) si la ventana reciente está sana. Disminución
+    multiplicativa: límite × backoff ante throttling, como mucho una vez por ronda (los
+    requests que empezaron antes del último recorte no vuelven a recortar).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        floor: int = 1,
+        ceiling: int = 64,
+        target_p95_seconds: float = 10.0,
+        max_error_rate: float = 0.05,
+        backoff: float = 0.5,
+        window: int = 50,
+    ):
+        if not 1 <= floor <= ceiling:
+            raise ValueError("Se requiere 1 <= floor <= ceiling")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.limit = min(max(initial, floor), ceiling)
+        self.target_p95_seconds = target_p95_seconds
+        self.max_error_rate = max_error_rate
+        self.backoff = backoff
+        self.in_flight = 0
+        self._epoch = 0
+        self._completed_in_round = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._errors: deque[bool] = deque(maxlen=window)
+        self._available = asyncio.Condition()
+        self.increases = 0
+        self.decreases = 0
+        CONCURRENCY_LIMIT_GAUGE.set(self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[RequestSlot]:
+        async with self._available:
+            await self._available.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        request = RequestSlot(self._epoch)
+        try:
+            yield request
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            request.error()
+            raise
+        finally:
+            async with self._available:
+                self.in_flight -= 1
+                self._record(request)
+                self._available.notify_all()
+
+    def p95(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def error_rate(self) -> float:
+        return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    def _record(self, request: RequestSlot) -> None:
+        self._latencies.append(time.perf_counter() - request.started)
+        self._errors.append(request.outcome != "ok")
+
+        if request.outcome == "throttled":
+            if request.epoch == self._epoch:
+                self._set_limit(max(self.floor, int(self.limit * self.backoff)))
+                self.decreases += 1
+            return
+
+        self._completed_in_round += 1
+        if self._completed_in_round < self.limit:
+            return
+        p95 = self.p95()
+        if self.limit < self.ceiling and p95 is not None and p95 <= self.target_p95_seconds \
+                and self.error_rate() <= self.max_error_rate:
+            self._set_limit(self.limit + 1)
+            self.increases += 1
+        else:
+            self._completed_in_round = 0
+
+    def _set_limit(self, limit: int) -> None:
+        if limit != self.limit:
+            logging.info(f"Concurrencia: {self.limit} -> {limit}")
+        self.limit = limit
+        self._epoch += 1
+        self._completed_in_round = 0
+        CONCURRENCY_LIMIT_GAUGE.set(limit)
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "limit": self.limit,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "in_flight": self.in_flight,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
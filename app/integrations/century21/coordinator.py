@@ -0,0 +1,293 @@
+"""
+Coordinador HTTP de la cola de trabajos para scraping con varios nodos.
+
+Un solo proceso es dueño del archivo SQLite de ScrapeJobQueue y lo expone por HTTP;
+cada nodo usa RemoteJobQueue, que tiene la misma interfaz que la cola local
+(claim / heartbeat / complete / fail / release), así que jobs_main funciona igual
+con un archivo local o con el coordinador. Cada nodo reserva con su propio
+worker_id: si un nodo muere, sus leases vencen y los trabajos pasan a otro.
+
+El coordinador también reparte los turnos del rate limit por host: cada nodo pide
+su turno con RemoteRateLimiter, así que el ritmo contra el sitio es el de
+--rate-per-minute sumando todos los nodos, no ese ritmo por nodo.
+
+Todos los endpoints piden el token compartido en `Authorization: Bearer ...`
+(--token o COORDINATOR_TOKEN, el mismo en el coordinador y en los nodos). Sin
+token solo se permite escuchar en localhost.
+
+    COORDINATOR_TOKEN=... python -m app.integrations.century21.coordinator [--host 0.0.0.0] [--port 8765]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import logging
+import os
+import time
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from aiohttp import web
+
+from app.integrations.century21.job_queue import (
+    ENQUEUE_BATCH_SIZE,
+    JOB_QUEUE_DB,
+    JOB_LEASE_SECONDS,
+    JobSource,
+    ScrapeJobQueue,
+    default_worker_id,
+)
+from app.integrations.century21.rate_limit import (
+    RATE_LIMIT_STATE, RATE_LIMIT_WAIT_SECONDS, HostRateLimiter, settings_rate,
+)
+
+COORDINATOR_HOST = "127.0.0.1"
+COORDINATOR_PORT = 8765
+COORDINATOR_TIMEOUT_SECONDS = 30.0
+# Token compartido entre el coordinador y los nodos
+COORDINATOR_TOKEN_ENV = "COORDINATOR_TOKEN"
+
+
+def default_token() -> Optional[str]:
+    return os.environ.get(COORDINATOR_TOKEN_ENV) or None
+
+
+def auth_headers(token: Optional[str]) -> dict:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_app(queue: ScrapeJobQueue, rate_limiter: HostRateLimiter | None = None,
+               token: Optional[str] = None) -> web.Application:
+    """
+    Aplicación aiohttp con los endpoints de la cola; las llamadas a SQLite van a un hilo. Con
+    `rate_limiter` también reparte los turnos por host entre los nodos (POST /rate/reserve).
+    Con `token` todo request sin `Authorization: Bearer <token>` recibe 401.
+    """
+
+    @web.middleware
+    async def check_token(request: web.Request, handler):
+        if token is not None:
+            given = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+                return web.json_response({"error": "token inválido"}, status=401)
+        return await handler(request)
+
+    async def call(method, *args):
+        return await asyncio.to_thread(method, *args)
+
+    async def config(request: web.Request) -> web.Response:
+        return web.json_response({
+            "lease_seconds": queue.lease_seconds,
+            "max_attempts": queue.max_attempts,
+            "rate_limited": rate_limiter is not None,
+        })
+
+    async def reserve(request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response({"wait": await call(rate_limiter.reserve, body["host"])})
+
+    async def enqueue(request: web.Request) -> web.Response:
+        body = await request.json()
+        added = await call(queue.enqueue, request.match_info["batch"], body["urls"], body.get("scraping_session_id"))
+        return web.json_response({"added": added})
+
+    async def claim(request: web.Request) -> web.Response:
+        body = await request.json()
+        jobs = await call(queue.claim, request.match_info["batch"], int(body.get("limit", 1)), body["worker_id"])
+        return web.json_response({"jobs": jobs})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(await call(queue.stats, request.match_info.get("batch")))
+
+    async def errors(request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 100))
+        return web.json_response({"errors": await call(queue.errors, request.match_info["batch"], limit)})
+
+    async def retry_failed(request: web.Request) -> web.Response:
+        return web.json_response({"retried": await call(queue.retry_failed, request.match_info["batch"])})
+
+    async def complete(request: web.Request) -> web.Response:
+        return web.json_response({"ok": await call(queue.complete, int(request.match_info["job_id"]))})
+
+    async def fail(request: web.Request) -> web.Response:
+        body = await request.json()
+        ok = await call(queue.fail, int(request.match_info["job_id"]), body["error"], body["worker_id"])
+        return web.json_response({"ok": ok})
+
+    async def heartbeat(request: web.Request) -> web.Response:
+        return web.json_response({"renewed": await call(queue.heartbeat, request.match_info["worker_id"])})
+
+    async def release(request: web.Request) -> web.Response:
+        return web.json_response({"released": await call(queue.release, request.match_info["worker_id"])})
+
+    app = web.Application(middlewares=[check_token])
+    app.add_routes([
+        web.get("/config", config),
+        web.get("/stats", stats),
+        web.post("/batches/{batch}/enqueue", enqueue),
+        web.post("/batches/{batch}/claim", claim),
+        web.get("/batches/{batch}/stats", stats),
+        web.get("/batches/{batch}/errors", errors),
+        web.post("/batches/{batch}/retry-failed", retry_failed),
+        web.post("/jobs/{job_id}/complete", complete),
+        web.post("/jobs/{job_id}/fail", fail),
+        web.post("/workers/{worker_id}/heartbeat", heartbeat),
+        web.post("/workers/{worker_id}/release", release),
+    ])
+    if rate_limiter is not None:
+        app.add_routes([web.post("/rate/reserve", reserve)])
+    return app
+
+
+class RemoteJobQueue(JobSource):
+    """Cliente del coordinador con la interfaz de ScrapeJobQueue (llamadas síncronas, como la cola local)."""
+
+    def __init__(self, base_url: str, worker_id: Optional[str] = None,
+                 timeout: float = COORDINATOR_TIMEOUT_SECONDS, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.worker_id = worker_id or default_worker_id()
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout,
+                                    headers=auth_headers(token or default_token()))
+        config = self._request("GET", "/config")
+        self.lease_seconds = config["lease_seconds"]
+        self.max_attempts = config["max_attempts"]
+        # Si el coordinador reparte los turnos del rate limit (ver RemoteRateLimiter)
+        self.rate_limited = config.get("rate_limited", False)
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        response = self._client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def enqueue(self, batch: str, urls: Iterable[str], scraping_session_id: Optional[int] = None) -> int:
+        """Encola por tandas para no mandar la lista completa en un solo request."""
+        added, chunk = 0, []
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) >= ENQUEUE_BATCH_SIZE:
+                added += self._enqueue_chunk(batch, chunk, scraping_session_id)
+                chunk = []
+        if chunk:
+            added += self._enqueue_chunk(batch, chunk, scraping_session_id)
+        return added
+
+    def _enqueue_chunk(self, batch: str, urls: list[str], scraping_session_id: Optional[int]) -> int:
+        body = {"urls": urls, "scraping_session_id": scraping_session_id}
+        return self._request("POST", f"/batches/{batch}/enqueue", json=body)["added"]
+
+    def claim(self, batch: str, limit: int = 1) -> list[dict]:
+        body = {"limit": limit, "worker_id": self.worker_id}
+        return self._request("POST", f"/batches/{batch}/claim", json=body)["jobs"]
+
+    def heartbeat(self) -> int:
+        return self._request("POST", f"/workers/{self.worker_id}/heartbeat")["renewed"]
+
+    def complete(self, job_id: int) -> bool:
+        return self._request("POST", f"/jobs/{job_id}/complete")["ok"]
+
+    def fail(self, job_id: int, error: str) -> bool:
+        body = {"error": error, "worker_id": self.worker_id}
+        return self._request("POST", f"/jobs/{job_id}/fail", json=body)["ok"]
+
+    def release(self) -> int:
+        return self._request("POST", f"/workers/{self.worker_id}/release")["released"]
+
+    def retry_failed(self, batch: str) -> int:
+        return self._request("POST", f"/batches/{batch}/retry-failed")["retried"]
+
+    def stats(self, batch: Optional[str] = None) -> dict:
+        return self._request("GET", f"/batches/{batch}/stats" if batch else "/stats")
+
+    def errors(self, batch: str, limit: int = 100) -> list[dict]:
+        return self._request("GET", f"/batches/{batch}/errors", params={"limit": limit})["errors"]
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class RemoteRateLimiter:
+    """
+    Rate limiter por host cuyos turnos reparte el coordinador: misma interfaz que
+    HostRateLimiter (acquire / stats / close), un solo presupuesto para todos los nodos.
+    """
+
+    def __init__(self, base_url: str, timeout: float = COORDINATOR_TIMEOUT_SECONDS,
+                 token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout,
+                                    headers=auth_headers(token or default_token()))
+        self.waited_seconds: dict[str, float] = {}
+        self.requests: dict[str, int] = {}
+
+    def reserve(self, host: str) -> float:
+        response = self._client.post("/rate/reserve", json={"host": host})
+        response.raise_for_status()
+        return response.json()["wait"]
+
+    async def acquire(self, url: str) -> float:
+        """Pide el turno al coordinador y espera lo que indique; devuelve los segundos esperados."""
+        host = urlsplit(url).netloc
+        requested = time.monotonic()
+        wait = await asyncio.to_thread(self.reserve, host)
+        # El viaje al coordinador ya cuenta como parte de la espera
+        wait = max(0.0, wait - (time.monotonic() - requested))
+        self.requests[host] = self.requests.get(host, 0) + 1
+        if wait > 0:
+            self.waited_seconds[host] = self.waited_seconds.get(host, 0.0) + wait
+            RATE_LIMIT_WAIT_SECONDS.labels(host).inc(wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            host: {"requests": count, "waited_s": round(self.waited_seconds.get(host, 0.0), 2)}
+            for host, count in self.requests.items()
+        }
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coordinador HTTP de la cola de scraping")
+    parser.add_argument("--host", default=COORDINATOR_HOST)
+    parser.add_argument("--port", type=int, default=COORDINATOR_PORT)
+    parser.add_argument("--queue-db", default=JOB_QUEUE_DB)
+    parser.add_argument("--lease-seconds", type=float, default=JOB_LEASE_SECONDS)
+    rate_per_minute, rate_burst = settings_rate()
+    parser.add_argument("--rate-per-minute", type=float, default=rate_per_minute,
+                        help="Requests por minuto a cada host, sumando todos los nodos (por defecto scraper_rate_per_minute)")
+    parser.add_argument("--rate-burst", type=int, default=rate_burst)
+    parser.add_argument("--rate-state", default=RATE_LIMIT_STATE)
+    parser.add_argument("--token", default=default_token(),
+                        help=f"Token que deben mandar los nodos (por defecto ${COORDINATOR_TOKEN_ENV})")
+    args = parser.parse_args()
+    if not args.token and not is_loopback(args.host):
+        # La API no tiene otra protección: cualquiera que llegue al puerto podría tomar o cerrar trabajos
+        parser.error(f"escuchar en {args.host} requiere --token o {COORDINATOR_TOKEN_ENV}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    queue = ScrapeJobQueue(args.queue_db, lease_seconds=args.lease_seconds)
+    rate_limiter = HostRateLimiter(args.rate_per_minute, args.rate_burst, state_path=args.rate_state)
+    try:
+        web.run_app(create_app(queue, rate_limiter, token=args.token), host=args.host, port=args.port)
+    finally:
+        rate_limiter.close()
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
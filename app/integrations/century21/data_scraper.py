@@ -4,10 +4,42 @@ import time
 import json
 import pandas as pd
 import datetime
-from playwright.async_api import async_playwright, Route, BrowserContext
+from playwright.async_api import async_playwright, Route, BrowserContext, Page, TimeoutError as PlaywrightTimeoutError
+import httpx
 from bs4 import BeautifulSoup, Tag, NavigableString
 import logging
+import math
+import os
 import sys
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.integrations.century21.browser_pool import BrowserPool, browsers_for_concurrency
+from app.integrations.century21.fast_parser import LxmlPropertyParser
+from app.integrations.century21.frontier import UrlFrontier
+from app.integrations.century21.html_archive import HtmlArchive
+from app.integrations.century21.concurrency import AdaptiveLimiter
+from app.integrations.century21.change_tracker import (
+    ChangeTracker, DETAIL_FRAGMENT_JS, fingerprint_fragment, html_fingerprint,
+)
+from app.integrations.century21.http_fetcher import HttpFetcher
+from app.integrations.century21.image_scraper import gallery_image_urls
+from app.integrations.century21.job_queue import (
+    JOB_QUEUE_DB, SESSION_SYNC_SECONDS, JobSource, ScrapeJobQueue, sync_scraping_session,
+)
+from app.integrations.century21.listing_crawler import FRONTIER_DB
+from app.integrations.century21.parse_pool import ParsePool
+from app.integrations.century21.property_store import upsert_properties
+from app.integrations.century21.rate_limit import HostRateLimiter, shared_rate_limiter
+from app.integrations.century21.request_blocking import REQUEST_BLOCKING_MODES, setup_context as setup_blocking_context, setup_page as setup_blocking_page
+from app.integrations.century21.readiness import EXTRACTION_TARGETS, wait_until_ready
+# Intentos por URL y backoff: los mismos que las descargas de imágenes
+from app.integrations.century21.resilience import (
+    MAX_ATTEMPTS as MAX_FETCH_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    RETRIES_TOTAL, RETRYABLE_STATUSES, HostCircuitBreakers, RetryableStatusError,
+    backoff_delay, classify_error, is_retryable, parse_retry_after,
+)
+from app.integrations.century21.sharding import HashRing
 
 # --- Configuración Básica de Logging ---
 # Nivel INFO muestra el progreso.
@@ -15,16 +47,130 @@ logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 # --- Configuración Global ---
 CONCURRENCY_LIMIT = 8
+# Control adaptativo (AIMD): la concurrencia arranca en CONCURRENCY_LIMIT y se mueve entre el piso y el techo
+CONCURRENCY_FLOOR = 2
+CONCURRENCY_CEILING = 32
+TARGET_P95_SECONDS = 10.0
 TIMEOUT = 30000
 HEADLESS = True
 RESOURCES_TO_BLOCK = ["image", "stylesheet", "media", "font", "other"]
+# Bloqueo de sub-requests: "cdp" (en el navegador, sin pasar por Python), "globs" (solo los
+# requests bloqueados llegan a Python) o "python" (todos pasan por _intercept_route)
+REQUEST_BLOCKING = "cdp"
+# "bs4": BeautifulSoup (referencia). "lxml": selectores precompilados sobre lxml (más rápido, mismo resultado).
+PARSER_BACKENDS = ("bs4", "lxml")
+# Workers para parsear fuera del event loop (0 = parsing en línea). PARSE_EXECUTOR: "process" o "thread".
+PARSE_WORKERS = 0
+PARSE_EXECUTOR = "process"
+# Archivo de HTML crudo para re-parsear sin volver a descargar (modo "reparse")
+ARCHIVE_HTML = False
+HTML_ARCHIVE_DIR = "./data/html_archive"
+# Detección de cambios: las páginas sin cambios desde el último scraping no se parsean
+TRACK_CHANGES = False
+FINGERPRINT_DB = "./data/page_fingerprints.sqlite3"
+# Clave del resultado con la huella pendiente de guardar (ver commit_fingerprint)
+FINGERPRINT_KEY = "page_fingerprint"
+# "browser": siempre Playwright. "http_first": GET con httpx y Playwright solo si faltan campos obligatorios.
+FETCH_MODES = ("browser", "http_first")
+FETCH_MODE = "browser"
+REQUIRED_FIELDS = ("titulo", "precio")
+# Pool de navegadores: procesos de Chromium (0 = uno por cada PAGES_PER_BROWSER de concurrencia) y contextos por proceso
+BROWSERS = 0
+CONTEXTS_PER_BROWSER = 1
+# URLs (y resultados) en cola por worker; acota la memoria con entradas de cualquier tamaño
+QUEUE_SIZE_PER_WORKER = 2
+# Esperas de readiness conservadas para los percentiles (los conteos por motivo cubren todas las URLs)
+READINESS_WAIT_WINDOW = 1000
+# Reutilizar páginas entre URLs (reset con about:blank); se retiran tras N navegaciones o si su heap pasa del umbral
+RECYCLE_PAGES = True
+MAX_NAVIGATIONS_PER_PAGE = 50
+MAX_PAGE_HEAP_MB = 256
+# Modo cola: resultados por upsert a la tabla Property (y trabajos completados) por tanda o cada tantos segundos
+STORE_BATCH_SIZE = 50
+STORE_FLUSH_SECONDS = 2.0
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
 
 class Century21RobustScraper:
-    def __init__(self, concurrency):
-        self.concurrency_limit = concurrency
-        self.semaphore = asyncio.Semaphore(concurrency)
+    def __init__(self, concurrency, parser_backend: str = "bs4", parse_workers: int = 0, parse_executor: str = "process",
+                 archive_dir: str | None = None, fingerprint_db: str | None = None, fetch_mode: str = "browser",
+                 browsers: int = 0, contexts_per_browser: int = 1,
+                 min_concurrency: int | None = None, max_concurrency: int | None = None,
+                 recycle_pages: bool = RECYCLE_PAGES, request_blocking: str = REQUEST_BLOCKING,
+                 max_attempts: int = MAX_FETCH_ATTEMPTS, rate_limiter: HostRateLimiter | None = None,
+                 with_images: bool = False):
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError(f"parser_backend debe ser uno de {PARSER_BACKENDS}, no '{parser_backend}'")
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"fetch_mode debe ser uno de {FETCH_MODES}, no '{fetch_mode}'")
+        if request_blocking not in REQUEST_BLOCKING_MODES:
+            raise ValueError(f"request_blocking debe ser uno de {REQUEST_BLOCKING_MODES}, no '{request_blocking}'")
+        if max_attempts < 1:
+            raise ValueError("max_attempts debe ser al menos 1")
+        if with_images and fetch_mode != "browser":
+            raise ValueError("with_images necesita fetch_mode='browser' (las URLs de las fotos se leen del DOM)")
+        # Reemplaza al semáforo fijo: el límite se adapta a la latencia y a los errores del sitio
+        self.limiter = AdaptiveLimiter(
+            concurrency,
+            floor=min_concurrency or min(CONCURRENCY_FLOOR, concurrency),
+            ceiling=max_concurrency or max(CONCURRENCY_CEILING, concurrency),
+            target_p95_seconds=TARGET_P95_SECONDS,
+        )
         # Usamos 2025 como referencia basado en el contexto de la conversación
         self.current_year = 2025
+        self.parser_backend = parser_backend
+        self._fast_parser = LxmlPropertyParser(self) if parser_backend == "lxml" else None
+        # El pool se crea una vez y sus workers siguen calientes entre llamadas a run(); ver close().
+        self.parse_pool = ParsePool(parse_workers, parser_backend, parse_executor) if parse_workers > 0 else None
+        # Si se indica, cada page.content() se guarda en el archivo de HTML crudo
+        self.archive = HtmlArchive(archive_dir) if archive_dir else None
+        # Si se indica, las páginas sin cambios devuelven {"url": ..., "unchanged": True}
+        self.change_tracker = ChangeTracker(fingerprint_db) if fingerprint_db else None
+        self.fetch_mode = fetch_mode
+        self.http_fetcher = HttpFetcher(max_connections=self.limiter.ceiling, timeout_ms=TIMEOUT) if fetch_mode == "http_first" else None
+        # Resultados por camino ("http" o "browser") y tiempo de navegador de los fallbacks; solo
+        # agregados, para que un worker de larga vida no crezca con cada URL
+        self.fetch_counts = {"http": 0, "browser": 0}
+        self.fallback_browser_seconds = 0.0
+        # Cómo terminó la espera de readiness ("ready", "stable", "timeout"): URLs por motivo, las
+        # últimas esperas y el total; nada por URL, para que un worker de larga vida no crezca
+        self.readiness_counts: dict[str, int] = {}
+        self._readiness_waits: deque[float] = deque(maxlen=READINESS_WAIT_WINDOW)
+        self._readiness_wait_total_ms = 0.0
+        # N navegadores × M contextos; el pool se crea en run(). Con browsers=0 se dimensiona con el
+        # límite inicial (sin pasar del número de URLs) y crece si el limitador sube el límite
+        self.browsers = browsers
+        self.max_browsers = browsers or browsers_for_concurrency(self.limiter.ceiling)
+        self.contexts_per_browser = contexts_per_browser
+        self.browser_pool: BrowserPool | None = None
+        self._browser_pool_started = False
+        self._browser_pool_lock = asyncio.Lock()
+        self._browser_pool_growth: asyncio.Task | None = None
+        # Tope de concurrencia útil del lote en curso (número de URLs si se conoce)
+        self._session_cap: int | None = None
+        self.recycle_pages = recycle_pages
+        self.request_blocking = request_blocking
+        # Reintentos de errores transitorios y un circuit breaker por host
+        self.max_attempts = max_attempts
+        self.breakers = HostCircuitBreakers()
+        self.retry_counts: dict[str, int] = {}
+        # Token bucket por host (opcional); lo cierra quien lo crea
+        self.rate_limiter = rate_limiter
+        # Si se indica, cada resultado trae "imagenes" (URLs de la galería) leídas en la misma
+        # navegación; los bytes de las imágenes siguen bloqueados
+        self.with_images = with_images
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs) -> "Century21RobustScraper":
+        """Crea el scraper con la concurrencia y el pool de navegadores de app.config.Settings."""
+        kwargs.setdefault("browsers", settings.scraping_browsers)
+        kwargs.setdefault("contexts_per_browser", settings.scraping_contexts_per_browser)
+        kwargs.setdefault("min_concurrency", settings.scraping_concurrency_min)
+        kwargs.setdefault("max_concurrency", settings.scraping_concurrency_max)
+        if settings.scraping_track_changes:
+            kwargs.setdefault("fingerprint_db", settings.scraping_fingerprint_db)
+        if "rate_limiter" not in kwargs:
+            kwargs["rate_limiter"] = HostRateLimiter.from_settings(settings)
+        return cls(settings.scraping_concurrency_limit, **kwargs)
 
     # --------------------------------------------------
     # FUNCIONES DE LIMPIEZA Y UTILIDAD (ACTUALIZADO)
@@ -119,9 +265,7 @@ class Century21RobustScraper:
         Extrae detalles (clave-valor), amenidades estructurales, 
         Y genera la 'descripcion_amenidades' narrativa preservando el orden.
         """
-        data = {}
-        amenities = []
-        amenities_description_parts = []
+        entries = []
 
         selectors = [
             'div[class*="col-sm-12 col-md-6 my-1"]',
@@ -161,6 +305,20 @@ class Century21RobustScraper:
                      key_text = " ".join(key_text_parts).strip()
                      value_text = ""
 
+            entries.append((key_text, value_text))
+
+        return self._build_details_data(entries)
+
+    def _build_details_data(self, entries: list[tuple[str, str]]) -> dict:
+        """
+        Convierte los pares (clave, valor) de los bloques de detalle en datos estructurados
+        y en la 'descripcion_amenidades' narrativa. Compartido por todos los backends de parsing.
+        """
+        data = {}
+        amenities = []
+        amenities_description_parts = []
+
+        for key_text, value_text in entries:
             # --- Procesamiento y Generación de Narrativa ---
             if key_text:
                 key_normalized = key_text.lower().replace(' ', '_')
@@ -329,6 +487,11 @@ class Century21RobustScraper:
     # --------------------------------------------------
 
     def parse_property_html(self, html_content: str, url: str) -> dict:
+        if self._fast_parser is not None:
+            return self._fast_parser.parse(html_content, url)
+        return self._parse_property_html_bs4(html_content, url)
+
+    def _parse_property_html_bs4(self, html_content: str, url: str) -> dict:
         soup = BeautifulSoup(html_content, 'lxml')
         data = {"url": url}
 
@@ -379,6 +542,10 @@ class Century21RobustScraper:
             # Luego, guardamos la descripción usando la función especializada para respetar el formato.
             data['descripcion'] = self._clean_description_text(description_raw)
 
+        return self._finalize_property_data(data)
+
+    def _finalize_property_data(self, data: dict) -> dict:
+        """Consolidación y limpieza final, común a todos los backends de parsing."""
         # --- Consolidación y Limpieza Final ---
 
         # Fusionar Amenidades (Estructural + Extraídas + Equipamiento)
@@ -423,9 +590,16 @@ class Century21RobustScraper:
 
 
     # --------------------------------------------------
-    # GESTOR DE PLAYWRIGHT (Sin cambios)
+    # GESTOR DE PLAYWRIGHT
     # --------------------------------------------------
+    async def _setup_context(self, context: BrowserContext):
+        await setup_blocking_context(context, self.request_blocking, self._intercept_route)
+
+    async def _setup_page(self, context: BrowserContext, page: Page):
+        await setup_blocking_page(context, page, self.request_blocking)
+
     async def _intercept_route(self, route: Route):
+        """Bloqueo por request en Python (modo "python" de REQUEST_BLOCKING)."""
         if route.request.resource_type in RESOURCES_TO_BLOCK:
             await route.abort()
             return
@@ -435,62 +609,724 @@ class Century21RobustScraper:
             return
         await route.continue_()
 
-    async def fetch_and_parse(self, url: str, context: BrowserContext):
-        async with self.semaphore:
-            logging.info(f"Fetching {url}...")
-            page = await context.new_page()
+    async def _parse(self, html_content: str, url: str) -> dict:
+        """Parsea en el pool de workers si está configurado; si no, en línea."""
+        if self.parse_pool is not None:
+            return await self.parse_pool.parse(html_content, url)
+        return self.parse_property_html(html_content, url)
+
+    async def _html_fingerprint(self, html_content: str) -> str:
+        """Huella del HTML del servidor fuera del event loop: en el pool de parsing si existe, si no en un hilo."""
+        if self.parse_pool is not None:
+            return await self.parse_pool.fingerprint(html_content)
+        return await asyncio.to_thread(html_fingerprint, html_content)
+
+    def close(self):
+        """Libera los workers de parsing y la base de huellas (si existen)."""
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        if self.change_tracker is not None:
+            self.change_tracker.close()
+
+    async def commit_fingerprint(self, marker: dict | None) -> None:
+        """
+        Guarda la huella de una página (lo que trae el resultado en FINGERPRINT_KEY). Se llama
+        después de guardar o publicar el resultado: si ese paso falla la huella no se actualiza
+        y el siguiente recrawl vuelve a procesar la página en lugar de darla por "unchanged".
+        """
+        if marker is not None and self.change_tracker is not None:
+            await asyncio.to_thread(self.change_tracker.update, **marker)
+
+    async def fetch_and_parse(self, url: str, context: BrowserContext | None = None):
+        """
+        Descarga y parsea una URL en una página nueva de `context` o, si no se indica, en una
+        página del pool de navegadores (reciclada si RECYCLE_PAGES está activo).
+        """
+        # El turno del rate limiter se espera antes de ocupar un lugar de concurrencia
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        async with self.limiter.slot() as slot:
+            if context is not None:
+                page = await context.new_page()
+                try:
+                    await self._setup_page(context, page)
+                    return await self._fetch_page(url, page, slot)
+                finally:
+                    try:
+                        await page.close()
+                    except Exception:
+                        # El navegador pudo haberse caído
+                        pass
+            await self._ensure_browser_pool()
+            async with self.browser_pool.page() as page:
+                return await self._fetch_page(url, page, slot)
+
+    async def _fetch_page(self, url: str, page: Page, slot=None):
+        logging.info(f"Fetching {url}...")
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT)
+            if slot is not None and response is not None:
+                slot.status(response.status)
+            # Una página de error del servidor no se parsea: se reintenta
+            if response is not None and response.status in RETRYABLE_STATUSES:
+                raise RetryableStatusError(response.status, parse_retry_after(response.headers.get("retry-after")))
+
+            # Validadores HTTP: si coinciden con los guardados no hace falta esperar ni parsear
+            headers = response.headers if response is not None else {}
+            etag, last_modified = headers.get("etag"), headers.get("last-modified")
+            if self.change_tracker is not None and \
+                    await asyncio.to_thread(self.change_tracker.validators_match, url, etag, last_modified):
+                self.change_tracker.record_check(unchanged=True)
+                logging.info(f"  -> UNCHANGED (ETag/Last-Modified): {url}")
+                return {"url": url, "unchanged": True}
+            
+            # Una sola espera: termina cuando están el encabezado y la descripción/características,
+            # o cuando el DOM deja de cambiar (secciones que no existen en este layout)
+            readiness = await wait_until_ready(page)
+            self._record_readiness(readiness)
+            if EXTRACTION_TARGETS[0] in readiness["missing"]:
+                logging.warning(f"  -> WARNING: Header elements did not load for {url} ({readiness['reason']})")
+
+            fingerprint = None
+            if self.change_tracker is not None:
+                fingerprint = await asyncio.to_thread(fingerprint_fragment, await page.evaluate(DETAIL_FRAGMENT_JS))
+                unchanged = await asyncio.to_thread(self.change_tracker.fingerprint_matches, url, fingerprint)
+                self.change_tracker.record_check(unchanged)
+                if unchanged:
+                    # Refrescar validadores por si el servidor empezó a enviarlos
+                    await asyncio.to_thread(self.change_tracker.update, url, fingerprint, etag, last_modified)
+                    logging.info(f"  -> UNCHANGED: {url}")
+                    return {"url": url, "unchanged": True}
+
+            html_content = await page.content()
+            if self.archive is not None:
+                await asyncio.to_thread(self.archive.put, url, html_content, page.url)
+            data = await self._parse(html_content, page.url)
+            if self.with_images:
+                data["imagenes"] = await gallery_image_urls(page)
+            if self.change_tracker is not None:
+                # Se guarda cuando el llamador persiste el resultado (commit_fingerprint)
+                data[FINGERPRINT_KEY] = {"url": url, "fingerprint": fingerprint,
+                                         "etag": etag, "last_modified": last_modified}
+            logging.info(f"  -> SUCCESS: Parsed '{data.get('titulo', 'N/A')}'")
+            return data
+        except Exception as e:
+            if slot is not None:
+                slot.timeout() if isinstance(e, PlaywrightTimeoutError) else slot.error()
+            logging.error(f"Error processing {url}: {e}")
+            return self._error_result(url, e)
+
+    @staticmethod
+    def _error_result(url: str, error: Exception) -> dict:
+        """Resultado de error con su clase ("throttled", "transient" o "permanent") para los reintentos."""
+        result = {"url": url, "error": str(error), "error_kind": classify_error(error)}
+        if getattr(error, "retry_after", None) is not None:
+            result["retry_after"] = error.retry_after
+        return result
+
+    async def fetch_http_first(self, url: str, context: BrowserContext | None = None):
+        """
+        Intenta primero un GET con httpx y parsea el HTML del servidor. Si la respuesta no es
+        válida o faltan campos obligatorios (REQUIRED_FIELDS), recurre a fetch_and_parse.
+        """
+        stats = {"path": "http"}
+        fallback_reason = None
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        async with self.limiter.slot() as slot:
+            start = time.perf_counter()
             try:
-                response = await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT)
-                
-                # Wait for Header
+                stored = await asyncio.to_thread(self.change_tracker.get, url) if self.change_tracker is not None else None
+                page = await self.http_fetcher.fetch(
+                    url,
+                    etag=stored["etag"] if stored else None,
+                    last_modified=stored["last_modified"] if stored else None,
+                )
+                slot.status(page.status)
+                # 429/5xx: el navegador recibiría lo mismo, así que no hay fallback sino reintento
+                if page.status in RETRYABLE_STATUSES:
+                    error = RetryableStatusError(page.status, parse_retry_after(page.headers.get("retry-after")))
+                    logging.error(f"Error processing {url}: {error}")
+                    return self._error_result(url, error)
+                if page.not_modified:
+                    self.change_tracker.record_check(unchanged=True)
+                    stats["http_seconds"] = round(time.perf_counter() - start, 3)
+                    self._record_fetch(stats)
+                    logging.info(f"  -> UNCHANGED (304): {url}")
+                    return {"url": url, "unchanged": True}
+                etag, last_modified = page.headers.get("etag"), page.headers.get("last-modified")
+                fingerprint = None
+                if page.status == 200 and self.change_tracker is not None:
+                    # Misma huella del fragmento que en el navegador, sin DOM: se calcula sobre el HTML
+                    fingerprint = await self._html_fingerprint(page.html)
+                    if stored is not None and stored["fingerprint"] == fingerprint:
+                        self.change_tracker.record_check(unchanged=True)
+                        await asyncio.to_thread(self.change_tracker.update, url, fingerprint, etag, last_modified)
+                        stats["http_seconds"] = round(time.perf_counter() - start, 3)
+                        self._record_fetch(stats)
+                        logging.info(f"  -> UNCHANGED (http): {url}")
+                        return {"url": url, "unchanged": True}
+                if page.status != 200:
+                    fallback_reason = f"status {page.status}"
+                else:
+                    data = await self._parse(page.html, page.final_url)
+                    missing = [f for f in REQUIRED_FIELDS if f not in data]
+                    if missing:
+                        fallback_reason = f"missing {','.join(missing)}"
+                    else:
+                        if self.archive is not None:
+                            await asyncio.to_thread(self.archive.put, url, page.html, page.final_url)
+                        if self.change_tracker is not None:
+                            self.change_tracker.record_check(unchanged=False)
+                            data[FINGERPRINT_KEY] = {"url": url, "fingerprint": fingerprint,
+                                                     "etag": etag, "last_modified": last_modified}
+                        stats["http_seconds"] = round(time.perf_counter() - start, 3)
+                        self._record_fetch(stats)
+                        logging.info(f"  -> SUCCESS (http): Parsed '{data.get('titulo', 'N/A')}'")
+                        return data
+            except Exception as e:
+                slot.timeout() if isinstance(e, httpx.TimeoutException) else slot.error()
+                fallback_reason = f"{type(e).__name__}: {e}"
+            stats["http_seconds"] = round(time.perf_counter() - start, 3)
+
+        logging.info(f"  -> Fallback a navegador para {url} ({fallback_reason})")
+        start = time.perf_counter()
+        data = await self.fetch_and_parse(url, context)
+        stats.update(path="browser", fallback_reason=fallback_reason,
+                     browser_seconds=round(time.perf_counter() - start, 3))
+        self._record_fetch(stats)
+        return data
+
+    async def fetch_with_retries(self, fetch, url: str) -> dict:
+        """
+        Ejecuta `fetch(url)` (fetch_and_parse o fetch_http_first) pasando por el circuit breaker
+        del host y reintenta los errores transitorios con backoff exponencial con jitter. La espera
+        ocurre fuera del limitador: un reintento pendiente no ocupa un turno de concurrencia.
+        """
+        breaker = self.breakers.for_url(url)
+        for attempt in range(1, self.max_attempts + 1):
+            probe = await breaker.acquire()
+            ok = False
+            try:
+                data = await fetch(url)
+                kind = data.get("error_kind") if "error" in data else None
+                # Los errores permanentes (404, parsing) no dicen nada de la salud del host
+                ok = not is_retryable(kind)
+            finally:
+                await breaker.release(ok, probe)
+            retry_after = data.pop("retry_after", None)
+            if ok or attempt == self.max_attempts:
+                if attempt > 1:
+                    data["attempts"] = attempt
+                return data
+            delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY, retry_after)
+            RETRIES_TOTAL.labels(kind).inc()
+            self.retry_counts[kind] = self.retry_counts.get(kind, 0) + 1
+            logging.info(f"  -> Reintento {attempt}/{self.max_attempts - 1} de {url} en {delay:.1f}s ({kind}: {data['error']})")
+            await asyncio.sleep(delay)
+
+    def _record_fetch(self, stats: dict) -> None:
+        self.fetch_counts[stats["path"]] += 1
+        self.fallback_browser_seconds += stats.get("browser_seconds", 0.0)
+
+    def fetch_summary(self) -> dict:
+        """Cuántas URLs resolvió cada camino y el tiempo de navegador usado en los fallbacks."""
+        total = sum(self.fetch_counts.values())
+        return {
+            **self.fetch_counts,
+            "http_rate": round(self.fetch_counts["http"] / total, 3) if total else 0.0,
+            "browser_seconds": round(self.fallback_browser_seconds, 2),
+        }
+
+    def _record_readiness(self, readiness: dict) -> None:
+        reason = readiness["reason"]
+        self.readiness_counts[reason] = self.readiness_counts.get(reason, 0) + 1
+        self._readiness_waits.append(readiness["wait_ms"])
+        self._readiness_wait_total_ms += readiness["wait_ms"]
+
+    def readiness_summary(self) -> dict:
+        """
+        URLs por motivo de fin de espera, percentiles del tiempo esperado (sobre las últimas
+        READINESS_WAIT_WINDOW páginas) y el tiempo total esperado.
+        """
+        if not self._readiness_waits:
+            return dict(self.readiness_counts)
+        waits = sorted(self._readiness_waits)
+        return {
+            **self.readiness_counts,
+            "wait_p50_ms": waits[len(waits) // 2],
+            "wait_p95_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+            "wait_total_s": round(self._readiness_wait_total_ms / 1000, 2),
+        }
+
+    def _wanted_concurrency(self) -> int:
+        """Páginas simultáneas que tiene sentido preparar: el límite vigente, sin pasar del tamaño del lote."""
+        if self._session_cap is None:
+            return self.limiter.limit
+        return max(1, min(self.limiter.limit, self._session_cap))
+
+    @asynccontextmanager
+    async def _scrape_session(self, cap: int | None = None):
+        """
+        Levanta el pool de parsing, Playwright, el pool de navegadores y el cliente HTTP para un lote.
+        `cap` es el número de URLs del lote si se conoce: una sola URL abre un solo navegador.
+        """
+        start_time = time.time()
+        self._session_cap = cap
+        concurrency = self._wanted_concurrency()
+        browsers = self.browsers or browsers_for_concurrency(concurrency)
+        if self.parse_pool is not None:
+            await self.parse_pool.start()
+        try:
+            async with async_playwright() as p:
+                self.browser_pool = BrowserPool(
+                    p,
+                    browsers=browsers,
+                    contexts_per_browser=self.contexts_per_browser,
+                    launch_options={"headless": HEADLESS},
+                    # Configuración de Idioma (Forzar Español)
+                    context_options={
+                        "user_agent": USER_AGENT,
+                        "locale": "es-MX",
+                        "extra_http_headers": {"Accept-Language": "es-MX,es;q=0.9"},
+                    },
+                    context_setup=self._setup_context,
+                    page_setup=self._setup_page,
+                    recycle_pages=self.recycle_pages,
+                    # Una página precreada por cada turno que puede tocarle a cada contexto
+                    pages_per_context=math.ceil(concurrency / (browsers * self.contexts_per_browser)),
+                    max_navigations=MAX_NAVIGATIONS_PER_PAGE,
+                    max_heap_mb=MAX_PAGE_HEAP_MB,
+                )
+                # En http_first los navegadores se lanzan con el primer fallback: un lote que se
+                # resuelve por HTTP no abre Chromium
+                self._browser_pool_started = False
+                if self.http_fetcher is None:
+                    await self._ensure_browser_pool()
                 try:
-                    await page.wait_for_selector("h1, h6[class*='fs-3 fw-bold']", timeout=8000)
-                except Exception:
-                    logging.warning(f"  -> WARNING: Header elements did not load quickly for {url}")
+                    if self.http_fetcher is not None:
+                        async with self.http_fetcher:
+                            yield self.fetch_http_first
+                    else:
+                        yield self.fetch_and_parse
+                finally:
+                    if self._browser_pool_growth is not None:
+                        self._browser_pool_growth.cancel()
+                        await asyncio.gather(self._browser_pool_growth, return_exceptions=True)
+                    logging.info(f"Navegadores: {self.browser_pool.stats()}")
+                    await self.browser_pool.close()
+                    self.browser_pool = None
+        finally:
+            end_time = time.time()
+            logging.info(f"\nScraping completado en {end_time - start_time:.2f} segundos.")
+            logging.info(f"Concurrencia: {self.limiter.stats()}")
+            if self.retry_counts:
+                logging.info(f"Reintentos: {self.retry_counts}; breakers: {self.breakers.stats()}")
+            if self.rate_limiter is not None:
+                logging.info(f"Rate limit: {self.rate_limiter.stats()}")
+            if self.readiness_counts:
+                logging.info(f"Espera de readiness: {self.readiness_summary()}")
+            if self.parse_pool is not None:
+                logging.info(f"Parsing: {self.parse_pool.stats()}")
+            if self.change_tracker is not None:
+                logging.info(f"Detección de cambios: {self.change_tracker.stats()}")
+            if self.http_fetcher is not None:
+                logging.info(f"Caminos de fetch: {self.fetch_summary()}")
+
+    async def _ensure_browser_pool(self):
+        async with self._browser_pool_lock:
+            if not self._browser_pool_started:
+                await self.browser_pool.start()
+                self._browser_pool_started = True
+            # Si el límite subió, se lanzan más navegadores en segundo plano (las páginas siguen
+            # repartiéndose entre los que ya hay mientras tanto)
+            if not self.browsers and self._browser_pool_growth is None:
+                wanted = min(self.max_browsers, browsers_for_concurrency(self._wanted_concurrency()))
+                if wanted > self.browser_pool.size:
+                    self._browser_pool_growth = asyncio.create_task(self._grow_browser_pool(wanted))
+
+    async def _grow_browser_pool(self, browsers: int):
+        try:
+            await self.browser_pool.grow(browsers)
+        finally:
+            self._browser_pool_growth = None
+
+    async def _iter_indexed(self, urls):
+        """
+        Produce (índice en `urls`, URL de entrada, resultado) en orden de finalización.
 
-                # Wait for Description/Features (Optional)
+        Los workers toman las URLs de una cola acotada que se llena bajo demanda desde `urls`
+        (lista, generador, archivo o iterable asíncrono), y los resultados salen por otra cola
+        acotada: la memoria no crece con el tamaño de la entrada ni si el consumidor va más lento
+        que el scraping. Se empieza con tantos workers como el límite inicial (sin pasar del
+        número de URLs) y se suman más si el limitador sube el límite.
+        """
+        cap = len(urls) if hasattr(urls, "__len__") else None
+        queue_size = self.limiter.ceiling * QUEUE_SIZE_PER_WORKER
+        url_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        feed_error: list[BaseException] = []
+        tasks: list[asyncio.Task] = []
+        workers: list[asyncio.Task] = []
+
+        async def feed():
+            index = 0
+            try:
+                if hasattr(urls, "__aiter__"):
+                    async for url in urls:
+                        await url_queue.put((index, url))
+                        index += 1
+                else:
+                    for url in urls:
+                        await url_queue.put((index, url))
+                        index += 1
+            except Exception as e:
+                feed_error.append(e)
+            # Marcador de fin; cada worker lo devuelve a la cola para el siguiente (no en finally:
+            # al cancelar, la cola puede estar llena)
+            await url_queue.put(None)
+
+        def add_worker(fetch):
+            task = asyncio.create_task(work(fetch))
+            workers.append(task)
+            tasks.append(task)
+
+        async def work(fetch):
+            while True:
+                item = await url_queue.get()
+                if item is None:
+                    url_queue.put_nowait(None)
+                    break
+                index, url = item
                 try:
-                    # Esperamos la descripción O los bloques de características (my-1, my-2)
-                    await page.wait_for_selector("p[class*='text-muted'][class*='white-space'], div[class*='my-1'], div[class*='my-2']", timeout=5000)
-                except Exception:
-                    pass
+                    data = await self.fetch_with_retries(fetch, url)
+                except Exception as e:
+                    logging.error(f"Error processing {url}: {e}")
+                    data = {"url": url, "error": str(e)}
+                await result_queue.put((index, url, data))
+                # El límite vigente lo aplica limiter.slot(); aquí solo se evita tener menos
+                # workers que turnos
+                if len(workers) < self._wanted_concurrency():
+                    add_worker(fetch)
+            await result_queue.put(None)
+
+        async with self._scrape_session(cap) as fetch:
+            tasks.append(asyncio.create_task(feed()))
+            for _ in range(self._wanted_concurrency()):
+                add_worker(fetch)
+            try:
+                finished = 0
+                # Un worker solo agrega otro mientras sigue vivo, así que nunca se cuenta de menos
+                while finished < len(workers):
+                    item = await result_queue.get()
+                    if item is None:
+                        finished += 1
+                        continue
+                    yield item
+                if feed_error:
+                    raise feed_error[0]
+            finally:
+                # Si el consumidor deja de iterar, no dejar páginas abiertas
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
 
+    async def iter_results(self, urls):
+        """
+        Generador asíncrono: entrega cada propiedad en cuanto termina (no en el orden de `urls`),
+        para que la siguiente etapa (BD, imágenes, publicación) empiece sin esperar al lote.
+        `urls` puede ser cualquier iterable o iterable asíncrono (p. ej. read_url_lines()).
 
-                html_content = await page.content()
-                data = self.parse_property_html(html_content, page.url) 
-                logging.info(f"  -> SUCCESS: Parsed '{data.get('titulo', 'N/A')}'")
+            async for data in scraper.iter_results(urls):
+                ...
+        """
+        async for _, _, data in self._iter_indexed(urls):
+            yield data
+
+    async def iter_url_results(self, urls):
+        """
+        Como iter_results(), pero entrega (URL de entrada, resultado): la URL del resultado puede
+        ser otra si el sitio redirigió.
+        """
+        async for _, url, data in self._iter_indexed(urls):
+            yield url, data
+
+    async def run(self, urls):
+        """Scrapea todas las URLs y devuelve los resultados en el mismo orden que `urls`."""
+        if hasattr(urls, "__len__"):
+            logging.info(f"Iniciando scraping de {len(urls)} URLs...")
+        results = {}
+        async for index, _, data in self._iter_indexed(urls):
+            results[index] = data
+        return [results[index] for index in range(len(results))]
+
+    async def reparse(self, archive: HtmlArchive | None = None, urls=None) -> list[dict]:
+        """
+        Vuelve a parsear las páginas guardadas en el archivo de HTML sin abrir el navegador.
+        Usa la descarga más reciente de cada URL (o solo las de `urls`) y las reparte en
+        paralelo entre los workers del pool (uno por CPU si el scraper no tiene pool).
+        """
+        archive = archive or self.archive
+        if archive is None:
+            raise ValueError("reparse necesita un HtmlArchive (archive_dir o argumento archive)")
+        wanted = set(urls) if urls is not None else None
+
+        pool = self.parse_pool or ParsePool(os.cpu_count() or 1, self.parser_backend)
+        await pool.start()
+        # Limita las páginas descomprimidas en memoria a la vez
+        in_flight = asyncio.Semaphore(pool.workers * 2)
+
+        async def parse_entry(entry):
+            try:
+                html_content = await asyncio.to_thread(archive.get, entry["sha256"])
+                data = await pool.parse(html_content, entry["final_url"])
+                data["fetched_at"] = entry["fetched_at"]
                 return data
             except Exception as e:
-                logging.error(f"Error processing {url}: {e}")
-                return {"url": url, "error": str(e)}
+                logging.error(f"Error re-parsing {entry['url']}: {e}")
+                return {"url": entry["url"], "error": str(e)}
             finally:
-                await page.close()
+                in_flight.release()
 
-    async def run(self, urls):
         start_time = time.time()
-        logging.info(f"Iniciando scraping de {len(urls)} URLs...")
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=HEADLESS)
-            
-            # Configuración de Idioma (Forzar Español)
-            context = await browser.new_context(
-                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-                 locale="es-MX", 
-                 extra_http_headers={"Accept-Language": "es-MX,es;q=0.9"}
-            )
-
-            await context.route("**/*", self._intercept_route)
-            tasks = [self.fetch_and_parse(url, context) for url in urls]
+        tasks = []
+        try:
+            for entry in archive.entries(latest_only=True):
+                if wanted is not None and entry["url"] not in wanted:
+                    continue
+                await in_flight.acquire()
+                tasks.append(asyncio.create_task(parse_entry(entry)))
             results = await asyncio.gather(*tasks)
-            await browser.close()
+        finally:
+            if pool is not self.parse_pool:
+                pool.close()
 
-        end_time = time.time()
-        logging.info(f"\nScraping completado en {end_time - start_time:.2f} segundos.")
+        logging.info(f"Re-parseadas {len(results)} páginas en {time.time() - start_time:.2f} segundos.")
         return results
 
 # --------------------------------------------------
 # EJECUCIÓN
 # --------------------------------------------------
+async def read_url_lines(source):
+    """
+    Iterable asíncrono de URLs, una por línea, desde una ruta o un archivo abierto (p. ej. sys.stdin).
+    Las lecturas van a un hilo para no bloquear el event loop; las líneas vacías y '#' se ignoran.
+    """
+    stream = open(source, encoding="utf-8") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        while True:
+            line = await asyncio.to_thread(stream.readline)
+            if not line:
+                break
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if stream is not source:
+            stream.close()
+
+async def reparse_main(archive_dir: str, output_path: str):
+    """Re-parsea todo el archivo de HTML y escribe un JSON por línea en output_path."""
+    scraper = Century21RobustScraper(CONCURRENCY_LIMIT, parser_backend="lxml", archive_dir=archive_dir)
+    results = await scraper.reparse()
+    with open(output_path, "w", encoding="utf-8") as output:
+        for item in results:
+            output.write(json.dumps(item, ensure_ascii=False) + "\n")
+    failed = sum(1 for item in results if "error" in item)
+    print(f"\n✅ {len(results) - failed} propiedades re-parseadas ({failed} con error) → {output_path}")
+
+async def frontier_main(frontier_db: str, output_path: str, session_factory=None):
+    """
+    Scrapea las fichas pendientes del frontier (ver listing_crawler) y escribe un JSON por línea.
+
+    Con `session_factory` los resultados también se guardan en Property por upsert (por tandas
+    de STORE_BATCH_SIZE) antes de marcar la ficha como terminada: es lo que consulta el
+    CardDeltaDetector de `listing_crawler --delta`, así que sin guardarlos todo anuncio sigue
+    siendo "nuevo" en el siguiente recrawl.
+    """
+    frontier = UrlFrontier(frontier_db)
+    frontier.reset_in_progress("detail")
+    scraper = Century21RobustScraper(
+        CONCURRENCY_LIMIT,
+        parser_backend="lxml",
+        archive_dir=HTML_ARCHIVE_DIR if ARCHIVE_HTML else None,
+        fingerprint_db=FINGERPRINT_DB if TRACK_CHANGES else None,
+        fetch_mode=FETCH_MODE,
+        rate_limiter=shared_rate_limiter(),
+    )
+    # (url, resultado, huella) pendientes de guardar; la ficha se marca terminada después del upsert
+    to_store: list[tuple[str, dict, dict | None]] = []
+    done = failed = stored = 0
+
+    async def flush():
+        nonlocal done, failed, stored
+        pending = to_store[:]
+        del to_store[:]
+        error = None
+        if session_factory is not None and pending:
+            try:
+                stored += await asyncio.to_thread(upsert_properties, session_factory, [item for _, item, _ in pending])
+            except Exception as e:
+                # Sin guardar la ficha vuelve a pending (o a failed al agotar los intentos)
+                error = f"store: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+                logging.error(f"No se pudieron guardar {len(pending)} resultados: {error}")
+        for url, _, marker in pending:
+            if error is None:
+                await asyncio.to_thread(frontier.mark_done, url)
+                await scraper.commit_fingerprint(marker)
+                done += 1
+            else:
+                await asyncio.to_thread(frontier.mark_failed, url, error)
+                failed += 1
+
+    try:
+        with open(output_path, "a", encoding="utf-8") as output:
+            async for url, item in scraper.iter_url_results(frontier.iter_pending("detail")):
+                if "error" in item:
+                    frontier.mark_failed(url, item["error"])
+                    failed += 1
+                    continue
+                marker = item.pop(FINGERPRINT_KEY, None)
+                if not item.get("unchanged"):
+                    output.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    output.flush()
+                to_store.append((url, item, marker))
+                if len(to_store) >= STORE_BATCH_SIZE:
+                    await flush()
+            await flush()
+    finally:
+        scraper.close()
+        scraper.rate_limiter.close()
+        frontier.close()
+    saved = f", {stored} propiedades guardadas" if session_factory is not None else ""
+    print(f"\n✅ {done} fichas del frontier procesadas ({failed} con error){saved} → {output_path}")
+
+async def jobs_main(queue: JobSource, batch: str, output_path: str, urls_path: str | None = None,
+                    shard: tuple[HashRing, str] | None = None, session_factory=None,
+                    fetch_mode: str = FETCH_MODE, rate_limiter=None,
+                    scraping_session_id: int | None = None):
+    """
+    Worker de una cola de trabajos (archivo local o coordinador): encola las URLs de `urls_path`
+    (si se indica) en el lote y scrapea sus trabajos pendientes. Se pueden lanzar varios procesos
+    o nodos sobre la misma cola; si uno muere, otro retoma sus trabajos cuando vence el lease.
+
+    Con `shard` (anillo, nodo) solo se encolan las URLs que el anillo le asigna a este nodo. Con
+    `session_factory` los resultados se guardan en la tabla Property con upsert antes de marcar
+    el trabajo como terminado, así que repetir un trabajo no duplica filas.
+
+    `rate_limiter` (HostRateLimiter o RemoteRateLimiter del coordinador) reemplaza al limiter
+    compartido de la máquina; jobs_main lo cierra al terminar. Con `scraping_session_id` (y
+    `session_factory`) las URLs se encolan con ese ScrapingSession y sus conteos se actualizan
+    cada SESSION_SYNC_SECONDS y al terminar.
+    """
+    if urls_path:
+        with open(urls_path, encoding="utf-8") as source:
+            lines = (line.strip() for line in source)
+            urls = (line for line in lines if line and not line.startswith("#"))
+            if shard is not None:
+                ring, node = shard
+                urls = ring.shard(urls, node)
+            added = await asyncio.to_thread(queue.enqueue, batch, urls, scraping_session_id)
+        logging.info(f"{added} URLs nuevas en el lote '{batch}'")
+    scraper = Century21RobustScraper(
+        CONCURRENCY_LIMIT,
+        parser_backend="lxml",
+        archive_dir=HTML_ARCHIVE_DIR if ARCHIVE_HTML else None,
+        fingerprint_db=FINGERPRINT_DB if TRACK_CHANGES else None,
+        fetch_mode=fetch_mode,
+        rate_limiter=rate_limiter or shared_rate_limiter(),
+    )
+    job_ids: dict[str, int] = {}
+    # (job_id, resultado, huella) pendientes de guardar; el trabajo se completa y la huella se
+    # guarda después del upsert
+    to_store: list[tuple[int, dict, dict | None]] = []
+    stored = 0
+
+    async def job_urls():
+        async for job in queue.iter_jobs(batch, scraper.limiter.limit):
+            job_ids[job["url"]] = job["id"]
+            yield job["url"]
+
+    async def every(seconds: float, action, what: str):
+        # Un error pasajero (coordinador, base de datos) se registra y el ciclo sigue: si la tarea
+        # muriera, los leases o lo pendiente de guardar quedarían sin atender
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await action()
+            except Exception as e:
+                logging.error(f"Error en {what}: {type(e).__name__}: {e}")
+
+    async def renew_leases():
+        await asyncio.to_thread(queue.heartbeat)
+
+    async def flush():
+        nonlocal stored
+        async with store_lock:
+            pending = to_store[:]
+            if not pending:
+                return
+            error = None
+            if session_factory is not None:
+                try:
+                    stored += await asyncio.to_thread(upsert_properties, session_factory, [item for _, item, _ in pending])
+                except Exception as e:
+                    # Sin guardar no se completa: los trabajos vuelven a pending (o a failed sin intentos)
+                    # Primera línea: los errores de SQLAlchemy incluyen la sentencia y todos los parámetros
+                    error = f"store: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+                    logging.error(f"No se pudieron guardar {len(pending)} resultados: {error}")
+            # Cada trabajo sale de to_store solo después de completarlo (o de registrar el fallo);
+            # si el coordinador falla a mitad, el resto se reintenta en el siguiente flush (el upsert
+            # es idempotente)
+            handled = 0
+            try:
+                for job_id, _, marker in pending:
+                    if error is None:
+                        await asyncio.to_thread(queue.complete, job_id)
+                        await scraper.commit_fingerprint(marker)
+                    else:
+                        await asyncio.to_thread(queue.fail, job_id, error)
+                    handled += 1
+            finally:
+                del to_store[:handled]
+
+    async def sync_session():
+        if session_factory is not None and scraping_session_id is not None:
+            await asyncio.to_thread(sync_scraping_session, session_factory, queue, batch, scraping_session_id)
+
+    store_lock = asyncio.Lock()
+    heartbeat = asyncio.create_task(every(queue.lease_seconds / 3, renew_leases, "la renovación de leases"))
+    # Lo que espera en to_store sigue in_flight: iter_jobs no termina hasta que se guarda
+    flusher = asyncio.create_task(every(STORE_FLUSH_SECONDS, flush, "el guardado de resultados"))
+    syncer = asyncio.create_task(every(SESSION_SYNC_SECONDS, sync_session, "la sincronización del ScrapingSession"))
+    try:
+        with open(output_path, "a", encoding="utf-8") as output:
+            async for url, item in scraper.iter_url_results(job_urls()):
+                job_id = job_ids.pop(url)
+                if "error" in item:
+                    await asyncio.to_thread(queue.fail, job_id, item["error"])
+                    continue
+                marker = item.pop(FINGERPRINT_KEY, None)
+                if not item.get("unchanged"):
+                    output.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    output.flush()
+                to_store.append((job_id, item, marker))
+                if len(to_store) >= STORE_BATCH_SIZE:
+                    await flush()
+            await flush()
+    finally:
+        heartbeat.cancel()
+        flusher.cancel()
+        syncer.cancel()
+        # Lo reservado y no terminado (p. ej. Ctrl+C) vuelve a pending sin esperar al lease; con
+        # el coordinador son requests HTTP síncronos, así que van a un hilo como el resto
+        await asyncio.to_thread(queue.release)
+        scraper.close()
+        scraper.rate_limiter.close()
+        stats = await asyncio.to_thread(queue.stats, batch)
+        await sync_session()
+    print(f"\n✅ Lote '{batch}': {stats}, {stored} propiedades guardadas → {output_path}")
+
 async def main():
     # Pedir al usuario que ingrese una URL
     try:
@@ -508,12 +1344,33 @@ async def main():
 
     urls_to_scrape = [url_input.strip()]
 
-    scraper = Century21RobustScraper(CONCURRENCY_LIMIT)
-    scraped_data = await scraper.run(urls_to_scrape)
+    scraper = Century21RobustScraper(
+        CONCURRENCY_LIMIT,
+        parse_workers=PARSE_WORKERS,
+        parse_executor=PARSE_EXECUTOR,
+        archive_dir=HTML_ARCHIVE_DIR if ARCHIVE_HTML else None,
+        fingerprint_db=FINGERPRINT_DB if TRACK_CHANGES else None,
+        fetch_mode=FETCH_MODE,
+        browsers=BROWSERS,
+        contexts_per_browser=CONTEXTS_PER_BROWSER,
+        rate_limiter=shared_rate_limiter(),
+    )
+    try:
+        scraped_data = await scraper.run(urls_to_scrape)
+        # Aquí el resultado solo se muestra: la huella se guarda en cuanto se obtiene
+        for item in scraped_data:
+            if item:
+                await scraper.commit_fingerprint(item.pop(FINGERPRINT_KEY, None))
+    finally:
+        scraper.close()
+        scraper.rate_limiter.close()
     
     # --- Procesamiento de Resultados ---
     if scraped_data:
-        successful_data = [item for item in scraped_data if item and 'error' not in item]
+        unchanged = [item for item in scraped_data if item and item.get('unchanged')]
+        if unchanged:
+            print(f"\nℹ️ {len(unchanged)} propiedades sin cambios desde el último scraping (no se re-parsearon).")
+        successful_data = [item for item in scraped_data if item and 'error' not in item and not item.get('unchanged')]
         
         if successful_data:
             # Solo mostrar resultados en terminal, sin guardar archivos
@@ -534,7 +1391,7 @@ async def main():
 
             print(f"\n✅ Extracción exitosa. Total de propiedades procesadas: {len(successful_data)}")
 
-        else:
+        elif not unchanged:
             print("\n❌ No se pudo extraer ningún dato exitosamente.")
             if scraped_data[0].get('error'):
                 print(f"Error reportado: {scraped_data[0]['error']}")
@@ -546,7 +1403,33 @@ if __name__ == '__main__':
         #     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
         
         # Ejecución estándar de asyncio
-        asyncio.run(main())
+        # Modo reparse: python -m app.integrations.century21.data_scraper reparse [archive_dir] [salida.jsonl]
+        if len(sys.argv) > 1 and sys.argv[1] == "reparse":
+            archive_dir = sys.argv[2] if len(sys.argv) > 2 else HTML_ARCHIVE_DIR
+            output_path = sys.argv[3] if len(sys.argv) > 3 else "reparsed.jsonl"
+            asyncio.run(reparse_main(archive_dir, output_path))
+        # Modo frontier: python -m app.integrations.century21.data_scraper frontier [frontier.sqlite3] [salida.jsonl] [--store]
+        # (--store: upsert en Property con la base de la app, la misma que consulta listing_crawler --delta)
+        elif len(sys.argv) > 1 and sys.argv[1] == "frontier":
+            args = [arg for arg in sys.argv[2:] if arg != "--store"]
+            frontier_db = args[0] if len(args) > 0 else FRONTIER_DB
+            output_path = args[1] if len(args) > 1 else "properties.jsonl"
+            session_factory = None
+            if "--store" in sys.argv:
+                from app.db.session import SessionLocal
+                session_factory = SessionLocal
+            asyncio.run(frontier_main(frontier_db, output_path, session_factory))
+        # Modo cola: python -m app.integrations.century21.data_scraper jobs <lote> [urls.txt] [salida.jsonl]
+        elif len(sys.argv) > 2 and sys.argv[1] == "jobs":
+            urls_path = sys.argv[3] if len(sys.argv) > 3 else None
+            output_path = sys.argv[4] if len(sys.argv) > 4 else "properties.jsonl"
+            queue = ScrapeJobQueue(JOB_QUEUE_DB)
+            try:
+                asyncio.run(jobs_main(queue, sys.argv[2], output_path, urls_path))
+            finally:
+                queue.close()
+        else:
+            asyncio.run(main())
 
     except RuntimeError as e:
         # Manejo de errores comunes de asyncio al cerrar el script, especialmente en entornos interactivos.
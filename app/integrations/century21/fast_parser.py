@@ -0,0 +1,330 @@
+"""
+Backend de parsing rápido para las páginas de detalle de Century21.
+
+Trabaja directamente sobre el árbol de lxml con selectores XPath precompilados,
+sin construir el árbol de BeautifulSoup. Como BeautifulSoup(html, 'lxml') usa
+el mismo parser (libxml2), el árbol es idéntico; este módulo solo replica la
+semántica de búsqueda y de texto de BeautifulSoup para que el dict resultante
+sea exactamente el mismo que el de `Century21RobustScraper._parse_property_html_bs4`:
+
+- `class_=` compara contra cada clase y contra las clases unidas por un espacio.
+- Los strings que solo contienen espacios ASCII se colapsan a '\\n' o ' '
+  (salvo dentro de <pre>/<textarea>).
+- `.text` / `get_text()` ignoran comentarios y el texto de <script>, <style>,
+  <template>, <rt> y <rp>; `.contents` sí los incluye como strings.
+
+Se eligió lxml y no selectolax porque selectolax usa otro parser HTML5 (Lexbor),
+que construye árboles distintos en HTML mal formado y rompería la paridad.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Callable, Iterator, Optional
+
+from lxml import etree
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+# Tags cuyo texto BeautifulSoup guarda en subclases de NavigableString (excluidas de .text)
+STRING_CONTAINER_TAGS = frozenset(['rt', 'rp', 'style', 'script', 'template'])
+# Atributos multi-valor de HTML (BeautifulSoup los guarda como listas)
+MULTI_VALUED_ATTRIBUTES = {
+    '*': frozenset(['class', 'accesskey', 'dropzone']),
+    'a': frozenset(['rel', 'rev']),
+    'link': frozenset(['rel', 'rev']),
+    'td': frozenset(['headers']),
+    'th': frozenset(['headers']),
+    'form': frozenset(['accept-charset']),
+    'object': frozenset(['archive']),
+    'area': frozenset(['rel']),
+    'icon': frozenset(['sizes']),
+    'iframe': frozenset(['sandbox']),
+    'output': frozenset(['for']),
+}
+
+_NON_WHITESPACE = re.compile(r"\S+")
+
+# --- Selectores precompilados ---
+# Las búsquedas por clase usan un prefiltro XPath con un fragmento sin espacios
+# y después se verifican en Python con la misma semántica que BeautifulSoup.
+_XP_CONTENT_AREA = etree.XPath("//div[@id='detallePropiedad']")
+_XP_BODY = etree.XPath("//body")
+_XP_OG_DESCRIPTION = etree.XPath("//meta[@property='og:description']")
+_XP_H1 = etree.XPath("descendant::h1[1]")
+_XP_SUBTITLE = etree.XPath("descendant::h5[contains(@class, 'fs-4')]")
+_XP_ADDRESS = etree.XPath("descendant::h6[contains(@class, 'small')]")
+_XP_PRICE = etree.XPath("descendant::h6[contains(@class, 'fw-bold')]")
+_XP_SUMMARY_BLOCK = etree.XPath("descendant::div[contains(@class, 'fw-bold')]")
+_XP_SUMMARY_ITEMS = etree.XPath("descendant::div[contains(@class, 'my-2')]")
+_XP_SUMMARY_KEY = etree.XPath("descendant::span[contains(@class, 'text-muted')]")
+_XP_DETAIL_ITEMS = etree.XPath("descendant::div[contains(@class, 'col-sm-12')]")
+_XP_DETAIL_VALUE = etree.XPath("descendant::span[contains(@class, 'fw-bold')]")
+_XP_DESCRIPTION = etree.XPath("descendant::p[contains(@class, 'white-space')]")
+
+_RE_SUBTITLE = re.compile(r'fs-4')
+_RE_PRICE = re.compile(r"fs-3 fw-bold")
+_RE_SUMMARY_BLOCK = re.compile(r"row fw-bold")
+_RE_SUMMARY_ITEM = re.compile(r"col my-2")
+_RE_DESCRIPTION = re.compile(r"text-muted.*white-space")
+_DETAIL_SELECTORS = ("col-sm-12 col-md-6 my-1", "col-sm-12 col-md-6 col-lg-4 my-2")
+
+
+# --------------------------------------------------
+# SEMÁNTICA DE BEAUTIFULSOUP SOBRE LXML
+# --------------------------------------------------
+
+def _collapse_whitespace(text: str, preserve: bool) -> str:
+    """Replica BeautifulSoup.endData: un string de solo espacios ASCII pasa a '\\n' o ' '."""
+    if preserve or text.strip(ASCII_SPACES):
+        return text
+    return '\n' if '\n' in text else ' '
+
+
+def _inherited_state(element) -> tuple[bool, bool]:
+    """(preserva_whitespace, dentro_de_contenedor) heredados de los ancestros del elemento."""
+    preserve = container = False
+    for ancestor in element.iterancestors():
+        tag = ancestor.tag
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            preserve = True
+        if tag in STRING_CONTAINER_TAGS:
+            container = True
+    return preserve, container
+
+
+def _own_state(element, preserve: bool, container: bool) -> tuple[bool, bool]:
+    tag = element.tag
+    return preserve or tag in PRESERVE_WHITESPACE_TAGS, container or tag in STRING_CONTAINER_TAGS
+
+
+def _iter_text(element, preserve: bool, container: bool) -> Iterator[str]:
+    """Strings que BeautifulSoup incluye en get_text() para este elemento, en orden de documento."""
+    preserve, container = _own_state(element, preserve, container)
+    if element.text and not container:
+        yield _collapse_whitespace(element.text, preserve)
+    for child in element:
+        # Los comentarios e instrucciones de procesamiento no aportan texto, pero su tail sí.
+        if isinstance(child.tag, str):
+            yield from _iter_text(child, preserve, container)
+        if child.tail and not container:
+            yield _collapse_whitespace(child.tail, preserve)
+
+
+def get_text(element, separator: str = "", strip: bool = False) -> str:
+    """Equivalente a Tag.get_text() de BeautifulSoup."""
+    preserve, container = _inherited_state(element)
+    strings = _iter_text(element, preserve, container)
+    if strip:
+        strings = (s.strip() for s in strings)
+        strings = (s for s in strings if s)
+    return separator.join(strings)
+
+
+def _iter_contents(element, preserve: bool, container: bool) -> Iterator[tuple[Optional[object], Optional[str]]]:
+    """
+    Equivalente a Tag.contents: produce (elemento, None) para tags y (None, texto) para
+    cualquier NavigableString (texto, comentarios, instrucciones de procesamiento).
+    """
+    preserve, _ = _own_state(element, preserve, container)
+    if element.text:
+        yield None, _collapse_whitespace(element.text, preserve)
+    for child in element:
+        tag = child.tag
+        if isinstance(tag, str):
+            yield child, None
+        elif tag is etree.Comment:
+            yield None, _collapse_whitespace(child.text or '', preserve)
+        elif tag is etree.PI:
+            yield None, _collapse_whitespace(f"{child.target} {child.text or ''}", preserve)
+        if child.tail:
+            yield None, _collapse_whitespace(child.tail, preserve)
+
+
+def contents(element) -> list[tuple[Optional[object], Optional[str]]]:
+    preserve, container = _inherited_state(element)
+    return list(_iter_contents(element, preserve, container))
+
+
+def _attrs(element) -> dict:
+    """Atributos tal como los guarda BeautifulSoup (multi-valor como lista)."""
+    multi_valued = MULTI_VALUED_ATTRIBUTES['*'] | MULTI_VALUED_ATTRIBUTES.get(element.tag, frozenset())
+    return {
+        name: _NON_WHITESPACE.findall(value) if name in multi_valued else value
+        for name, value in element.attrib.items()
+    }
+
+
+def tags_equal(a, b) -> bool:
+    """Equivalente a Tag.__eq__: mismo nombre, atributos y contenido (recursivo)."""
+    if a is b:
+        return True
+    if a.tag != b.tag or _attrs(a) != _attrs(b):
+        return False
+    contents_a, contents_b = contents(a), contents(b)
+    if len(contents_a) != len(contents_b):
+        return False
+    for (tag_a, text_a), (tag_b, text_b) in zip(contents_a, contents_b):
+        if tag_a is not None and tag_b is not None:
+            if not tags_equal(tag_a, tag_b):
+                return False
+        elif tag_a is not None or tag_b is not None or text_a != text_b:
+            return False
+    return True
+
+
+def class_matches(element, match: Callable[[str], object]) -> bool:
+    """Semántica de `class_=` de BeautifulSoup: cada clase y luego todas unidas por un espacio."""
+    value = element.get('class')
+    if value is None:
+        return False
+    classes = _NON_WHITESPACE.findall(value)
+    return any(match(c) for c in classes) or bool(match(' '.join(classes)))
+
+
+def _first(candidates: list, match: Callable[[str], object]):
+    for element in candidates:
+        if class_matches(element, match):
+            return element
+    return None
+
+
+def _equals(expected: str) -> Callable[[str], bool]:
+    return lambda value: value == expected
+
+
+class LxmlPropertyParser:
+    """
+    Parser de páginas de detalle sobre lxml. Reutiliza la limpieza, heurísticas y
+    consolidación del scraper para producir exactamente el mismo dict.
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+
+    def _parse_document(self, html_content: str):
+        # BeautifulSoup elimina el BOM inicial antes de alimentar a lxml
+        if html_content and html_content[0] == '\N{BYTE ORDER MARK}':
+            html_content = html_content[1:]
+        parser = etree.HTMLParser(recover=True, strip_cdata=False)
+        parser.feed(html_content)
+        return parser.close()
+
+    def _parse_main_summary(self, content_area) -> dict:
+        """Extrae características del bloque principal (M², Baños, etc.)."""
+        data = {}
+        summary_block = _first(_XP_SUMMARY_BLOCK(content_area), _RE_SUMMARY_BLOCK.search)
+        if summary_block is None:
+            return data
+
+        items = [el for el in _XP_SUMMARY_ITEMS(summary_block) if class_matches(el, _RE_SUMMARY_ITEM.search)]
+        for item in items:
+            key_tag = _first(_XP_SUMMARY_KEY(item), _equals('text-muted'))
+            if key_tag is None:
+                continue
+            key = self.scraper._clean_text(get_text(key_tag)).lower().replace(' ', '_')
+
+            # Hermanos siguientes del key_tag hasta el primer <i>
+            value_text = ""
+            started = False
+            for tag, text in contents(key_tag.getparent()):
+                if not started:
+                    started = tag is key_tag
+                    continue
+                if tag is None:
+                    value_text += text.strip() + " "
+                elif tag.tag == 'i':
+                    break
+
+            value_text = self.scraper._clean_text(value_text)
+            data[key] = self.scraper._extract_number(value_text)
+        return data
+
+    def _extract_detail_entries(self, content_area) -> list[tuple[str, str]]:
+        """Pares (clave, valor) de los bloques de detalle y amenidades, en orden de documento."""
+        clean = self.scraper._clean_text
+        entries = []
+        items = [
+            el for el in _XP_DETAIL_ITEMS(content_area)
+            if el.get('class') is not None
+            and any(selector in ' '.join(_NON_WHITESPACE.findall(el.get('class'))) for selector in _DETAIL_SELECTORS)
+        ]
+
+        for item in items:
+            key_text = ""
+            value_text = ""
+            value_tag = _first(_XP_DETAIL_VALUE(item), _equals('fw-bold'))
+            item_contents = contents(item)
+
+            if value_tag is not None:
+                value_text = clean(get_text(value_tag))
+                for tag, text in item_contents:
+                    if tag is not None and tags_equal(tag, value_tag):
+                        break
+                    if tag is None:
+                        key_text += text.strip() + " "
+                key_text = clean(key_text).rstrip(':').strip()
+
+            if not key_text:
+                text = clean(get_text(item, separator=' ', strip=True))
+                if ':' in text and not value_text:
+                    parts = text.split(':', 1)
+                    key_text = clean(parts[0])
+                    value_text = clean(parts[1])
+                elif text:
+                    key_text_parts = [text.strip() for tag, text in item_contents if tag is None]
+                    key_text = " ".join(key_text_parts).strip()
+                    value_text = ""
+
+            entries.append((key_text, value_text))
+        return entries
+
+    def parse(self, html_content: str, url: str) -> dict:
+        scraper = self.scraper
+        root = self._parse_document(html_content)
+        data = {"url": url}
+
+        content_area = next(iter(_XP_CONTENT_AREA(root)), None)
+        if content_area is None:
+            content_area = next(iter(_XP_BODY(root)), None)
+
+        # --- Extracción Estructural Básica ---
+        h1 = next(iter(_XP_H1(content_area)), None)
+        data['titulo'] = scraper._clean_text(get_text(h1)) if h1 is not None else None
+        subtitle_tag = _first(_XP_SUBTITLE(content_area), _RE_SUBTITLE.search)
+        data['subtitulo'] = scraper._clean_text(get_text(subtitle_tag)) if subtitle_tag is not None else None
+        address_tag = _first(_XP_ADDRESS(content_area), _equals('small'))
+        data['direccion'] = scraper._clean_text(get_text(address_tag)) if address_tag is not None else None
+
+        # Precio
+        price_tag = _first(_XP_PRICE(content_area), _RE_PRICE.search)
+        if price_tag is not None:
+            price_text = scraper._clean_text(get_text(price_tag))
+            data['precio'] = scraper._extract_number(price_text)
+            data['moneda'] = 'MXN' if 'mxn' in price_text.lower() else ('USD' if 'usd' in price_text.lower() else None)
+
+        # --- Extracción Estructural Detallada ---
+        data.update(self._parse_main_summary(content_area))
+        data.update(scraper._build_details_data(self._extract_detail_entries(content_area)))
+
+        # --- Extracción Heurística (Descripción Principal) ---
+        description_raw = None
+
+        # Estrategia 1: Selector principal
+        description_tag = _first(_XP_DESCRIPTION(content_area), _RE_DESCRIPTION.search)
+        if description_tag is not None:
+            description_raw = get_text(description_tag, separator='\n')
+
+        # Estrategia 2: Fallback Meta Tags
+        if not description_raw:
+            meta_desc = next(iter(_XP_OG_DESCRIPTION(root)), None)
+            if meta_desc is not None and meta_desc.get('content'):
+                description_raw = meta_desc.get('content')
+                logging.debug("Usando fallback de meta tag (og:description).")
+
+        if description_raw:
+            data.update(scraper._parse_description_heuristics(description_raw))
+            data['descripcion'] = scraper._clean_description_text(description_raw)
+
+        return scraper._finalize_property_data(data)
@@ -0,0 +1,230 @@
+"""
+Frontier persistente de URLs para el crawler de Century21.
+
+Las URLs viven en SQLite (no en memoria) con su tipo ("listing" para páginas de
+resultados, "detail" para fichas de propiedad), prioridad y estado. Las fichas se
+deduplican por ID de propiedad (el slug de la URL cambia si cambia el título). Un filtro de
+Bloom en memoria (tamaño fijo, sin guardar las URLs) confirma sin consultar la base
+que una URL es nueva; solo sus positivos (conocidas o falsos positivos) se verifican
+contra la PRIMARY KEY.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+BLOOM_CAPACITY = 1_000_000
+BLOOM_ERROR_RATE = 0.01
+MAX_ATTEMPTS = 3
+
+PROPERTY_PATH_RE = re.compile(r'/propiedad/(\d+)_[^"\'\s?#<>]*')
+
+
+def extract_property_id(url: str) -> Optional[str]:
+    """ID de Century21 de una URL de detalle (p. ej. '591129')."""
+    match = PROPERTY_PATH_RE.search(url)
+    return match.group(1) if match else None
+
+
+def frontier_key(url: str) -> str:
+    """Clave de dedupe: el ID de propiedad en las fichas, la URL en lo demás."""
+    property_id = extract_property_id(url)
+    return f"c21:{property_id}" if property_id else url
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre un bytearray (≈1.2 MB para 1M de URLs al 1%)."""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        """Agrega la clave; devuelve True si no estaba (sin falsos negativos)."""
+        bits = self._bits
+        absent = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                absent = True
+                bits[pos >> 3] |= mask
+        return absent
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class UrlFrontier:
+    """Cola de URLs con dedupe, prioridad (mayor primero) y estados pending/in_progress/done/failed."""
+
+    def __init__(self, db_path: str | Path, bloom_capacity: int = BLOOM_CAPACITY):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS frontier (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                property_id TEXT,
+                kind TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                discovered_at TEXT,
+                updated_at TEXT,
+                error TEXT
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (kind, state, priority DESC, discovered_at)"
+        )
+        self._conn.commit()
+
+        # El filtro se reconstruye recorriendo la tabla con un cursor (sin cargarla en memoria)
+        self._seen = BloomFilter(max(bloom_capacity, self.count() * 2))
+        for (key,) in self._conn.execute("SELECT key FROM frontier"):
+            self._seen.add(key)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.utcnow().isoformat()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def seen(self, url: str) -> bool:
+        key = frontier_key(url)
+        if key not in self._seen:
+            return False
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM frontier WHERE key = ?", (key,)).fetchone() is not None
+
+    def add_many(self, items: Iterable[dict], requeue: bool = False) -> int:
+        """
+        Agrega URLs (`url`, `kind` y opcionalmente `priority`). Las ya conocidas se ignoran,
+        salvo con `requeue`, que vuelve a poner en pending las terminadas (p. ej. las páginas
+        de resultados en un recrawl). Devuelve cuántas URLs quedaron nuevas o reencoladas.
+        """
+        now = self._now()
+        new_rows, maybe_known = [], []
+        for item in items:
+            url = item["url"]
+            key = frontier_key(url)
+            row = (key, url, extract_property_id(url), item["kind"], item.get("priority", 0), now, now)
+            if self._seen.add(key):
+                # Negativo del filtro: seguro que es nueva
+                new_rows.append(row)
+            else:
+                # Conocida o falso positivo del filtro: la base decide
+                maybe_known.append(row)
+
+        insert = """INSERT OR IGNORE INTO frontier (key, url, property_id, kind, priority, discovered_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+        with self._lock:
+            added = self._conn.executemany(insert, new_rows).rowcount if new_rows else 0
+            for row in maybe_known:
+                existing = self._conn.execute("SELECT state FROM frontier WHERE key = ?", (row[0],)).fetchone()
+                if existing is None:
+                    added += self._conn.execute(insert, row).rowcount
+                elif requeue and existing[0] in ("done", "failed"):
+                    added += self._conn.execute(
+                        """UPDATE frontier SET state = 'pending', attempts = 0, priority = ?, updated_at = ?
+                           WHERE key = ?""",
+                        (row[4], now, row[0]),
+                    ).rowcount
+            self._conn.commit()
+        return added
+
+    def add(self, url: str, kind: str = "detail", priority: int = 0, requeue: bool = False) -> bool:
+        return self.add_many([{"url": url, "kind": kind, "priority": priority}], requeue=requeue) == 1
+
+    def pop(self, kind: str = "detail", limit: int = 100) -> list[dict]:
+        """Reserva (estado in_progress) hasta `limit` URLs pendientes de mayor prioridad."""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT key, url, property_id, priority FROM frontier
+                   WHERE kind = ? AND state = 'pending'
+                   ORDER BY priority DESC, discovered_at LIMIT ?""",
+                (kind, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE frontier SET state = 'in_progress', updated_at = ? WHERE key = ?",
+                [(self._now(), row[0]) for row in rows],
+            )
+            self._conn.commit()
+        return [{"url": url, "property_id": property_id, "priority": priority} for _, url, property_id, priority in rows]
+
+    def mark_done(self, url: str) -> None:
+        """Marca la URL como terminada (una ficha redirigida a otro slug se reconoce por su ID)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE frontier SET state = 'done', error = NULL, updated_at = ? WHERE key = ?",
+                (self._now(), frontier_key(url)),
+            )
+            self._conn.commit()
+
+    def mark_failed(self, url: str, error: str, max_attempts: int = MAX_ATTEMPTS) -> None:
+        """Registra el fallo; vuelve a pending hasta agotar `max_attempts`."""
+        with self._lock:
+            self._conn.execute(
+                """UPDATE frontier SET attempts = attempts + 1, error = ?, updated_at = ?,
+                       state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                   WHERE key = ?""",
+                (error, self._now(), max_attempts, frontier_key(url)),
+            )
+            self._conn.commit()
+
+    def reset_in_progress(self, kind: Optional[str] = None) -> int:
+        """Devuelve a pending lo que quedó reservado (de un `kind` o de todos) por una ejecución interrumpida."""
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE frontier SET state = 'pending', updated_at = ?
+                   WHERE state = 'in_progress' AND (? IS NULL OR kind = ?)""",
+                (self._now(), kind, kind),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    async def iter_pending(self, kind: str = "detail", batch_size: int = 100) -> AsyncIterator[str]:
+        """
+        Iterable asíncrono de URLs pendientes, reservadas por lotes; sirve directamente como
+        entrada de Century21RobustScraper.iter_results().
+        """
+        while True:
+            batch = await asyncio.to_thread(self.pop, kind, batch_size)
+            if not batch:
+                return
+            for item in batch:
+                yield item["url"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state").fetchall()
+        stats: dict[str, dict] = {}
+        for kind, state, count in rows:
+            stats.setdefault(kind, {})[state] = count
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,96 @@
+"""
+Archivo local de HTML crudo, direccionado por contenido y comprimido con zstd.
+
+Guarda el resultado de `page.content()` para poder volver a parsear las
+páginas (p. ej. después de corregir el parser) sin abrir Chromium:
+
+    <root>/objects/ab/cdef...0123.html.zst   # blob = sha256 del HTML
+    <root>/index.jsonl                         # una línea por fetch
+
+Cada línea del índice registra `url`, `final_url`, `fetched_at`, `sha256` y
+`size`. Varias descargas idénticas de la misma página comparten el mismo blob.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+import zstandard
+
+ZSTD_LEVEL = 10
+
+
+class HtmlArchive:
+    """Almacén de páginas HTML indexado por URL y fecha de descarga."""
+
+    def __init__(self, root: str | Path, level: int = ZSTD_LEVEL):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self.level = level
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}.html.zst"
+
+    def put(self, url: str, html_content: str, final_url: Optional[str] = None,
+            fetched_at: Optional[datetime.datetime] = None) -> str:
+        """Guarda el HTML (si no existía ya) y agrega una entrada al índice. Devuelve el sha256."""
+        raw = html_content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(raw)
+            # Escritura atómica: un lector nunca ve un blob a medias
+            fd, tmp_path = tempfile.mkstemp(dir=blob_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(compressed)
+            os.replace(tmp_path, blob_path)
+
+        entry = {
+            "url": url,
+            "final_url": final_url or url,
+            "fetched_at": (fetched_at or datetime.datetime.utcnow()).isoformat(),
+            "sha256": digest,
+            "size": len(raw),
+        }
+        with open(self.index_path, "a", encoding="utf-8") as index:
+            index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Devuelve el HTML de un blob."""
+        compressed = self._blob_path(digest).read_bytes()
+        return zstandard.ZstdDecompressor().decompress(compressed).decode("utf-8")
+
+    def entries(self, latest_only: bool = True) -> Iterator[dict]:
+        """
+        Entradas del índice en orden de escritura. Con `latest_only` se devuelve
+        solo la descarga más reciente de cada URL.
+        """
+        if not self.index_path.exists():
+            return
+        if not latest_only:
+            with open(self.index_path, encoding="utf-8") as index:
+                for line in index:
+                    if line.strip():
+                        yield json.loads(line)
+            return
+
+        latest: dict[str, dict] = {}
+        with open(self.index_path, encoding="utf-8") as index:
+            for line in index:
+                if line.strip():
+                    entry = json.loads(line)
+                    previous = latest.get(entry["url"])
+                    if previous is None or entry["fetched_at"] >= previous["fetched_at"]:
+                        latest[entry["url"]] = entry
+        yield from latest.values()
@@ -0,0 +1,97 @@
+"""
+Cliente HTTP compartido para descargar páginas de Century21 sin navegador.
+
+Buena parte del contenido que lee el parser viene renderizado desde el
+servidor, así que un GET con httpx (HTTP/2, keep-alive) suele bastar; el
+scraper recurre a Playwright solo cuando faltan campos obligatorios.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-MX,es;q=0.9",
+}
+
+
+@dataclass
+class HttpPage:
+    url: str
+    final_url: str
+    status: int
+    html: str
+    headers: dict = field(default_factory=dict)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class HttpFetcher:
+    """Cliente httpx con pool de conexiones, pensado para vivir durante todo un lote."""
+
+    def __init__(self, max_connections: int = 16, timeout_ms: int = 30000, http2: bool = True):
+        self.max_connections = max_connections
+        self.timeout_ms = timeout_ms
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "HttpFetcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        try:
+            self._client = self._build_client(self.http2)
+        except ImportError:
+            # httpx necesita el paquete 'h2' para HTTP/2
+            logging.warning("HTTP/2 no disponible (falta 'h2'); usando HTTP/1.1 con keep-alive.")
+            self._client = self._build_client(http2=False)
+
+    def _build_client(self, http2: bool) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(self.timeout_ms / 1000),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    async def fetch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> HttpPage:
+        """GET de la página; con validadores guardados se hace un GET condicional (304 = sin cambios)."""
+        if self._client is None:
+            await self.start()
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = await self._client.get(url, headers=headers)
+        return HttpPage(
+            url=url,
+            final_url=str(response.url),
+            status=response.status_code,
+            html=response.text if response.status_code == 200 else "",
+            headers={k.lower(): v for k, v in response.headers.items()},
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
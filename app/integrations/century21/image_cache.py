@@ -0,0 +1,214 @@
+"""
+Caché local de imágenes direccionada por contenido.
+
+Cada imagen se guarda una sola vez en `objects/<2 primeros>/<sha256><ext>` dentro de
+image_storage_path, y un índice SQLite relaciona cada URL con el hash de su
+contenido. Una URL ya vista no vuelve a descargarse aunque el anuncio se publique
+otra vez, y dos URLs con los mismos bytes comparten archivo. Cuando el total pasa
+del presupuesto de disco se borran los objetos usados hace más tiempo (LRU).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.integrations.century21.image_downloader import ImageDownloader
+
+IMAGE_CACHE_MAX_MB = 2048
+INDEX_NAME = "index.sqlite3"
+DEFAULT_EXTENSION = ".jpg"
+BUSY_TIMEOUT_SECONDS = 10
+
+
+def url_extension(url: str) -> str:
+    """Extensión de la URL (".jpg" si no trae una reconocible)."""
+    suffix = Path(urlsplit(url).path).suffix.lower()
+    return suffix if suffix in (".jpg", ".jpeg", ".png", ".webp", ".gif") else DEFAULT_EXTENSION
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Pone un objeto de la caché en `target` (hard link si el sistema lo permite, si no copia)."""
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class ImageCache:
+    """Objetos por sha256 más un índice URL → hash, con desalojo LRU por tamaño total."""
+
+    def __init__(self, root: str | Path, max_bytes: int = IMAGE_CACHE_MAX_MB * 2 ** 20):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / INDEX_NAME), timeout=BUSY_TIMEOUT_SECONDS,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS objects (
+                sha256 TEXT PRIMARY KEY,
+                ext TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS urls_sha256 ON urls (sha256)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS objects_last_used ON objects (last_used)")
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "ImageCache":
+        """image_storage_path e image_cache_max_mb de app.config.Settings."""
+        return cls(settings.image_storage_path, settings.image_cache_max_mb * 2 ** 20)
+
+    def object_path(self, sha256: str, ext: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}{ext}"
+
+    def lookup(self, urls: list[str]) -> dict[str, Path]:
+        """Rutas de las URLs que ya están en la caché (y marca sus objetos como recién usados)."""
+        if not urls:
+            return {}
+        found: dict[str, Path] = {}
+        with self._lock:
+            placeholders = ",".join("?" * len(urls))
+            rows = self._conn.execute(
+                f"""SELECT urls.url, objects.sha256, objects.ext, objects.size FROM urls
+                    JOIN objects ON objects.sha256 = urls.sha256 WHERE urls.url IN ({placeholders})""",
+                urls,
+            ).fetchall()
+            used = []
+            for url, sha256, ext, size in rows:
+                path = self.object_path(sha256, ext)
+                if not path.exists():
+                    # Borrado a mano: se olvida y se vuelve a descargar
+                    self._conn.execute("DELETE FROM objects WHERE sha256 = ?", (sha256,))
+                    self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+                    continue
+                found[url] = path
+                used.append(sha256)
+                self.bytes_from_cache += size
+            now = time.time()
+            self._conn.executemany("UPDATE objects SET last_used = ? WHERE sha256 = ?", [(now, sha256) for sha256 in used])
+        return found
+
+    def add(self, url: str, sha256: str, source: Path) -> Path:
+        """Mueve `source` (ya descargado y con su sha256) a la caché y registra la URL."""
+        ext = url_extension(url)
+        with self._lock:
+            row = self._conn.execute("SELECT ext FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None and self.object_path(sha256, row[0]).exists():
+                # Mismo contenido bajo otra URL: se reutiliza el objeto
+                source.unlink(missing_ok=True)
+                path, ext = self.object_path(sha256, row[0]), row[0]
+            else:
+                path = self.object_path(sha256, ext)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, path)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (sha256, ext, size, last_used) VALUES (?, ?, ?, ?)",
+                (sha256, ext, path.stat().st_size, time.time()),
+            )
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, sha256) VALUES (?, ?)", (url, sha256))
+        return path
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self, keep: frozenset[str] | set[str] = frozenset()) -> int:
+        """
+        Borra los objetos usados hace más tiempo hasta quedar bajo max_bytes; los hashes de
+        `keep` (el lote en curso) no se tocan. Devuelve los bytes liberados.
+        """
+        freed = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            for sha256, ext, size in self._conn.execute(
+                "SELECT sha256, ext, size FROM objects ORDER BY last_used"
+            ).fetchall():
+                if total - freed <= self.max_bytes:
+                    break
+                if sha256 in keep:
+                    continue
+                self.object_path(sha256, ext).unlink(missing_ok=True)
+                self._conn.execute("DELETE FROM objects WHERE sha256 = ?", (sha256,))
+                self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+                freed += size
+                self.evicted_files += 1
+        self.evicted_bytes += freed
+        return freed
+
+    async def fetch(self, urls: list[str], downloader: ImageDownloader) -> tuple[list[Optional[Path]], dict]:
+        """
+        Rutas locales de `urls` en el mismo orden: las que están en caché no tocan la red, el
+        resto se descarga con `downloader` y se agrega. None si la descarga falló. También
+        devuelve las estadísticas del lote: las de la caché (hits, misses, ...) y, en "download",
+        las de image_downloader.batch_stats para lo que se descargó (None si todo estaba en caché).
+        """
+        cached = await asyncio.to_thread(self.lookup, list(dict.fromkeys(urls)))
+        missing = [url for url in dict.fromkeys(urls) if url not in cached]
+        batch_hits, batch_misses = len(cached), len(missing)
+        self.hits += batch_hits
+        self.misses += batch_misses
+        download_stats = None
+        if missing:
+            downloads, download_stats = await downloader.download_all(
+                (url, self.tmp_dir / f"{uuid.uuid4().hex}{url_extension(url)}") for url in missing
+            )
+            for download in downloads:
+                if download.ok:
+                    cached[download.url] = await asyncio.to_thread(self.add, download.url, download.sha256, download.path)
+        keep = {path.stem for path in cached.values()}
+        await asyncio.to_thread(self.evict, keep)
+        # Totales de la caché (tamaño, desalojos) con los hits/misses de este lote
+        stats = await asyncio.to_thread(self.stats)
+        stats.update(
+            hits=batch_hits,
+            misses=batch_misses,
+            hit_rate=round(batch_hits / (batch_hits + batch_misses), 3) if batch_hits + batch_misses else 0.0,
+            download=download_stats,
+        )
+        return [cached.get(url) for url in urls], stats
+
+    def stats(self) -> dict:
+        """Totales desde que se abrió la caché."""
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else 0.0,
+            "mb_from_cache": round(self.bytes_from_cache / 2 ** 20, 2),
+            "evicted_files": self.evicted_files,
+            "evicted_mb": round(self.evicted_bytes / 2 ** 20, 2),
+            "size_mb": round(self.total_bytes() / 2 ** 20, 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,202 @@
+"""
+Descarga de imágenes de propiedades a disco.
+
+Un cliente httpx con pool de conexiones para todo el lote, un tope de descargas
+simultáneas global y otro por host, y el cuerpo escrito por trozos con aiofiles:
+nunca hay una imagen completa en memoria ni escrituras bloqueantes en el event
+loop. Cada descarga va a un archivo temporal junto al destino y se renombra al
+terminar (os.replace es atómico), así que un archivo con el nombre final siempre
+está completo. Los errores transitorios (timeouts, red, 429/5xx) se reintentan
+con el mismo backoff que el scraper; una imagen que pasa de max_image_size_mb se
+corta y se descarta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiofiles
+import aiofiles.os
+import httpx
+
+from app.integrations.century21.http_fetcher import USER_AGENT
+from app.integrations.century21.rate_limit import HostRateLimiter
+from app.integrations.century21.resilience import (
+    MAX_ATTEMPTS, RETRIES_TOTAL, RETRYABLE_STATUSES, RetryableStatusError,
+    backoff_delay, classify_error, is_retryable, parse_retry_after,
+)
+
+# Descargas simultáneas en total y contra un mismo host
+IMAGE_DOWNLOAD_CONCURRENCY = 16
+IMAGE_DOWNLOAD_PER_HOST = 4
+IMAGE_DOWNLOAD_TIMEOUT_MS = 30000
+CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_SIZE_MB = 10
+IMAGE_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+}
+
+
+class ImageTooLargeError(Exception):
+    """La imagen supera el tamaño máximo permitido (no se reintenta)."""
+
+
+@dataclass
+class ImageDownload:
+    url: str
+    path: Path
+    ok: bool = False
+    bytes: int = 0
+    seconds: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+    # sha256 del contenido, calculado mientras se escribe (lo usa la caché de imágenes)
+    sha256: Optional[str] = None
+
+
+class ImageDownloader:
+    """Descargas de imágenes con pool de conexiones, topes de concurrencia y reintentos."""
+
+    def __init__(self, max_bytes: int = MAX_IMAGE_SIZE_MB * 2 ** 20,
+                 concurrency: int = IMAGE_DOWNLOAD_CONCURRENCY, per_host: int = IMAGE_DOWNLOAD_PER_HOST,
+                 max_attempts: int = MAX_ATTEMPTS, timeout_ms: int = IMAGE_DOWNLOAD_TIMEOUT_MS,
+                 rate_limiter: HostRateLimiter | None = None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts debe ser al menos 1")
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.max_attempts = max_attempts
+        self.timeout_ms = timeout_ms
+        # Token bucket por host (opcional); lo cierra quien lo crea
+        self.rate_limiter = rate_limiter
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self.retry_counts: dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs) -> "ImageDownloader":
+        """Tamaño máximo según max_image_size_mb de app.config.Settings."""
+        kwargs.setdefault("max_bytes", settings.max_image_size_mb * 2 ** 20)
+        return cls(**kwargs)
+
+    async def __aenter__(self) -> "ImageDownloader":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=IMAGE_HEADERS,
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout_ms / 1000),
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    async def _stream_to_file(self, url: str, path: Path) -> tuple[int, str]:
+        """Un intento: escribe el cuerpo en un temporal y lo renombra a `path`. Devuelve bytes y sha256."""
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.part")
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            async with self._client.stream("GET", url) as response:
+                if response.status_code in RETRYABLE_STATUSES:
+                    raise RetryableStatusError(response.status_code, parse_retry_after(response.headers.get("retry-after")))
+                response.raise_for_status()
+                declared = int(response.headers.get("content-length") or 0)
+                if declared > self.max_bytes:
+                    raise ImageTooLargeError(f"{declared} bytes declarados (máximo {self.max_bytes})")
+                async with aiofiles.open(temp_path, "wb") as output:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        # Content-Length puede faltar o mentir: se cuenta lo que realmente llega
+                        if size > self.max_bytes:
+                            raise ImageTooLargeError(f"más de {self.max_bytes} bytes")
+                        digest.update(chunk)
+                        await output.write(chunk)
+            await aiofiles.os.replace(temp_path, path)
+            return size, digest.hexdigest()
+        finally:
+            if await aiofiles.os.path.exists(temp_path):
+                await aiofiles.os.remove(temp_path)
+
+    async def download(self, url: str, path: str | Path) -> ImageDownload:
+        """Descarga `url` a `path` con reintentos; el resultado dice si quedó en disco y por qué no."""
+        if self._client is None:
+            raise RuntimeError("ImageDownloader no iniciado; usar 'async with ImageDownloader(...)'")
+        result = ImageDownload(url=url, path=Path(path))
+        result.path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        while True:
+            result.attempts += 1
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(url)
+            try:
+                # Primero el turno del host y después el global: esperando al host no se retiene un
+                # turno global, así que una ráfaga de un mismo host no frena a los demás. Los turnos
+                # se sueltan durante el backoff para no frenar al resto del lote
+                async with self._host_slot(url), self._slots:
+                    result.bytes, result.sha256 = await self._stream_to_file(url, result.path)
+                result.ok, result.error = True, None
+                break
+            except Exception as e:
+                kind = classify_error(e)
+                # httpx agrega una segunda línea con un enlace de ayuda
+                result.error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+                if not is_retryable(kind) or result.attempts >= self.max_attempts:
+                    logging.warning(f"Imagen no descargada {url}: {result.error}")
+                    break
+                self.retry_counts[kind] = self.retry_counts.get(kind, 0) + 1
+                RETRIES_TOTAL.labels(f"image_{kind}").inc()
+                await asyncio.sleep(backoff_delay(result.attempts, retry_after=getattr(e, "retry_after", None)))
+        result.seconds = time.perf_counter() - start
+        return result
+
+    async def download_all(self, items: Iterable[tuple[str, str | Path]]) -> tuple[list[ImageDownload], dict]:
+        """
+        Descarga un lote de (url, path) respetando los topes de concurrencia. Devuelve los
+        resultados en el orden de entrada y las estadísticas del lote.
+        """
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.download(url, path) for url, path in items))
+        return list(results), batch_stats(results, time.perf_counter() - start)
+
+
+def batch_stats(results: list[ImageDownload], elapsed: float) -> dict:
+    """Imágenes, bytes y throughput de un lote de descargas."""
+    downloaded = sum(result.bytes for result in results if result.ok)
+    return {
+        "images": len(results),
+        "ok": sum(1 for result in results if result.ok),
+        "failed": sum(1 for result in results if not result.ok),
+        "retries": sum(result.attempts - 1 for result in results),
+        "mb": round(downloaded / 2 ** 20, 2),
+        "seconds": round(elapsed, 2),
+        "mb_per_s": round(downloaded / 2 ** 20 / elapsed, 2) if elapsed > 0 else 0.0,
+        "images_per_s": round(len(results) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,241 @@
+"""
+Normalización de imágenes antes de subirlas a Facebook.
+
+Marketplace reduce las fotos de todos modos, así que subir el JPEG original de
+varios MB solo alarga la subida. Cada imagen se valida contra
+supported_image_formats, se rota según su EXIF, se reduce a un lado mayor máximo
+y se recomprime como JPEG sin metadatos (calidad fija o, con un tamaño objetivo,
+la mayor calidad que entra en él). Es CPU puro, así que corre en un pool de
+procesos, como ParsePool. El resultado se guarda por sha256 de la imagen de
+origen y de los parámetros: normalizar otra vez la misma foto no cuesta nada.
+Esa carpeta tiene su propio presupuesto de disco (image_normalized_max_mb): tras
+cada lote se borran las salidas usadas hace más tiempo, como en ImageCache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+NORMALIZE_MAX_EDGE = 2048
+NORMALIZE_QUALITY = 85
+NORMALIZED_MAX_MB = 512
+# Con tamaño objetivo la calidad baja de a QUALITY_STEP hasta MIN_QUALITY
+MIN_QUALITY = 60
+QUALITY_STEP = 5
+SUPPORTED_FORMATS = ("jpg", "jpeg", "png", "webp")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Nombre de Pillow → extensiones aceptadas en supported_image_formats
+_PIL_FORMATS = {"JPEG": {"jpg", "jpeg"}, "PNG": {"png"}, "WEBP": {"webp"}, "GIF": {"gif"}}
+
+
+class UnsupportedImageError(Exception):
+    """Archivo que no es una imagen válida o cuyo formato no está en supported_image_formats."""
+
+
+@dataclass
+class NormalizedImage:
+    source: Path
+    path: Optional[Path] = None
+    cached: bool = False
+    source_bytes: int = 0
+    output_bytes: int = 0
+    width: int = 0
+    height: int = 0
+    quality: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # Sin exif=/icc_profile=: el JPEG de salida no lleva metadatos
+    image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def normalize_image(source: str | Path, output_dir: str | Path, max_edge: int = NORMALIZE_MAX_EDGE,
+                    quality: int = NORMALIZE_QUALITY, target_bytes: int = 0,
+                    formats: Iterable[str] = SUPPORTED_FORMATS) -> NormalizedImage:
+    """
+    Normaliza `source` a JPEG en `output_dir`. Se ejecuta en los workers del pool; también se
+    puede llamar directamente.
+    """
+    start = time.perf_counter()
+    source = Path(source)
+    result = NormalizedImage(source=source, source_bytes=source.stat().st_size)
+    key = f"{file_sha256(source)}_{max_edge}_{quality}_{target_bytes}"
+    output = Path(output_dir) / key[:2] / f"{key}.jpg"
+    if output.exists():
+        # La fecha de modificación hace de "último uso" para el desalojo LRU
+        os.utime(output)
+        result.path, result.cached, result.output_bytes = output, True, output.stat().st_size
+        result.seconds = time.perf_counter() - start
+        return result
+
+    allowed = {fmt.lower().lstrip(".") for fmt in formats}
+    try:
+        with Image.open(source) as image:
+            if not _PIL_FORMATS.get(image.format, set()) & allowed:
+                raise UnsupportedImageError(f"formato {image.format} no admitido ({sorted(allowed)})")
+            # JPEG: decodifica directamente a una escala reducida (mucho menos trabajo que a tamaño completo)
+            image.draft("RGB", (max_edge, max_edge))
+            image.load()
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA", "P"):
+                # Transparencia sobre fondo blanco (JPEG no tiene canal alfa)
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            result.width, result.height = image.size
+
+            result.quality = quality
+            data = _encode(image, quality)
+            while target_bytes and len(data) > target_bytes and result.quality - QUALITY_STEP >= MIN_QUALITY:
+                result.quality -= QUALITY_STEP
+                data = _encode(image, result.quality)
+    except (UnidentifiedImageError, OSError) as e:
+        # Archivo que no es imagen o truncado
+        raise UnsupportedImageError(f"imagen inválida: {e}") from e
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output.with_name(f".{output.name}.{uuid.uuid4().hex[:8]}.part")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, output)
+    result.path, result.output_bytes = output, len(data)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+class ImageNormalizer:
+    """Pool de procesos para normalize_image con estadísticas por lote."""
+
+    def __init__(self, output_dir: str | Path, max_edge: int = NORMALIZE_MAX_EDGE,
+                 quality: int = NORMALIZE_QUALITY, target_bytes: int = 0,
+                 formats: Iterable[str] = SUPPORTED_FORMATS, workers: int = 0,
+                 max_bytes: int = NORMALIZED_MAX_MB * 2 ** 20):
+        if not 1 <= quality <= 95:
+            raise ValueError("quality debe estar entre 1 y 95")
+        self.output_dir = Path(output_dir)
+        self.max_bytes = max_bytes
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.max_edge = max_edge
+        self.quality = quality
+        self.target_bytes = target_bytes
+        self.formats = tuple(formats)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Executor | None = None
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs) -> "ImageNormalizer":
+        """
+        image_max_edge / image_jpeg_quality / image_target_kb; salida en image_storage_path/normalized
+        con image_normalized_max_mb de presupuesto.
+        """
+        kwargs.setdefault("output_dir", Path(settings.image_storage_path) / "normalized")
+        kwargs.setdefault("max_edge", settings.image_max_edge)
+        kwargs.setdefault("quality", settings.image_jpeg_quality)
+        kwargs.setdefault("target_bytes", settings.image_target_kb * 1024)
+        kwargs.setdefault("formats", settings.supported_image_formats)
+        kwargs.setdefault("workers", settings.image_normalize_workers)
+        kwargs.setdefault("max_bytes", settings.image_normalized_max_mb * 2 ** 20)
+        return cls(**kwargs)
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def normalize(self, source: str | Path) -> NormalizedImage:
+        """Normaliza una imagen en el pool; un error queda en el resultado en lugar de propagarse."""
+        executor = self._ensure_executor()
+        try:
+            return await asyncio.wrap_future(executor.submit(
+                normalize_image, source, self.output_dir, self.max_edge, self.quality,
+                self.target_bytes, self.formats,
+            ))
+        except Exception as e:
+            logging.warning(f"Imagen no normalizada {source}: {e}")
+            return NormalizedImage(source=Path(source), error=f"{type(e).__name__}: {e}")
+
+    async def normalize_all(self, sources: Iterable[str | Path]) -> tuple[list[NormalizedImage], dict]:
+        """
+        Normaliza un lote en paralelo; resultados en el orden de entrada y estadísticas del lote.
+        Después desaloja salidas viejas si la carpeta pasó de max_bytes (las del lote se quedan).
+        """
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.normalize(source) for source in sources))
+        freed = await asyncio.to_thread(self.evict, {result.path for result in results if result.path is not None})
+        stats = batch_stats(results, time.perf_counter() - start)
+        stats["evicted_mb"] = round(freed / 2 ** 20, 2)
+        return list(results), stats
+
+    def evict(self, keep: frozenset[Path] | set[Path] = frozenset()) -> int:
+        """Borra las salidas usadas hace más tiempo hasta quedar bajo max_bytes; devuelve los bytes liberados."""
+        if not self.output_dir.exists():
+            return 0
+        entries = []
+        for path in self.output_dir.glob("*/*.jpg"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total - freed <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink(missing_ok=True)
+            freed += size
+            self.evicted_files += 1
+        self.evicted_bytes += freed
+        return freed
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def batch_stats(results: list[NormalizedImage], elapsed: float) -> dict:
+    """MB antes y después, ahorro y cuántas salieron de la caché."""
+    ok = [result for result in results if result.error is None]
+    source_bytes = sum(result.source_bytes for result in ok)
+    output_bytes = sum(result.output_bytes for result in ok)
+    return {
+        "images": len(results),
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "cached": sum(1 for result in ok if result.cached),
+        "mb_in": round(source_bytes / 2 ** 20, 2),
+        "mb_out": round(output_bytes / 2 ** 20, 2),
+        "saved_pct": round(100 * (1 - output_bytes / source_bytes), 1) if source_bytes else 0.0,
+        "seconds": round(elapsed, 2),
+    }
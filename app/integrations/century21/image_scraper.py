@@ -1,78 +1,203 @@
 import asyncio
+from typing import Optional
+from urllib.parse import urlsplit
+
 from playwright.async_api import async_playwright
 
-async def scrape_images(url):
+# "dom": URLs leídas del HTML (JSON embebido, atributos de <img>, og:image) en un solo
+# page.evaluate y sin descargar imágenes; si faltan fotos respecto al botón "N Fotos" se
+# recorre la galería con el teclado. "keypress": siempre se recorre la galería.
+IMAGE_URL_MODES = ("dom", "keypress")
+IMAGE_URL_MODE = "dom"
+# Fotos a recorrer cuando no se puede leer el botón de la galería
+DEFAULT_PHOTO_COUNT = 38
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Candidatas a URL de foto en la página ya cargada y el número del botón "N Fotos"
+GALLERY_URLS_JS = r"""
+() => {
+    const urls = [];
+    const add = (value) => {
+        if (typeof value !== 'string' || !value.trim()) return;
+        try { urls.push(new URL(value.trim(), document.baseURI).href); } catch (e) {}
+    };
+    const collect = (node) => {
+        if (typeof node === 'string') add(node);
+        else if (Array.isArray(node)) node.forEach(collect);
+        else if (node && typeof node === 'object') Object.values(node).forEach(collect);
+    };
+    // Datos de la galería embebidos como JSON (incluye JSON-LD)
+    for (const script of document.querySelectorAll('script[type="application/json"], script[type="application/ld+json"]')) {
+        try { collect(JSON.parse(script.textContent)); } catch (e) {}
+    }
+    // <img>/<source> con src directo, lazy-loading en data-* o srcset
+    for (const img of document.querySelectorAll('img, source')) {
+        for (const attr of ['src', 'data-src', 'data-lazy', 'data-original', 'data-full', 'data-zoom-image']) {
+            add(img.getAttribute(attr));
+        }
+        const srcset = img.getAttribute('srcset') || img.getAttribute('data-srcset');
+        if (srcset) srcset.split(',').forEach((part) => add(part.trim().split(/\s+/)[0]));
+    }
+    document.querySelectorAll('a[href]').forEach((a) => add(a.getAttribute('href')));
+    document.querySelectorAll('meta[property="og:image"]').forEach((meta) => add(meta.content));
+    const button = Array.from(document.querySelectorAll('button')).find((b) => /Fotos/.test(b.textContent));
+    const count = button ? parseInt(button.textContent.replace(/\D/g, ''), 10) : NaN;
+    return {urls, photoCount: Number.isNaN(count) ? null : count};
+}
+"""
+
+
+def is_gallery_image(url):
+    """Foto de una propiedad (no logos ni íconos del sitio)."""
+    path = urlsplit(url).path.lower()
+    return "propiedades" in path and path.endswith(IMAGE_EXTENSIONS)
+
+
+def unique_by_filename(urls):
+    """URLs únicas por nombre de archivo, en el orden en que aparecieron."""
+    unique_image_files = {}
+    for url in urls:
+        filename = urlsplit(url).path.split('/')[-1]
+        if filename not in unique_image_files:
+            unique_image_files[filename] = url
+    return list(unique_image_files.values())
+
+
+async def image_urls_from_dom(page) -> tuple[list[str], Optional[int]]:
+    """URLs de fotos presentes en la página cargada y el número de fotos que anuncia el botón."""
+    found = await page.evaluate(GALLERY_URLS_JS)
+    urls = unique_by_filename(url for url in found["urls"] if is_gallery_image(url))
+    return urls, found["photoCount"]
+
+
+async def gallery_image_urls(page) -> list[str]:
     """
-    Navega a la página de una propiedad, abre la galería de imágenes,
-    la recorre y extrae las URLs de las imágenes.
+    URLs de las fotos de una página ya cargada sin descargar ninguna imagen: las del HTML y, si
+    faltan respecto al botón, las que la galería va poniendo en el DOM al recorrerla con el
+    teclado. Funciona con las imágenes bloqueadas (lo usa el scraper de datos).
     """
-    print("Lanzando el navegador...")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    urls, photo_count = await image_urls_from_dom(page)
+    if urls and (photo_count is None or len(urls) >= photo_count):
+        return urls
+    try:
+        await page.click('div#fotos img', timeout=5000)
+    except Exception:
+        return urls
+    for _ in range(photo_count or DEFAULT_PHOTO_COUNT):
+        await page.keyboard.press('ArrowRight')
+        shown, _ = await image_urls_from_dom(page)
+        urls = unique_by_filename(urls + shown)
+        if photo_count and len(urls) >= photo_count:
+            break
+    return urls
+
+
+async def walk_gallery(page, photo_count, image_urls):
+    """
+    Abre la galería y la recorre con ArrowRight; cada foto que se carga llega por red y el
+    handler de respuestas la agrega a `image_urls`. Devuelve False si no se pudo abrir.
+    """
+    print("Abriendo la galería de imágenes...")
+    try:
+        await page.wait_for_selector('div#fotos img', timeout=10000)
+        await page.click('div#fotos img')
+        print("Galería abierta. Recorriendo las imágenes...")
+        await asyncio.sleep(1) # Pequeña pausa para asegurar que la galería está lista para recibir eventos de teclado.
+
+    except Exception as e:
+        print(f"No se pudo hacer clic en la imagen para abrir la galería: {e}")
+        return False
 
-        # Lista para almacenar las URLs de las imágenes
-        image_urls = []
+    print(f"Recorriendo la galería de {photo_count} imágenes...")
+    for i in range(photo_count):
+        await page.keyboard.press('ArrowRight')
+        await asyncio.sleep(0.1)  # Pequeña espera para que la imagen cargue
+    return True
 
-        # Evento para capturar las respuestas de red
-        def handle_response(response):
-            if "propiedades" in response.url and response.url.endswith(".jpg"):
-                image_urls.append(response.url)
 
-        page.on("response", handle_response)
+async def _block_images(route):
+    if route.request.resource_type == "image":
+        await route.abort()
+    else:
+        await route.continue_()
 
-        print(f"Navegando a {url}...")
-        await page.goto(url, wait_until='networkidle')
 
+async def extract_image_urls(page, url, rate_limiter=None, mode=IMAGE_URL_MODE):
+    """
+    Navega `page` a la propiedad y devuelve las URLs de sus fotos. En modo "dom" las imágenes
+    no se descargan y la galería solo se recorre si el HTML trae menos fotos que el botón.
+    """
+    if mode not in IMAGE_URL_MODES:
+        raise ValueError(f"mode debe ser uno de {IMAGE_URL_MODES}")
+
+    # Lista para almacenar las URLs de las imágenes
+    image_urls = []
+
+    # Evento para capturar las respuestas de red
+    def handle_response(response):
+        if is_gallery_image(response.url):
+            image_urls.append(response.url)
+
+    page.on("response", handle_response)
+
+    if mode == "dom":
+        await page.route("**/*", _block_images)
+    if rate_limiter is not None:
+        await rate_limiter.acquire(url)
+    print(f"Navegando a {url}...")
+    await page.goto(url, wait_until='domcontentloaded' if mode == "dom" else 'networkidle')
+
+    if mode == "dom":
+        dom_urls, photo_count = await image_urls_from_dom(page)
+        if dom_urls and (photo_count is None or len(dom_urls) >= photo_count):
+            print(f"Se encontraron {len(dom_urls)} URLs de imágenes en el HTML.")
+            return dom_urls
+        print(f"El HTML trae {len(dom_urls)} de {photo_count or '?'} fotos; se recorrerá la galería.")
+        # El recorrido necesita que las fotos lleguen por red
+        await page.unroute("**/*", _block_images)
+        image_urls.extend(dom_urls)
+    else:
         # Obtener el número de fotos del botón
-        photo_count = 38 # Valor por defecto
+        photo_count = None
         try:
             photo_count_text = await page.inner_text('button.btn-primary:has-text("Fotos")', timeout=5000)
             photo_count = int("".join(filter(str.isdigit, photo_count_text)))
             print(f"Número de fotos detectado en el botón: {photo_count}")
         except Exception as e:
-            print(f"No se pudo leer el número de fotos del botón, se usará el valor por defecto ({photo_count}). Error: {e}")
-
-        print("Abriendo la galería de imágenes...")
-        try:
-            await page.wait_for_selector('div#fotos img', timeout=10000)
-            await page.click('div#fotos img')
-            print("Galería abierta. Recorriendo las imágenes...")
-            await asyncio.sleep(1) # Pequeña pausa para asegurar que la galería está lista para recibir eventos de teclado.
-
-        except Exception as e:
-            print(f"No se pudo hacer clic en la imagen para abrir la galería: {e}")
-            await browser.close()
-            return []
+            print(f"No se pudo leer el número de fotos del botón, se usará el valor por defecto ({DEFAULT_PHOTO_COUNT}). Error: {e}")
 
-        print(f"Recorriendo la galería de {photo_count} imágenes...")
-        for i in range(photo_count):
-            await page.keyboard.press('ArrowRight')
-            await asyncio.sleep(0.1)  # Pequeña espera para que la imagen cargue
+    if not await walk_gallery(page, photo_count or DEFAULT_PHOTO_COUNT, image_urls):
+        return unique_by_filename(image_urls) if mode == "dom" else []
 
-        await browser.close()
+    unique_urls = unique_by_filename(image_urls)
+    print(f"Se encontraron {len(unique_urls)} URLs de imágenes únicas.")
+    return unique_urls
 
-        # Filtrar para obtener URLs únicas basadas en el nombre del archivo
-        unique_image_files = {}
-        for url in image_urls:
-            filename = url.split('/')[-1]
-            if filename not in unique_image_files:
-                unique_image_files[filename] = url
-        
-        unique_urls = list(unique_image_files.values())
 
-        print(f"Se encontraron {len(unique_urls)} URLs de imágenes únicas.")
-        return unique_urls
+async def scrape_images(url, rate_limiter=None, mode=IMAGE_URL_MODE):
+    """
+    Navega a la página de una propiedad y extrae las URLs de las imágenes: del HTML en modo
+    "dom" (por defecto) o abriendo la galería y recorriéndola en modo "keypress".
+    Con `rate_limiter` (HostRateLimiter) la navegación espera su turno del host.
+    """
+    print("Lanzando el navegador...")
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            return await extract_image_urls(page, url, rate_limiter, mode)
+        finally:
+            await browser.close()
 
 if __name__ == '__main__':
     property_url = 'https://century21mexico.com/propiedad/591129_departamento-en-venta-en-lomas-de-costa-azul-acapulco-gro'
-    
+
     # Ejecutar la función asíncrona
     image_urls_found = asyncio.run(scrape_images(property_url))
-    
+
     if image_urls_found:
         print("\n--- URLs de Imágenes Encontradas ---")
         for i, url in enumerate(image_urls_found, 1):
             print(f"{i}. {url}")
     else:
-        print("No se encontraron imágenes para la URL proporcionada.")
\ No newline at end of file
+        print("No se encontraron imágenes para la URL proporcionada.")
@@ -0,0 +1,301 @@
+"""
+Cola persistente de trabajos de scraping en SQLite.
+
+Cada URL de un lote es una fila de `scrape_jobs` con estado pending / in_flight /
+done / failed, intentos y un lease: un worker reserva trabajos por un tiempo
+limitado y lo renueva mientras sigue vivo. Si el proceso muere (o el contenedor se
+reinicia) sus leases vencen y otro worker los recupera, así que un lote se retoma
+donde quedó. La reserva es un único UPDATE ... RETURNING dentro de una transacción
+BEGIN IMMEDIATE, de modo que varios procesos del mismo host pueden compartir el
+archivo sin tomar dos veces el mismo trabajo.
+
+Un lote puede corresponder a un ScrapingSession: jobs_main (con scraping_session_id)
+llama a sync_scraping_session() durante el lote y al terminar para volcar los
+conteos de la cola a esa fila.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.database import ScrapingSession
+
+JOB_QUEUE_DB = "./data/scrape_jobs.sqlite3"
+# Un worker que no renueva su lease en este tiempo se da por muerto
+JOB_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+# Espera máxima por el lock de escritura cuando otro proceso está reservando
+BUSY_TIMEOUT_SECONDS = 30
+ENQUEUE_BATCH_SIZE = 1000
+# Sin pendientes pero con trabajos en curso (que pueden fallar y volver a pending): cada cuánto volver a mirar
+IDLE_POLL_SECONDS = 1.0
+# Cada cuánto jobs_main vuelca los conteos del lote a su ScrapingSession
+SESSION_SYNC_SECONDS = 30.0
+
+JOB_STATES = ("pending", "in_flight", "done", "failed")
+
+
+def default_worker_id() -> str:
+    """Identificador único por proceso: host, PID y un sufijo aleatorio (los PID se reutilizan)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobSource:
+    """
+    Lo que un worker necesita de una cola de trabajos: claim / heartbeat / complete / fail /
+    release / stats / errors. Lo implementan ScrapeJobQueue (archivo local) y RemoteJobQueue
+    (coordinador HTTP compartido por varios nodos).
+    """
+
+    lease_seconds: float
+
+    async def iter_jobs(self, batch: str, batch_size: int = 8) -> AsyncIterator[dict]:
+        """
+        Iterable asíncrono de trabajos reservados por tandas de `batch_size` (tandas chicas: lo
+        reservado y aún no empezado también consume lease). Termina cuando el lote no tiene
+        trabajos pendientes ni en curso: un fallo con intentos restantes se reintenta en la misma
+        ejecución, y los trabajos de un worker caído se retoman al vencer su lease.
+        """
+        while True:
+            jobs = await asyncio.to_thread(self.claim, batch, batch_size)
+            if jobs:
+                for job in jobs:
+                    yield job
+                continue
+            in_flight = (await asyncio.to_thread(self.stats, batch))["in_flight"]
+            if not in_flight:
+                return
+            await asyncio.sleep(IDLE_POLL_SECONDS)
+
+
+class ScrapeJobQueue(JobSource):
+    """Trabajos de scraping con reserva por lease, reintentos y recuperación de workers caídos."""
+
+    def __init__(self, db_path: str | Path = JOB_QUEUE_DB, lease_seconds: float = JOB_LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, worker_id: Optional[str] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or default_worker_id()
+        # Una conexión por instancia; el lock evita que dos hilos mezclen sus transacciones
+        self._lock = threading.Lock()
+        # Autocommit: las transacciones se abren explícitamente con BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_SECONDS,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS scrape_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch TEXT NOT NULL,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                lease_expires_at REAL,
+                scraping_session_id INTEGER,
+                error TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                UNIQUE (batch, url)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_jobs_claim ON scrape_jobs (batch, state, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_jobs_lease ON scrape_jobs (state, lease_expires_at)")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.utcnow().isoformat()
+
+    def enqueue(self, batch: str, urls: Iterable[str], scraping_session_id: Optional[int] = None) -> int:
+        """
+        Agrega las URLs al lote (las repetidas se ignoran) por tandas, sin cargar `urls` completa
+        en memoria. Devuelve cuántas quedaron nuevas.
+        """
+        added = 0
+        rows = []
+        now = self._now()
+        insert = """INSERT OR IGNORE INTO scrape_jobs (batch, url, scraping_session_id, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?)"""
+        for url in urls:
+            rows.append((batch, url, scraping_session_id, now, now))
+            if len(rows) >= ENQUEUE_BATCH_SIZE:
+                added += self._executemany(insert, rows)
+                rows = []
+        if rows:
+            added += self._executemany(insert, rows)
+        return added
+
+    def _executemany(self, sql: str, rows: list[tuple]) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = self._conn.executemany(sql, rows).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _reclaim_expired(self, now: float) -> int:
+        """Leases vencidos: vuelven a pending o, sin intentos restantes, pasan a failed."""
+        return self._conn.execute(
+            """UPDATE scrape_jobs
+               SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   error = 'lease expired (worker ' || COALESCE(worker_id, '?') || ')',
+                   worker_id = NULL, lease_expires_at = NULL, updated_at = ?
+               WHERE state = 'in_flight' AND lease_expires_at < ?""",
+            (self.max_attempts, self._now(), now),
+        ).rowcount
+
+    def claim(self, batch: str, limit: int = 1, worker_id: Optional[str] = None) -> list[dict]:
+        """
+        Reserva hasta `limit` trabajos pendientes del lote para este worker (en orden de alta).
+        `worker_id` permite reservar en nombre de otro worker (lo usa el coordinador).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._reclaim_expired(now)
+                rows = self._conn.execute(
+                    """UPDATE scrape_jobs
+                       SET state = 'in_flight', attempts = attempts + 1, worker_id = ?,
+                           lease_expires_at = ?, updated_at = ?
+                       WHERE id IN (SELECT id FROM scrape_jobs WHERE batch = ? AND state = 'pending'
+                                    ORDER BY id LIMIT ?)
+                       RETURNING id, url, attempts""",
+                    (worker_id or self.worker_id, now + self.lease_seconds, self._now(), batch, limit),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return sorted(({"id": id_, "url": url, "attempts": attempts} for id_, url, attempts in rows),
+                      key=lambda job: job["id"])
+
+    def heartbeat(self, worker_id: Optional[str] = None) -> int:
+        """Renueva el lease de todos los trabajos que este worker tiene en curso."""
+        return self._execute(
+            "UPDATE scrape_jobs SET lease_expires_at = ? WHERE state = 'in_flight' AND worker_id = ?",
+            (time.time() + self.lease_seconds, worker_id or self.worker_id),
+        )
+
+    def complete(self, job_id: int) -> bool:
+        """
+        Marca el trabajo como terminado. Se acepta aunque el lease ya se haya vencido: el
+        resultado es válido aunque otro worker lo esté repitiendo.
+        """
+        return self._execute(
+            """UPDATE scrape_jobs SET state = 'done', error = NULL, worker_id = NULL,
+                   lease_expires_at = NULL, updated_at = ?
+               WHERE id = ? AND state != 'done'""",
+            (self._now(), job_id),
+        ) == 1
+
+    def fail(self, job_id: int, error: str, worker_id: Optional[str] = None) -> bool:
+        """
+        Registra el fallo; vuelve a pending hasta agotar los intentos. Si el lease ya pasó a
+        otro worker, el fallo se descarta (el otro intento decide).
+        """
+        return self._execute(
+            """UPDATE scrape_jobs
+               SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   error = ?, worker_id = NULL, lease_expires_at = NULL, updated_at = ?
+               WHERE id = ? AND state = 'in_flight' AND worker_id = ?""",
+            (self.max_attempts, error, self._now(), job_id, worker_id or self.worker_id),
+        ) == 1
+
+    def release(self, worker_id: Optional[str] = None) -> int:
+        """Devuelve a pending (sin gastar el intento) lo que este worker reservó y no terminó."""
+        return self._execute(
+            """UPDATE scrape_jobs SET state = 'pending', attempts = MAX(attempts - 1, 0),
+                   worker_id = NULL, lease_expires_at = NULL, updated_at = ?
+               WHERE state = 'in_flight' AND worker_id = ?""",
+            (self._now(), worker_id or self.worker_id),
+        )
+
+    def retry_failed(self, batch: str) -> int:
+        """Vuelve a poner en pending los trabajos fallidos del lote, con los intentos en cero."""
+        return self._execute(
+            """UPDATE scrape_jobs SET state = 'pending', attempts = 0, updated_at = ?
+               WHERE batch = ? AND state = 'failed'""",
+            (self._now(), batch),
+        )
+
+    def stats(self, batch: Optional[str] = None) -> dict:
+        rows = self._query(
+            "SELECT state, COUNT(*) FROM scrape_jobs WHERE (? IS NULL OR batch = ?) GROUP BY state",
+            (batch, batch),
+        )
+        stats = {state: 0 for state in JOB_STATES}
+        stats.update(dict(rows))
+        return stats
+
+    def errors(self, batch: str, limit: int = 100) -> list[dict]:
+        rows = self._query(
+            """SELECT url, error FROM scrape_jobs WHERE batch = ? AND state = 'failed'
+               ORDER BY id LIMIT ?""",
+            (batch, limit),
+        )
+        return [{"url": url, "error": error} for url, error in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def start_scraping_session(session_factory: Callable[[], Session], source_platform: str,
+                           source_url: Optional[str] = None) -> int:
+    """Crea un ScrapingSession en estado running y devuelve su id (para encolar el lote con él)."""
+    session = session_factory()
+    try:
+        record = ScrapingSession(source_platform=source_platform, source_url=source_url, status="running")
+        session.add(record)
+        session.commit()
+        return record.id
+    finally:
+        session.close()
+
+
+def sync_scraping_session(session_factory: Callable[[], Session], queue: JobSource,
+                          batch: str, scraping_session_id: int) -> None:
+    """Vuelca los conteos del lote a su ScrapingSession (found / scraped / failed, estado y errores)."""
+    stats = queue.stats(batch)
+    session = session_factory()
+    try:
+        record = session.get(ScrapingSession, scraping_session_id)
+        if record is None:
+            return
+        record.properties_found = sum(stats.values())
+        record.properties_scraped = stats["done"]
+        record.properties_failed = stats["failed"]
+        record.errors = queue.errors(batch)
+        if stats["pending"] == 0 and stats["in_flight"] == 0:
+            record.status = "completed" if stats["done"] or not stats["failed"] else "failed"
+            record.completed_at = record.completed_at or datetime.datetime.utcnow()
+        else:
+            record.status = "running"
+        session.commit()
+    finally:
+        session.close()
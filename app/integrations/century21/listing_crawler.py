@@ -0,0 +1,296 @@
+"""
+Crawler de páginas de resultados de Century21.
+
+Recorre las búsquedas por operación / estado / ciudad página por página, extrae
+las URLs de detalle (`/propiedad/<id>_<slug>`) con su ID de propiedad y las
+encola en el UrlFrontier. Las páginas de resultados también pasan por el
+frontier (kind="listing"), así que un crawl interrumpido se retoma donde quedó.
+Con un CardDeltaDetector solo se encolan los anuncios nuevos o cuyo precio o
+título en la tarjeta difieren de lo guardado en Property.
+
+    python -m app.integrations.century21.listing_crawler --operacion venta --estado jalisco --ciudad guadalajara [--delta]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import re
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit, urlunsplit
+
+import lxml.html
+
+from app.integrations.century21.card_delta import CardDeltaDetector
+from app.integrations.century21.frontier import PROPERTY_PATH_RE, UrlFrontier, extract_property_id
+from app.integrations.century21.http_fetcher import HttpFetcher
+from app.integrations.century21.rate_limit import HostRateLimiter, shared_rate_limiter
+
+BASE_URL = "https://century21mexico.com"
+# Rutas de búsqueda del sitio; {ciudad} es opcional (ver search_url)
+SEARCH_URL_TEMPLATE = BASE_URL + "/v/resultados/operacion_{operacion}/en-estado_{estado}"
+SEARCH_CITY_SEGMENT = "/en-municipio_{ciudad}"
+PAGE_PARAM = "pagina"
+MAX_SEARCH_PAGES = 500
+FRONTIER_DB = "./data/frontier.sqlite3"
+CRAWL_CONCURRENCY = 4
+
+# Prioridades: las páginas de resultados se drenan antes que las fichas, y en ambos
+# casos las primeras páginas (los anuncios más recientes) van primero
+LISTING_PRIORITY = 1_000_000
+
+_HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']*/propiedad/\d+_[^"\']*)["\']', re.IGNORECASE)
+_NEXT_RE = re.compile(r'<a\b[^>]*\brel\s*=\s*["\']next["\'][^>]*>', re.IGNORECASE)
+_NEXT_HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_PRICE_RE = re.compile(r'\$\s*([\d][\d,]*(?:\.\d+)?)')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Niveles que se sube desde el enlace buscando el contenedor de la tarjeta
+CARD_MAX_DEPTH = 6
+
+
+def normalize_detail_url(href: str, base_url: str = BASE_URL) -> Optional[str]:
+    """URL absoluta de detalle sin query ni fragmento, o None si no es una ficha."""
+    absolute = urljoin(base_url, href)
+    match = PROPERTY_PATH_RE.search(urlsplit(absolute).path)
+    if not match:
+        return None
+    parts = urlsplit(absolute)
+    return urlunsplit((parts.scheme, parts.netloc, match.group(0), "", ""))
+
+
+def extract_detail_links(html: str, base_url: str = BASE_URL) -> list[dict]:
+    """URLs de detalle (sin duplicados, en orden de aparición) de una página de resultados."""
+    links = {}
+    for href in _HREF_RE.findall(html):
+        url = normalize_detail_url(href, base_url)
+        if url and url not in links:
+            links[url] = {"url": url, "property_id": extract_property_id(url)}
+    return list(links.values())
+
+
+def _card_text(element) -> str:
+    return _WHITESPACE_RE.sub(" ", element.text_content()).strip()
+
+
+def _card_container(link, property_id: str):
+    """Ancestro más alto del enlace que sigue siendo de una sola propiedad (la tarjeta)."""
+    card = link
+    for ancestor in list(link.iterancestors())[:CARD_MAX_DEPTH]:
+        ids = {extract_property_id(a.get("href", "")) for a in ancestor.iter("a")} - {None}
+        if ids != {property_id}:
+            break
+        card = ancestor
+    return card
+
+
+def extract_listing_cards(html: str, base_url: str = BASE_URL) -> list[dict]:
+    """
+    Tarjetas de una página de resultados: `url`, `property_id`, `title` y `price` (float, o None si la
+    tarjeta no muestra precio). Sirve para decidir sin abrir la ficha si un anuncio cambió.
+    """
+    if not html.strip():
+        return []
+    doc = lxml.html.fromstring(html)
+    cards: dict[str, dict] = {}
+    for link in doc.iter("a"):
+        url = normalize_detail_url(link.get("href", ""), base_url)
+        if url is None:
+            continue
+        property_id = extract_property_id(url)
+        if property_id in cards:
+            continue
+        card = _card_container(link, property_id)
+        heading = next(card.iter("h1", "h2", "h3", "h4", "h5", "h6"), None)
+        title = _card_text(heading) if heading is not None else (link.get("title") or _card_text(link))
+        price = _PRICE_RE.search(_card_text(card))
+        cards[property_id] = {
+            "url": url,
+            "property_id": property_id,
+            "title": title,
+            "price": float(price.group(1).replace(",", "")) if price else None,
+        }
+    return list(cards.values())
+
+
+def page_number(url: str) -> int:
+    values = parse_qs(urlsplit(url).query).get(PAGE_PARAM)
+    return int(values[0]) if values and values[0].isdigit() else 1
+
+
+def with_page(url: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    query[PAGE_PARAM] = [str(page)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, doseq=True), ""))
+
+
+def search_key(url: str) -> str:
+    """La búsqueda a la que pertenece una página de resultados (la URL sin el número de página)."""
+    parts = urlsplit(url)
+    query = {key: values for key, values in parse_qs(parts.query).items() if key != PAGE_PARAM}
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, doseq=True), ""))
+
+
+def next_page_url(html: str, url: str) -> str:
+    """Siguiente página: el enlace rel="next" si existe; si no, ?pagina=N+1."""
+    tag = _NEXT_RE.search(html)
+    if tag:
+        href = _NEXT_HREF_RE.search(tag.group(0))
+        if href:
+            return urljoin(url, href.group(1))
+    return with_page(url, page_number(url) + 1)
+
+
+def search_url(operacion: str, estado: str, ciudad: Optional[str] = None) -> str:
+    url = SEARCH_URL_TEMPLATE.format(operacion=operacion, estado=estado)
+    if ciudad:
+        url += SEARCH_CITY_SEGMENT.format(ciudad=ciudad)
+    return url
+
+
+class Century21ListingCrawler:
+    """Drena las páginas "listing" del frontier y encola las fichas que encuentra."""
+
+    def __init__(self, frontier: UrlFrontier, fetcher: Optional[HttpFetcher] = None,
+                 concurrency: int = CRAWL_CONCURRENCY, max_pages: int = MAX_SEARCH_PAGES,
+                 delta: Optional[CardDeltaDetector] = None, rate_limiter: Optional[HostRateLimiter] = None):
+        self.frontier = frontier
+        self.fetcher = fetcher or HttpFetcher(max_connections=concurrency)
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.pages_crawled = 0
+        self.details_found = 0
+        self.details_new = 0
+        self.delta = delta
+        self.rate_limiter = rate_limiter
+        self._in_flight = 0
+        # IDs vistos en cada búsqueda durante este crawl: una página que no agrega ninguno es el
+        # final (o el sitio ignoró el parámetro de página y repite la misma)
+        self._seen_ids: dict[str, set[str]] = {}
+
+    def seed(self, operaciones: Iterable[str], estados: Iterable[str], ciudades: Iterable[Optional[str]] = (None,)) -> int:
+        """Encola la primera página de cada combinación; en un recrawl se vuelven a poner en pending."""
+        seeds = [
+            {"url": search_url(operacion, estado, ciudad), "kind": "listing", "priority": LISTING_PRIORITY}
+            for operacion in operaciones
+            for estado in estados
+            for ciudad in ciudades
+        ]
+        return self.frontier.add_many(seeds, requeue=True)
+
+    async def crawl_page(self, url: str) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        page = await self.fetcher.fetch(url)
+        if page.status != 200:
+            await asyncio.to_thread(self.frontier.mark_failed, url, f"status {page.status}")
+            return
+
+        number = page_number(url)
+        if self.delta is None:
+            links = extract_detail_links(page.html, page.final_url)
+            to_queue = links
+        else:
+            # Solo los anuncios nuevos o cambiados llegan al scraping de detalle
+            links = extract_listing_cards(page.html, page.final_url)
+            classified = await asyncio.to_thread(self.delta.classify, links) if links else []
+            to_queue = [{"url": card["url"]} for card, status in classified if status != "unchanged"]
+        for link in to_queue:
+            link.update(kind="detail", priority=-number)
+        # Con delta, un anuncio cambiado que ya estaba "done" vuelve a pending
+        new = await asyncio.to_thread(self.frontier.add_many, to_queue, self.delta is not None)
+        self.pages_crawled += 1
+        self.details_found += len(links)
+        self.details_new += new
+
+        # Una página sin fichas nuevas para esta búsqueda es el final: sin esto, si el sitio ignora
+        # ?pagina= se pedirían max_pages copias de la primera página
+        seen = self._seen_ids.setdefault(search_key(page.final_url), set())
+        page_ids = {link["property_id"] for link in links if link.get("property_id")}
+        new_ids = page_ids - seen
+        seen |= page_ids
+        if new_ids and number < self.max_pages:
+            next_url = next_page_url(page.html, page.final_url)
+            await asyncio.to_thread(
+                self.frontier.add_many,
+                [{"url": next_url, "kind": "listing", "priority": LISTING_PRIORITY - page_number(next_url)}],
+                True,
+            )
+        await asyncio.to_thread(self.frontier.mark_done, url)
+        if links and not new_ids:
+            logging.info(f"  -> {url}: ninguna ficha nueva para la búsqueda; fin de la paginación")
+        logging.info(f"  -> {url}: {len(links)} fichas ({new} nuevas)")
+
+    async def _worker(self) -> None:
+        while True:
+            # Cuenta como en curso desde antes del pop, para que otro worker no termine antes de tiempo
+            self._in_flight += 1
+            batch = await asyncio.to_thread(self.frontier.pop, "listing", 1)
+            if not batch:
+                self._in_flight -= 1
+                # Otra página en curso todavía puede encolar su siguiente página
+                if self._in_flight == 0:
+                    return
+                await asyncio.sleep(0.1)
+                continue
+            url = batch[0]["url"]
+            try:
+                await self.crawl_page(url)
+            except Exception as e:
+                logging.error(f"Error crawling {url}: {e}")
+                await asyncio.to_thread(self.frontier.mark_failed, url, str(e))
+            finally:
+                self._in_flight -= 1
+
+    async def run(self) -> dict:
+        """Crawlea hasta que no quedan páginas de resultados pendientes."""
+        async with self.fetcher:
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        stats = {
+            "pages_crawled": self.pages_crawled,
+            "details_found": self.details_found,
+            "details_new": self.details_new,
+            "frontier": self.frontier.stats(),
+        }
+        if self.delta is not None:
+            stats["delta"] = self.delta.stats()
+        if self.rate_limiter is not None:
+            stats["rate_limit"] = self.rate_limiter.stats()
+        logging.info(f"Crawl terminado: {stats}")
+        return stats
+
+
+async def crawl_main(args) -> None:
+    frontier = UrlFrontier(args.frontier)
+    rate_limiter = shared_rate_limiter()
+    try:
+        requeued = frontier.reset_in_progress("listing")
+        if requeued:
+            logging.info(f"{requeued} URLs de una ejecución anterior vuelven a pending")
+        delta = None
+        if args.delta:
+            from app.db.session import SessionLocal
+            delta = CardDeltaDetector(SessionLocal)
+        crawler = Century21ListingCrawler(frontier, concurrency=args.concurrency, max_pages=args.max_pages,
+                                          delta=delta, rate_limiter=rate_limiter)
+        crawler.seed(args.operacion, args.estado, args.ciudad or [None])
+        await crawler.run()
+    finally:
+        rate_limiter.close()
+        frontier.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Crawler de resultados de Century21 hacia el frontier")
+    parser.add_argument("--operacion", nargs="+", default=["venta", "renta"])
+    parser.add_argument("--estado", nargs="+", required=True)
+    parser.add_argument("--ciudad", nargs="*")
+    parser.add_argument("--frontier", default=FRONTIER_DB)
+    parser.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY)
+    parser.add_argument("--max-pages", type=int, default=MAX_SEARCH_PAGES)
+    parser.add_argument("--delta", action="store_true",
+                        help="Encolar solo anuncios nuevos o con precio/título distinto al guardado en Property "
+                             "(lo guarda `data_scraper frontier ... --store`)")
+    asyncio.run(crawl_main(parser.parse_args()))
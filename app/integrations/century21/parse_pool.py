@@ -0,0 +1,150 @@
+"""
+Etapa de parsing fuera del event loop para el scraper de Century21.
+
+`parse_property_html` es CPU puro; ejecutarlo dentro de `fetch_and_parse`
+bloquea el loop y detiene al resto de corrutinas de Playwright. `ParsePool`
+recibe el HTML como string y devuelve el dict ya parseado desde un pool de
+procesos (o de hilos), manteniendo los workers calientes entre lotes y
+registrando la profundidad de cola y la latencia de parsing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTORS = ("process", "thread")
+
+# Documento mínimo usado para calentar cada worker (imports, selectores y caches de regex)
+_WARM_UP_HTML = '<html><body><div id="detallePropiedad"><h1>warm-up</h1></div></body></html>'
+
+# Estado por worker: un scraper por proceso / por hilo
+_worker_state = threading.local()
+
+
+def _worker_init(parser_backend: str) -> None:
+    # Import diferido: data_scraper importa este módulo
+    from app.integrations.century21.data_scraper import Century21RobustScraper
+    _worker_state.scraper = Century21RobustScraper(1, parser_backend=parser_backend)
+
+
+def _worker_parse(html_content: str, url: str) -> tuple[dict, float]:
+    """Se ejecuta en el worker. Devuelve (datos, segundos de parsing)."""
+    start = time.perf_counter()
+    data = _worker_state.scraper.parse_property_html(html_content, url)
+    return data, time.perf_counter() - start
+
+
+def _worker_fingerprint(html_content: str) -> str:
+    # Import diferido, como en _worker_init
+    from app.integrations.century21.change_tracker import html_fingerprint
+    return html_fingerprint(html_content)
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ParsePool:
+    """Pool de workers para `parse_property_html` con métricas de cola y latencia."""
+
+    # Muestras de latencia conservadas para calcular percentiles
+    LATENCY_WINDOW = 1000
+
+    def __init__(self, workers: int, parser_backend: str = "bs4", executor: str = "process"):
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor debe ser uno de {EXECUTORS}, no '{executor}'")
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        self.workers = workers
+        self.parser_backend = parser_backend
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._latencies: deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+        self._parse_times: deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+
+    @property
+    def queue_depth(self) -> int:
+        """Páginas enviadas al pool que todavía no tienen resultado (en cola + en ejecución)."""
+        return self.submitted - self.completed - self.failed
+
+    async def start(self) -> None:
+        """Crea el executor (si no existe) y calienta todos los workers."""
+        if self._executor is not None:
+            return
+        executor_class = ProcessPoolExecutor if self.executor_kind == "process" else ThreadPoolExecutor
+        self._executor = executor_class(
+            max_workers=self.workers,
+            initializer=_worker_init,
+            initargs=(self.parser_backend,),
+        )
+        # Un envío por worker obliga al executor a levantar todos los procesos ahora
+        # y no en medio del scraping.
+        start = time.perf_counter()
+        warm_ups = [
+            asyncio.wrap_future(self._executor.submit(_worker_parse, _WARM_UP_HTML, "warm-up"))
+            for _ in range(self.workers)
+        ]
+        await asyncio.gather(*warm_ups)
+        logging.info(
+            f"ParsePool listo: {self.workers} workers ({self.executor_kind}, {self.parser_backend}) "
+            f"en {time.perf_counter() - start:.2f}s"
+        )
+
+    async def parse(self, html_content: str, url: str) -> dict:
+        if self._executor is None:
+            await self.start()
+        submitted_at = time.perf_counter()
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            data, parse_time = await asyncio.wrap_future(
+                self._executor.submit(_worker_parse, html_content, url)
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        self._latencies.append(time.perf_counter() - submitted_at)
+        self._parse_times.append(parse_time)
+        return data
+
+    async def fingerprint(self, html_content: str) -> str:
+        """Huella del fragmento de detalle (change_tracker.html_fingerprint) en un worker del pool."""
+        if self._executor is None:
+            await self.start()
+        return await asyncio.wrap_future(self._executor.submit(_worker_fingerprint, html_content))
+
+    def stats(self) -> dict:
+        """Métricas actuales del pool (latencias en milisegundos)."""
+        return {
+            "workers": self.workers,
+            "executor": self.executor_kind,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "latency_p50_ms": round(_percentile(self._latencies, 0.50) * 1000, 2),
+            "latency_p95_ms": round(_percentile(self._latencies, 0.95) * 1000, 2),
+            "parse_p50_ms": round(_percentile(self._parse_times, 0.50) * 1000, 2),
+            "parse_p95_ms": round(_percentile(self._parse_times, 0.95) * 1000, 2),
+        }
+
+    def close(self) -> None:
+        """Detiene los workers. El pool puede volver a arrancarse con `start()`."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
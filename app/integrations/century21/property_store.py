@@ -0,0 +1,122 @@
+"""
+Guardado de propiedades scrapeadas en la tabla Property.
+
+Cada anuncio se identifica por (source_platform, external_id), con el ID de
+Century21 de la URL como external_id. El guardado es un upsert (INSERT ... ON
+CONFLICT DO UPDATE en SQLite y PostgreSQL): si varios workers o nodos entregan el
+mismo anuncio, queda una sola fila con los datos más recientes.
+
+La clave del upsert en bases creadas antes de la restricción la agrega
+app.db.schema.ensure_property_key al arrancar.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import func, null
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.schema import PROPERTY_KEY
+from app.integrations.century21.card_delta import SOURCE_PLATFORM
+from app.integrations.century21.frontier import extract_property_id
+from app.models.database import Property
+
+# La clave del anuncio no se reescribe; created_at, is_published, etc. no vienen en los valores
+_KEEP_ON_UPDATE = {"source_platform", "external_id"}
+# Solo vienen si el scraper las pidió (with_images): un resultado sin ellas no borra las guardadas
+_KEEP_IF_MISSING = {"image_urls"}
+
+
+def _int_or_none(value) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def property_values(data: dict, source_platform: str = SOURCE_PLATFORM) -> dict:
+    """Columnas de Property a partir del dict de parse_property_html."""
+    address = data.get("direccion")
+    # La dirección termina en "..., Ciudad, Estado"
+    location = ", ".join(part.strip() for part in address.split(",")[-2:]) if address else None
+    now = datetime.datetime.utcnow()
+    return {
+        "title": data.get("titulo") or "",
+        "description": data.get("descripcion"),
+        "price": data.get("precio"),
+        "currency": data.get("moneda") or "MXN",
+        "property_type": data.get("tipo_propiedad"),
+        "listing_type": data.get("operacion"),
+        "bedrooms": _int_or_none(data.get("recámaras")),
+        "bathrooms": data.get("baños"),
+        "area": data.get("m²_construcción") or data.get("m²_terreno"),
+        "location": location,
+        "address": address,
+        "amenities": data.get("amenidades"),
+        "image_urls": data.get("imagenes"),
+        "source_url": data.get("url"),
+        "source_platform": source_platform,
+        "external_id": extract_property_id(data.get("url") or ""),
+        "scraped_at": now,
+        "updated_at": now,
+    }
+
+
+def upsert_properties(session_factory: Callable[[], Session], items: Iterable[dict],
+                      source_platform: str = SOURCE_PLATFORM) -> int:
+    """
+    Inserta o actualiza los resultados válidos (sin error, no "unchanged", con ID de propiedad).
+    Devuelve cuántas filas se escribieron.
+    """
+    rows: dict[str, dict] = {}
+    for item in items:
+        if "error" in item or item.get("unchanged"):
+            continue
+        values = property_values(item, source_platform)
+        if values["external_id"]:
+            # Dentro del lote gana el último resultado de cada anuncio
+            rows[values["external_id"]] = values
+    if not rows:
+        return 0
+
+    session = session_factory()
+    try:
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            # None en una columna JSON se guarda como 'null' de JSON; NULL de SQL para que el COALESCE lo ignore
+            values = [{column: null() if value is None and column in _KEEP_IF_MISSING else value
+                       for column, value in row.items()} for row in rows.values()]
+            statement = insert(Property).values(values)
+            set_ = {column: statement.excluded[column]
+                    for column in values[0] if column not in _KEEP_ON_UPDATE}
+            for column in _KEEP_IF_MISSING:
+                set_[column] = func.coalesce(statement.excluded[column], getattr(Property, column))
+            statement = statement.on_conflict_do_update(
+                index_elements=PROPERTY_KEY, set_=set_,
+            )
+            session.execute(statement)
+        else:
+            # Otros motores: consulta y actualiza fila por fila
+            existing = {
+                record.external_id: record
+                for record in session.query(Property)
+                .filter(Property.source_platform == source_platform)
+                .filter(Property.external_id.in_(list(rows)))
+            }
+            for external_id, values in rows.items():
+                record = existing.get(external_id)
+                if record is None:
+                    session.add(Property(**values))
+                    continue
+                for column, value in values.items():
+                    if column in _KEEP_ON_UPDATE or (column in _KEEP_IF_MISSING and value is None):
+                        continue
+                    setattr(record, column, value)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return len(rows)
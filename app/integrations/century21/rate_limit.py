@@ -0,0 +1,172 @@
+"""
+Rate limiting por host con token buckets compartidos entre procesos.
+
+Cada host tiene un bucket que se rellena a `rate_per_minute` y admite ráfagas de
+hasta `burst` requests; opcionalmente un segundo bucket limita el total por
+ventana larga (`window_requests` cada `window_seconds`). Un request toma un token
+de cada bucket aunque quede en deuda y espera lo que tarde en pagarla: no hay
+sondeo y los que llegan antes salen antes.
+
+Con `state_path` los buckets viven en un archivo SQLite pequeño y cada reserva es
+una transacción BEGIN IMMEDIATE, así que todos los procesos del host (workers de
+la cola, crawler, descargas de imágenes) comparten el mismo presupuesto: sumar
+workers no sube el ritmo contra el sitio. Sin `state_path` el estado es local al
+proceso.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter
+
+RATE_LIMIT_STATE = "./data/rate_limit.sqlite3"
+# Espera máxima por el lock del archivo de estado cuando otro proceso está reservando
+BUSY_TIMEOUT_SECONDS = 10
+
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    "century21_rate_limit_wait_seconds_total",
+    "Segundos de espera impuestos por el rate limiter, por host",
+    ["host"],
+)
+
+
+def default_burst(rate_per_minute: float) -> int:
+    """Ráfaga por defecto: lo que se rellena en 10 segundos (al menos 1)."""
+    return max(1, math.ceil(rate_per_minute / 6))
+
+
+def settings_rate() -> tuple[float, int]:
+    """
+    (scraper_rate_per_minute, ráfaga) de Settings; scraper_rate_burst=0 usa default_burst. Es el
+    valor por defecto de --rate-per-minute / --rate-burst del coordinador y los nodos.
+    """
+    # Import diferido: importar este módulo no debe exigir la configuración de la app
+    from app.config import settings
+    rate = settings.scraper_rate_per_minute
+    return rate, settings.scraper_rate_burst or default_burst(rate)
+
+
+def shared_rate_limiter() -> "HostRateLimiter":
+    """
+    Limiter de los comandos (scraper, crawler): un solo presupuesto para todos los procesos del
+    host, con el mismo ritmo que from_settings (todos rellenan el mismo bucket de RATE_LIMIT_STATE).
+    """
+    from app.config import settings
+    return HostRateLimiter.from_settings(settings)
+
+
+class HostRateLimiter:
+    """Token buckets por host; acquire(url) espera el turno del request."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None,
+                 window_requests: Optional[int] = None, window_seconds: Optional[float] = None,
+                 state_path: str | Path | None = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute debe ser mayor que 0")
+        # (nombre, tokens por segundo, capacidad)
+        self.buckets = [("rate", rate_per_minute / 60, burst or default_burst(rate_per_minute))]
+        if window_requests and window_seconds:
+            self.buckets.append(("window", window_requests / window_seconds, window_requests))
+        self.state_path = Path(state_path) if state_path else None
+        self._lock = threading.Lock()
+        self._local: dict[tuple[str, str], tuple[float, float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.state_path is not None:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.state_path), timeout=BUSY_TIMEOUT_SECONDS,
+                                         isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS buckets (
+                    host TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (host, bucket)
+                )"""
+            )
+        self.waited_seconds: dict[str, float] = {}
+        self.requests: dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings, state_path: str | Path | None = RATE_LIMIT_STATE) -> "HostRateLimiter":
+        """
+        scraper_rate_per_minute / scraper_rate_burst. Los rate_limit_* de Settings son límites de
+        la API propia y no se aplican al sitio scrapeado.
+        """
+        return cls(
+            settings.scraper_rate_per_minute,
+            burst=settings.scraper_rate_burst or None,
+            state_path=state_path,
+        )
+
+    def _take(self, buckets: dict[str, tuple[float, float]], now: float) -> tuple[dict[str, tuple[float, float]], float]:
+        """Rellena cada bucket hasta `now`, toma un token y devuelve el estado nuevo y la espera."""
+        updated, wait = {}, 0.0
+        for name, rate, capacity in self.buckets:
+            tokens, last = buckets.get(name, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - last) * rate) - 1
+            updated[name] = (tokens, now)
+            if tokens < 0:
+                wait = max(wait, -tokens / rate)
+        return updated, wait
+
+    def reserve(self, host: str) -> float:
+        """Reserva un request para `host`; devuelve cuántos segundos hay que esperar antes de hacerlo."""
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                current = {name: self._local[(host, name)] for name, _, _ in self.buckets if (host, name) in self._local}
+                updated, wait = self._take(current, now)
+                for name, state in updated.items():
+                    self._local[(host, name)] = state
+                return wait
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT bucket, tokens, updated_at FROM buckets WHERE host = ?", (host,)
+                ).fetchall()
+                updated, wait = self._take({name: (tokens, last) for name, tokens, last in rows}, now)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO buckets (host, bucket, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                    [(host, name, tokens, last) for name, (tokens, last) in updated.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    async def acquire(self, url: str) -> float:
+        """Espera el turno para pedir `url` a su host; devuelve los segundos esperados."""
+        host = urlsplit(url).netloc
+        if self._conn is None:
+            wait = self.reserve(host)
+        else:
+            wait = await asyncio.to_thread(self.reserve, host)
+        self.requests[host] = self.requests.get(host, 0) + 1
+        if wait > 0:
+            self.waited_seconds[host] = self.waited_seconds.get(host, 0.0) + wait
+            RATE_LIMIT_WAIT_SECONDS.labels(host).inc(wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            host: {"requests": count, "waited_s": round(self.waited_seconds.get(host, 0.0), 2)}
+            for host, count in self.requests.items()
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,88 @@
+"""
+Detector de "página lista" para el scraper de Century21.
+
+En lugar de esperar cada selector por separado con su propio timeout, una
+sola llamada a `page.evaluate` instala un MutationObserver que resuelve en
+cuanto están presentes todos los bloques que necesita el parser, o cuando el
+documento ya cargó y el DOM lleva `stable_ms` sin cambios (la sección no va
+a aparecer), con un tope de `timeout_ms`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from playwright.async_api import Page
+
+# Cada grupo es un selector CSS (con alternativas separadas por coma); la página está
+# lista cuando todos los grupos tienen al menos una coincidencia.
+EXTRACTION_TARGETS = (
+    # Encabezado (título / precio)
+    "h1, h6[class*='fs-3 fw-bold']",
+    # Descripción o bloques de características (my-1, my-2)
+    "p[class*='text-muted'][class*='white-space'], div[class*='my-1'], div[class*='my-2']",
+)
+READY_STABLE_MS = 500
+READY_TIMEOUT_MS = 8000
+
+READINESS_JS = """({ groups, stableMs, timeoutMs }) => new Promise((resolve) => {
+    const start = performance.now();
+    const missing = () => groups.filter((selector) => !document.querySelector(selector));
+    if (missing().length === 0) {
+        resolve({ reason: 'ready', missing: [] });
+        return;
+    }
+    let stableTimer = null;
+    let deadline = null;
+    // "Estable" solo cuenta con el documento cargado: antes puede faltar el render inicial
+    const onStable = () => {
+        if (document.readyState === 'complete') {
+            finish('stable');
+        } else {
+            window.addEventListener('load', armStable, { once: true });
+        }
+    };
+    const armStable = () => {
+        clearTimeout(stableTimer);
+        stableTimer = setTimeout(onStable, stableMs);
+    };
+    const observer = new MutationObserver(() => {
+        if (missing().length === 0) {
+            finish('ready');
+            return;
+        }
+        armStable();
+    });
+    function finish(reason) {
+        observer.disconnect();
+        clearTimeout(stableTimer);
+        clearTimeout(deadline);
+        resolve({ reason, missing: missing(), ms: performance.now() - start });
+    }
+    observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    armStable();
+    deadline = setTimeout(() => finish('timeout'), timeoutMs);
+})"""
+
+
+async def wait_until_ready(
+    page: Page,
+    groups: tuple[str, ...] = EXTRACTION_TARGETS,
+    stable_ms: int = READY_STABLE_MS,
+    timeout_ms: int = READY_TIMEOUT_MS,
+) -> dict:
+    """
+    Espera a que la página esté lista para extraer. Devuelve `reason` ("ready", "stable",
+    "timeout" o "error"), los grupos que siguen faltando y `wait_ms` medido desde Python.
+    """
+    start = time.perf_counter()
+    try:
+        result = await page.evaluate(
+            READINESS_JS, {"groups": list(groups), "stableMs": stable_ms, "timeoutMs": timeout_ms}
+        )
+    except Exception as e:
+        # p. ej. la página navegó (redirect por JS) mientras se evaluaba
+        result = {"reason": "error", "missing": list(groups), "error": str(e)}
+    result.pop("ms", None)
+    result["wait_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
@@ -0,0 +1,75 @@
+"""
+Bloqueo declarativo de sub-requests (imágenes, fuentes, CSS, media, analytics).
+
+Modos:
+    "cdp"    Network.setBlockedURLs en cada página: Chromium descarta los requests sin
+             pasar por Python. Es el modo por defecto.
+    "globs"  Un context.route() por patrón acotado: solo los requests que coinciden
+             (los que se abortan) llegan a Python. Sirve en cualquier navegador.
+    "python" El handler de Python para todos los requests (comportamiento anterior);
+             se conserva como referencia para los benchmarks.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Awaitable, Callable
+
+from playwright.async_api import BrowserContext, Page, Route
+
+REQUEST_BLOCKING_MODES = ("cdp", "globs", "python")
+
+BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",  # image
+    "css",  # stylesheet
+    "woff", "woff2", "ttf", "otf", "eot",  # font
+    "mp4", "webm", "mp3", "m4a", "ogg",  # media
+)
+BLOCKED_HOSTS = ("google-analytics", "googletagmanager", "facebook")
+
+# Patrones de CDP: '*' es comodín y el patrón debe cubrir la URL completa
+CDP_BLOCKED_URLS = [
+    *(f"*.{ext}" for ext in BLOCKED_EXTENSIONS),
+    *(f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS),
+    *(f"*{host}*" for host in BLOCKED_HOSTS),
+]
+
+# Globs de Playwright (mismo criterio que CDP_BLOCKED_URLS)
+_EXTENSIONS_GLOB = "{" + ",".join(BLOCKED_EXTENSIONS) + "}"
+ROUTE_BLOCKED_GLOBS = [
+    f"**/*.{_EXTENSIONS_GLOB}",
+    f"**/*.{_EXTENSIONS_GLOB}?*",
+    *(f"**/*{host}*/**" for host in BLOCKED_HOSTS),
+]
+
+
+async def _abort(route: Route) -> None:
+    await route.abort()
+
+
+async def setup_context(context: BrowserContext, mode: str,
+                        python_handler: Callable[[Route], Awaitable[None]]) -> None:
+    """Bloqueo a nivel de contexto (modos "globs" y "python")."""
+    if mode == "globs":
+        for pattern in ROUTE_BLOCKED_GLOBS:
+            await context.route(pattern, _abort)
+    elif mode == "python":
+        await context.route("**/*", python_handler)
+
+
+async def setup_page(context: BrowserContext, page: Page, mode: str) -> bool:
+    """
+    Bloqueo a nivel de página (modo "cdp"). Se llama una vez por página: la lista sigue
+    vigente en las navegaciones siguientes. Devuelve False si el navegador no habla CDP.
+    """
+    if mode != "cdp":
+        return True
+    try:
+        session = await context.new_cdp_session(page)
+        # setBlockedURLs solo se aplica con el dominio Network habilitado en la sesión
+        await session.send("Network.enable")
+        await session.send("Network.setBlockedURLs", {"urls": CDP_BLOCKED_URLS})
+        return True
+    except Exception as e:
+        logging.warning(f"No se pudo activar el bloqueo por CDP ({e}); la página no bloquea sub-requests")
+        return False
@@ -0,0 +1,235 @@
+"""
+Reintentos con backoff y circuit breaker por host para los fetches del scraper.
+
+Los errores se clasifican antes de reintentar: timeouts, errores de red y
+respuestas 408/429/5xx son transitorios y se reintentan con backoff exponencial
+con jitter (respetando Retry-After); un 404 o un error de parsing no mejora con
+otro intento. Cada host tiene un breaker: si la tasa de fallos transitorios de
+la ventana reciente se dispara, se deja de pedir a ese host durante un tiempo y
+luego se prueba con unos pocos requests (half-open) antes de reabrir el paso.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from prometheus_client import Counter, Gauge
+
+from app.integrations.century21.concurrency import THROTTLE_STATUSES
+
+# Intentos ante errores transitorios (timeouts, red, 429/5xx), con backoff exponencial y jitter;
+# los usan el scraper de fichas y el descargador de imágenes
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_REQUESTS = 10
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_OPEN_SECONDS = 30.0
+BREAKER_MAX_OPEN_SECONDS = 300.0
+BREAKER_HALF_OPEN_PROBES = 2
+
+RETRYABLE_STATUSES = THROTTLE_STATUSES | {408, 500}
+# Errores de red de Chromium que suelen resolverse solos
+RETRYABLE_NET_ERRORS = (
+    "net::ERR_CONNECTION", "net::ERR_TIMED_OUT", "net::ERR_NETWORK", "net::ERR_EMPTY_RESPONSE",
+    "net::ERR_NAME_NOT_RESOLVED", "net::ERR_INTERNET_DISCONNECTED", "net::ERR_HTTP2",
+    "Target page, context or browser has been closed",
+)
+
+RETRIES_TOTAL = Counter(
+    "century21_scraper_retries_total",
+    "Reintentos de fetch por tipo de error",
+    ["reason"],
+)
+CIRCUIT_STATE_GAUGE = Gauge(
+    "century21_scraper_circuit_state",
+    "Estado del circuit breaker por host (0 cerrado, 1 half-open, 2 abierto)",
+    ["host"],
+)
+CIRCUIT_OPENED_TOTAL = Counter(
+    "century21_scraper_circuit_opened_total",
+    "Veces que se abrió el circuit breaker de un host",
+    ["host"],
+)
+
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class RetryableStatusError(Exception):
+    """Respuesta HTTP transitoria (429/5xx); lleva el Retry-After si el servidor lo envió."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"status {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos de un header Retry-After (número o fecha HTTP)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    "throttled" (el host pide bajar el ritmo), "transient" (timeout o red) o "permanent".
+    Solo los dos primeros se reintentan y cuentan para el breaker.
+    """
+    if isinstance(error, RetryableStatusError):
+        return "throttled" if error.status in THROTTLE_STATUSES else "transient"
+    if isinstance(error, (PlaywrightTimeoutError, httpx.TimeoutException, asyncio.TimeoutError)):
+        return "transient"
+    if isinstance(error, httpx.TransportError):
+        return "transient"
+    if isinstance(error, PlaywrightError) and any(marker in str(error) for marker in RETRYABLE_NET_ERRORS):
+        return "transient"
+    return "permanent"
+
+
+def is_retryable(kind: Optional[str]) -> bool:
+    return kind in ("throttled", "transient")
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY,
+                  retry_after: Optional[float] = None) -> float:
+    """Full jitter: aleatorio entre 0 y base·2^(intento-1) (tope `cap`), nunca menos que Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Breaker de un host. Cerrado: pasa todo y se mide la tasa de fallos de los últimos
+    `window` requests. Abierto: nadie pasa hasta que vence la pausa. Half-open: pasan
+    `half_open_probes` requests de prueba; si todos salen bien se cierra, si alguno
+    falla se vuelve a abrir con el doble de pausa (hasta `max_open_seconds`).
+    """
+
+    def __init__(self, host: str, window: int = BREAKER_WINDOW, min_requests: int = BREAKER_MIN_REQUESTS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS, half_open_probes: int = BREAKER_HALF_OPEN_PROBES):
+        self.host = host
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.base_open_seconds = open_seconds
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._results: deque[bool] = deque(maxlen=window)
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._changed = asyncio.Condition()
+        CIRCUIT_STATE_GAUGE.labels(host).set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        logging.warning(f"Circuit breaker {self.host}: {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE_GAUGE.labels(self.host).set(_STATE_VALUES[state])
+        if state == "open":
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            CIRCUIT_OPENED_TOTAL.labels(self.host).inc()
+        elif state == "half_open":
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        else:
+            self._results.clear()
+            self.open_seconds = self.base_open_seconds
+
+    async def acquire(self) -> bool:
+        """
+        Espera hasta que el host acepte un request. Devuelve True si el request es una
+        prueba half-open (y debe reportarse con release()).
+        """
+        async with self._changed:
+            while True:
+                if self.state == "closed":
+                    return False
+                if self.state == "open":
+                    remaining = self.opened_at + self.open_seconds - time.monotonic()
+                    if remaining <= 0:
+                        self._set_state("half_open")
+                        self._changed.notify_all()
+                        continue
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                # half_open: solo unas pocas pruebas a la vez; el resto espera el veredicto
+                if self._probes_started < self.half_open_probes:
+                    self._probes_started += 1
+                    return True
+                await self._changed.wait()
+
+    async def release(self, ok: bool, probe: bool) -> None:
+        """Registra el resultado de un request que pasó por acquire()."""
+        async with self._changed:
+            if probe and self.state == "half_open":
+                if not ok:
+                    # La pausa crece mientras el host siga caído
+                    self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+                    self._set_state("open")
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_probes:
+                        self._set_state("closed")
+                self._changed.notify_all()
+                return
+            if self.state != "closed":
+                return
+            self._results.append(ok)
+            failures = self._results.count(False)
+            if len(self._results) >= self.min_requests and failures / len(self._results) >= self.failure_rate:
+                self._set_state("open")
+                self._changed.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "times_opened": self.times_opened,
+            "recent_failure_rate": round(self._results.count(False) / len(self._results), 3) if self._results else 0.0,
+        }
+
+
+class HostCircuitBreakers:
+    """Un CircuitBreaker por host, creado al primer request."""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host, **self.breaker_options)
+        return breaker
+
+    def stats(self) -> dict:
+        return {host: breaker.stats() for host, breaker in self._breakers.items()}
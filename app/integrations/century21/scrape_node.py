@@ -0,0 +1,130 @@
+"""
+Nodo de scraping para correr el mismo lote en varias máquinas.
+
+Dos formas de repartir el trabajo:
+
+- Cola compartida: todos los nodos apuntan al coordinador (`--coordinator`) y
+  reservan trabajos de la misma cola; si un nodo muere, sus trabajos vuelven a
+  pending al vencer el lease y los toma otro.
+- Sharding determinista: sin coordinador, cada nodo encola en su propia cola
+  (`--queue-db`) solo las URLs que el anillo de hashing consistente le asigna
+  (`--node-id` dentro de `--nodes`). No hay nada compartido salvo la base de datos;
+  un nodo caído retoma su parte al reiniciarse.
+
+En ambos casos, con `--database-url` los resultados se guardan por upsert en la
+tabla Property, así que un trabajo repetido no duplica filas.
+
+El presupuesto por host (`--rate-per-minute`) es para todo el lote: con
+coordinador cada request pide su turno al coordinador; con sharding cada nodo
+usa la parte que le toca (el ritmo dividido entre el número de nodos).
+
+    python -m app.integrations.century21.scrape_node --batch lote1 --coordinator http://coord:8765 \\
+        --urls urls.txt --database-url postgresql://... --fetch-mode http_first
+    python -m app.integrations.century21.scrape_node --batch lote1 --nodes a,b,c --node-id b \\
+        --queue-db ./data/jobs_b.sqlite3 --urls urls.txt --database-url sqlite:///./data/app.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.schema import ensure_property_key
+from app.integrations.century21.coordinator import (
+    COORDINATOR_TOKEN_ENV, RemoteJobQueue, RemoteRateLimiter, default_token,
+)
+from app.integrations.century21.data_scraper import FETCH_MODE, FETCH_MODES, jobs_main
+from app.integrations.century21.card_delta import SOURCE_PLATFORM
+from app.integrations.century21.job_queue import JOB_QUEUE_DB, ScrapeJobQueue, start_scraping_session
+from app.integrations.century21.rate_limit import (
+    RATE_LIMIT_STATE, HostRateLimiter, settings_rate,
+)
+from app.integrations.century21.sharding import HashRing
+from app.models.database import Base
+
+# Varios nodos escribiendo el mismo archivo SQLite esperan el lock en lugar de fallar
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+def session_factory_for(database_url: str):
+    """sessionmaker para `database_url`, creando las tablas si no existen (y la clave del upsert)."""
+    connect_args = {"timeout": SQLITE_BUSY_TIMEOUT_SECONDS} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    ensure_property_key(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def shard_rate_limiter(rate_per_minute: float, burst: int, nodes: int,
+                       state_path: str | None = RATE_LIMIT_STATE) -> HostRateLimiter:
+    """La parte de un nodo del presupuesto por host cuando `nodes` nodos se reparten el sitio."""
+    return HostRateLimiter(rate_per_minute / nodes, max(1, burst // nodes), state_path=state_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Nodo de scraping de Century21 sobre una cola de trabajos")
+    parser.add_argument("--batch", required=True, help="Nombre del lote")
+    parser.add_argument("--coordinator", help="URL del coordinador (cola compartida entre nodos)")
+    parser.add_argument("--coordinator-token", default=default_token(),
+                        help=f"Token del coordinador (por defecto ${COORDINATOR_TOKEN_ENV})")
+    parser.add_argument("--queue-db", default=JOB_QUEUE_DB, help="Cola local si no hay coordinador")
+    parser.add_argument("--urls", help="Archivo con URLs a encolar (una por línea)")
+    parser.add_argument("--nodes", help="Nodos del anillo separados por comas (sharding determinista)")
+    parser.add_argument("--node-id", help="Nombre de este nodo en --nodes")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default=FETCH_MODE)
+    parser.add_argument("--database-url", help="Base de datos donde guardar las propiedades (upsert)")
+    parser.add_argument("--output", default="properties.jsonl")
+    parser.add_argument("--session-id", type=int,
+                        help="ScrapingSession del lote: se actualizan sus conteos (requiere --database-url)")
+    parser.add_argument("--new-session", action="store_true",
+                        help="Crea un ScrapingSession para el lote e imprime su id para los demás nodos")
+    rate_per_minute, rate_burst = settings_rate()
+    parser.add_argument("--rate-per-minute", type=float, default=rate_per_minute,
+                        help="Requests por minuto a cada host sumando todos los nodos, sin coordinador "
+                             "(por defecto scraper_rate_per_minute)")
+    parser.add_argument("--rate-burst", type=int, default=rate_burst)
+    args = parser.parse_args()
+
+    shard = None
+    node_count = 1
+    if args.nodes:
+        if not args.node_id:
+            parser.error("--nodes requiere --node-id")
+        ring = HashRing([node.strip() for node in args.nodes.split(",") if node.strip()])
+        shard = (ring, args.node_id)
+        node_count = len(ring.nodes)
+
+    if (args.session_id or args.new_session) and not args.database_url:
+        parser.error("--session-id y --new-session requieren --database-url")
+    if (args.session_id or args.new_session) and args.nodes:
+        # Cada nodo del anillo solo ve su propia cola: sus conteos pisarían los de los demás
+        parser.error("--session-id y --new-session necesitan una cola única (--coordinator), no --nodes")
+    session_factory = session_factory_for(args.database_url) if args.database_url else None
+    scraping_session_id = args.session_id
+    if args.new_session:
+        scraping_session_id = start_scraping_session(session_factory, SOURCE_PLATFORM, args.urls)
+        print(f"ScrapingSession {scraping_session_id} (pasar --session-id {scraping_session_id} a los demás nodos)")
+    if args.coordinator:
+        queue = RemoteJobQueue(args.coordinator, token=args.coordinator_token)
+    else:
+        queue = ScrapeJobQueue(args.queue_db)
+    if args.coordinator and queue.rate_limited:
+        rate_limiter = RemoteRateLimiter(args.coordinator, token=args.coordinator_token)
+    else:
+        if args.coordinator:
+            logging.warning("El coordinador no reparte turnos de rate limit: este nodo usa el presupuesto completo")
+        rate_limiter = shard_rate_limiter(args.rate_per_minute, args.rate_burst, node_count)
+    try:
+        asyncio.run(jobs_main(queue, args.batch, args.output, args.urls, shard=shard,
+                              session_factory=session_factory, fetch_mode=args.fetch_mode,
+                              rate_limiter=rate_limiter, scraping_session_id=scraping_session_id))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Reparto determinista de URLs entre nodos con hashing consistente.
+
+Cada nodo ocupa `vnodes` puntos de un anillo de hashes y una URL pertenece al
+primer punto a partir del hash de su clave. La clave es la del frontier (el ID de
+propiedad en las fichas), así que dos URLs del mismo anuncio caen en el mismo nodo.
+Agregar o quitar un nodo solo mueve ~1/N de las URLs.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+from typing import Iterable, Iterator, Sequence
+
+from app.integrations.century21.frontier import frontier_key
+
+VNODES_PER_NODE = 128
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Anillo de hashing consistente sobre los nombres de los nodos."""
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = VNODES_PER_NODE):
+        if not nodes:
+            raise ValueError("HashRing necesita al menos un nodo")
+        if len(set(nodes)) != len(nodes):
+            raise ValueError("Los nombres de los nodos deben ser únicos")
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, url: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(frontier_key(url))) % len(self._hashes)
+        return self._owners[index]
+
+    def shard(self, urls: Iterable[str], node: str) -> Iterator[str]:
+        """Las URLs de `urls` que le tocan a `node`, sin cargar la entrada completa en memoria."""
+        if node not in self.nodes:
+            raise ValueError(f"'{node}' no es un nodo del anillo {self.nodes}")
+        return (url for url in urls if self.node_for(url) == node)
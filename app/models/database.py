@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -13,6 +13,8 @@ class Property(Base):
     """Model for storing property information."""
     
     __tablename__ = "properties"
+    # Un anuncio por plataforma: permite el upsert desde varios workers sin duplicados
+    __table_args__ = (UniqueConstraint("source_platform", "external_id", name="uq_properties_source_external_id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
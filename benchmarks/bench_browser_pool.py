@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the Century21 browser pool.
+
+Serves the corpus from a local HTTP server (no external network) and runs
+the full fetch + parse path with an increasing number of Chromium processes:
+
+    python -m benchmarks.bench_browser_pool --browsers 1 2 4 --pages 200
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from app.integrations.century21.data_scraper import Century21RobustScraper
+from benchmarks.bench_parser import CORPUS_DIR
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_corpus() -> ThreadingHTTPServer:
+    """Start a threaded HTTP server for the corpus directory on a free local port."""
+    handler = functools.partial(_QuietHandler, directory=str(CORPUS_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def corpus_urls(base_url: str, pages: int) -> list[str]:
+    """`pages` URLs cycling over the corpus; a query string keeps them distinct."""
+    names = sorted(path.name for path in CORPUS_DIR.glob("*.html"))
+    return [f"{base_url}/{names[i % len(names)]}?n={i}" for i in range(pages)]
+
+
+async def bench_browsers(browsers: int, contexts_per_browser: int, concurrency: int, urls: list[str]) -> dict:
+    scraper = Century21RobustScraper(
+        concurrency,
+        parser_backend="lxml",
+        browsers=browsers,
+        contexts_per_browser=contexts_per_browser,
+    )
+    try:
+        start = time.perf_counter()
+        results = await scraper.run(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.close()
+    failed = sum(1 for item in results if "error" in item)
+    return {"pages_per_sec": len(urls) / elapsed, "failed": failed}
+
+
+async def run_benchmark(args) -> bool:
+    server = serve_corpus()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = corpus_urls(base_url, args.pages)
+    logger.info(f"Serving corpus at {base_url}; {len(urls)} pages, concurrency {args.concurrency}")
+
+    ok = True
+    try:
+        for browsers in args.browsers:
+            result = await bench_browsers(browsers, args.contexts, args.concurrency, urls)
+            logger.info(
+                f"{browsers} browser(s) × {args.contexts} context(s): "
+                f"{result['pages_per_sec']:8.1f} pages/sec ({result['failed']} failed)"
+            )
+            ok = ok and result["failed"] == 0
+    finally:
+        server.shutdown()
+    return ok
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the Century21 browser pool")
+    parser.add_argument("--browsers", type=int, nargs="+", default=[1, 2, 4], help="Chromium process counts to compare")
+    parser.add_argument("--contexts", type=int, default=1, help="Contexts per browser")
+    parser.add_argument("--concurrency", type=int, default=16, help="Pages in flight")
+    parser.add_argument("--pages", type=int, default=200, help="Pages per run")
+    args = parser.parse_args()
+    return asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Image normalization before the Facebook upload: bytes and time saved.
+
+Generates photo-sized JPEGs (the stand-in site's renderer, at camera-like
+resolution) for a number of listings, runs them through
+app.integrations.century21.image_normalizer.ImageNormalizer and reports MB per
+listing before and after, normalization time per listing and a second, cached
+run. The upload time saved is modelled from the bytes saved and --uplink-mbps;
+it is not a measured Facebook upload:
+
+    python -m benchmarks.bench_image_normalize --listings 10 --photos 20
+    python -m benchmarks.bench_image_normalize --target-kb 300 --uplink-mbps 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.integrations.century21.image_normalizer import (
+    NORMALIZE_MAX_EDGE, NORMALIZE_QUALITY, ImageNormalizer,
+)
+from benchmarks.standin_site import render_jpeg
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def write_listings(root: Path, listings: int, photos: int, edge: int) -> list[list[Path]]:
+    """listings x photos distinct JPEGs; the sources differ so nothing is served from cache."""
+    paths = []
+    for listing in range(listings):
+        listing_dir = root / f"listing_{listing}"
+        listing_dir.mkdir(parents=True)
+        paths.append([])
+        for photo in range(photos):
+            path = listing_dir / f"image_{photo}.jpg"
+            path.write_bytes(render_jpeg(listing * photos + photo, edge))
+            paths[-1].append(path)
+    return paths
+
+
+async def normalize_listings(normalizer: ImageNormalizer, listings: list[list[Path]]) -> list[dict]:
+    stats = []
+    for sources in listings:
+        _, listing_stats = await normalizer.normalize_all(sources)
+        stats.append(listing_stats)
+    return stats
+
+
+def upload_seconds(mb: float, uplink_mbps: float) -> float:
+    return mb * 2 ** 20 * 8 / (uplink_mbps * 1e6)
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Image normalization: MB and modelled upload time per listing")
+    parser.add_argument("--listings", type=int, default=10)
+    parser.add_argument("--photos", type=int, default=20, help="photos per listing")
+    parser.add_argument("--edge", type=int, default=4000, help="long edge of the generated photos (px)")
+    parser.add_argument("--max-edge", type=int, default=NORMALIZE_MAX_EDGE)
+    parser.add_argument("--quality", type=int, default=NORMALIZE_QUALITY)
+    parser.add_argument("--target-kb", type=int, default=0, help="per-image size target (0 = fixed quality)")
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0, help="uplink used to model the upload time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        listings = write_listings(root / "sources", args.listings, args.photos, args.edge)
+        logger.info(f"Generated {args.listings} x {args.photos} photos at {args.edge}px in {time.perf_counter() - start:.1f}s")
+
+        normalizer = ImageNormalizer(root / "normalized", max_edge=args.max_edge, quality=args.quality,
+                                     target_bytes=args.target_kb * 1024, workers=args.workers)
+        try:
+            first = asyncio.run(normalize_listings(normalizer, listings))
+            cached = asyncio.run(normalize_listings(normalizer, listings))
+        finally:
+            normalizer.close()
+
+    failed = sum(stats["failed"] for stats in first)
+    mb_in = statistics.mean(stats["mb_in"] for stats in first)
+    mb_out = statistics.mean(stats["mb_out"] for stats in first)
+    seconds = statistics.mean(stats["seconds"] for stats in first)
+    cached_seconds = statistics.mean(stats["seconds"] for stats in cached)
+    upload_before = upload_seconds(mb_in, args.uplink_mbps)
+    upload_after = upload_seconds(mb_out, args.uplink_mbps)
+
+    logger.info(f"Workers: {normalizer.workers}, max edge {args.max_edge}px, quality {args.quality}, "
+                f"target {args.target_kb or '-'} KB")
+    logger.info(f"Per listing: {mb_in:.2f} MB -> {mb_out:.2f} MB ({100 * (1 - mb_out / mb_in):.1f}% smaller)")
+    logger.info(f"Normalization: {seconds:.2f}s/listing, cached rerun {cached_seconds:.3f}s/listing "
+                f"({sum(stats['cached'] for stats in cached)} of {args.listings * args.photos} from cache)")
+    logger.info(f"Modelled upload at {args.uplink_mbps:g} Mbit/s: {upload_before:.1f}s -> {upload_after:.1f}s per listing "
+                f"(saves {upload_before - upload_after:.1f}s; bytes x 8 / uplink, not a measured Facebook upload)")
+    if failed:
+        logger.error(f"{failed} images failed to normalize")
+    return failed == 0 and all(stats["cached"] == stats["images"] for stats in cached)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Gallery image URL extraction: DOM read vs keypress walk, on the stand-in site.
+
+Runs app.integrations.century21.image_scraper.extract_image_urls over the same
+fixture detail pages in each mode and reports ms/page, gallery images the
+browser downloaded per page (counted by the stand-in server) and whether both
+modes found the same photos (requires Chromium):
+
+    python -m benchmarks.bench_image_urls --pages 20
+    python -m benchmarks.bench_image_urls --pages 20 --no-gallery-json   # DOM mode has to fall back
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import multiprocessing
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from playwright.async_api import async_playwright
+
+from app.integrations.century21.image_scraper import IMAGE_URL_MODES, extract_image_urls
+from benchmarks.bench_scraper_load import free_port, percentile, wait_for_site
+from benchmarks.standin_site import add_site_arguments, detail_urls, serve
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _serve_process(args) -> None:
+    asyncio.run(serve(args))
+
+
+def filenames(urls: list[str]) -> set[str]:
+    return {urlsplit(url).path.split("/")[-1] for url in urls}
+
+
+async def image_requests(client: httpx.AsyncClient, base_url: str) -> int:
+    return (await client.get(f"{base_url}/__stats")).json().get("image_requests", 0)
+
+
+async def run_mode(browser, client: httpx.AsyncClient, base_url: str, urls: list[str], mode: str) -> dict:
+    timings, found = [], {}
+    images_before = await image_requests(client, base_url)
+    for url in urls:
+        context = await browser.new_context()
+        page = await context.new_page()
+        start = time.perf_counter()
+        try:
+            # The scraper prints its progress per page; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                found[url] = await extract_image_urls(page, url, mode=mode)
+        finally:
+            timings.append(time.perf_counter() - start)
+            await context.close()
+    images = await image_requests(client, base_url) - images_before
+    return {"timings": timings, "found": found, "images_per_page": images / len(urls)}
+
+
+async def compare(args, base_url: str) -> bool:
+    urls = detail_urls(base_url, args.pages)
+    results = {}
+    async with async_playwright() as p, httpx.AsyncClient() as client:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            for mode in IMAGE_URL_MODES:
+                results[mode] = await run_mode(browser, client, base_url, urls, mode)
+        finally:
+            await browser.close()
+
+    for mode, result in results.items():
+        timings = result["timings"]
+        photos = statistics.mean(len(found) for found in result["found"].values())
+        logger.info(
+            f"{mode:>8}: {statistics.mean(timings) * 1000:,.0f} ms/page "
+            f"(p50 {percentile(timings, 0.5) * 1000:,.0f}, p95 {percentile(timings, 0.95) * 1000:,.0f}), "
+            f"{photos:.1f} photos/page, {result['images_per_page']:.1f} images downloaded/page"
+        )
+    dom, keypress = results["dom"], results["keypress"]
+    speedup = statistics.mean(keypress["timings"]) / statistics.mean(dom["timings"])
+    logger.info(f"DOM extraction is {speedup:.1f}x faster than the keypress walk")
+
+    mismatches = [url for url in urls if filenames(dom["found"][url]) != filenames(keypress["found"][url])]
+    for url in mismatches[:5]:
+        logger.error(f"Different photos for {url}: dom {len(dom['found'][url])}, keypress {len(keypress['found'][url])}")
+    return not mismatches
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Gallery image URL extraction: DOM read vs keypress walk")
+    parser.add_argument("--pages", type=int, default=20)
+    add_site_arguments(parser)
+    parser.set_defaults(latency="fixed", latency_ms=50.0)
+    args = parser.parse_args()
+
+    args.host, args.port = "127.0.0.1", free_port()
+    server = multiprocessing.Process(target=_serve_process, args=(args,), daemon=True)
+    server.start()
+    base_url = f"http://{args.host}:{args.port}"
+    try:
+        asyncio.run(wait_for_site(base_url))
+        return asyncio.run(compare(args, base_url))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Multi-node scraping against the local stand-in site.
+
+Runs N scrape nodes (separate processes, http_first fetch mode) over one batch
+of detail URLs, in either distribution mode:
+
+- coordinator: a coordinator process owns the job queue and every node claims
+  from it. One node is killed (SIGKILL) mid-run; its leases expire and the
+  other nodes pick its jobs up.
+- sharded: each node enqueues only its hash-ring shard into its own queue file.
+  One node is killed mid-run and restarted; it resumes its own shard.
+
+The batch also contains a second URL (different slug) for some properties, and
+all nodes upsert into one SQLite Property table. The per-host rate budget is
+for the whole batch: the coordinator hands out the rate tokens, and sharded
+nodes each take 1/N of it (each with its own state file, as on separate
+machines). The run passes when every job ends done, the table holds exactly one
+row per property and the stand-in site saw no more than the budget:
+
+    python -m benchmarks.bench_multinode --mode coordinator --nodes 3 --pages 300
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from aiohttp import web
+from sqlalchemy import create_engine, func, select
+
+from app.integrations.century21 import data_scraper
+from app.integrations.century21.coordinator import RemoteJobQueue, RemoteRateLimiter, create_app
+from app.integrations.century21.job_queue import JOB_STATES, ScrapeJobQueue
+from app.integrations.century21.rate_limit import HostRateLimiter
+from app.integrations.century21.scrape_node import session_factory_for, shard_rate_limiter
+from app.integrations.century21.sharding import HashRing
+from app.models.database import Property
+from benchmarks.bench_scraper_load import free_port, wait_for_site
+from benchmarks.standin_site import add_site_arguments, detail_urls, serve
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH = "bench"
+# Short leases so a killed node's jobs come back within the run
+LEASE_SECONDS = 5.0
+# One extra URL per this many properties, same ID with another slug
+DUPLICATE_EVERY = 10
+
+
+def _serve_site(args) -> None:
+    asyncio.run(serve(args))
+
+
+def burst_for(rate_per_minute: float) -> int:
+    return max(1, int(rate_per_minute / 60))
+
+
+def _serve_coordinator(queue_db: str, port: int, rate_per_minute: float) -> None:
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+    rate_limiter = HostRateLimiter(rate_per_minute, burst_for(rate_per_minute))
+    web.run_app(create_app(ScrapeJobQueue(queue_db, lease_seconds=LEASE_SECONDS), rate_limiter),
+                host="127.0.0.1", port=port, print=None)
+
+
+def _run_node(node: str, workdir: str, urls_path: str, database_url: str, coordinator: str | None,
+              nodes: list[str] | None, rate_per_minute: float) -> None:
+    """One scrape node: the same calls as app.integrations.century21.scrape_node."""
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if coordinator:
+        queue = RemoteJobQueue(coordinator, worker_id=f"{node}:{os.getpid()}")
+        rate_limiter = RemoteRateLimiter(coordinator)
+    else:
+        queue = ScrapeJobQueue(os.path.join(workdir, f"jobs_{node}.sqlite3"), lease_seconds=LEASE_SECONDS)
+        # One state file per node: nothing is shared between machines
+        rate_limiter = shard_rate_limiter(rate_per_minute, burst_for(rate_per_minute), len(nodes),
+                                          state_path=os.path.join(workdir, f"rate_limit_{node}.sqlite3"))
+    shard = (HashRing(nodes), node) if nodes else None
+    try:
+        asyncio.run(data_scraper.jobs_main(
+            queue, BATCH, os.path.join(workdir, f"{node}.jsonl"), urls_path, shard=shard,
+            session_factory=session_factory_for(database_url), fetch_mode="http_first",
+            rate_limiter=rate_limiter,
+        ))
+    finally:
+        queue.close()
+
+
+def start_node(node: str, *args) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=_run_node, args=(node, *args), name=node)
+    process.start()
+    return process
+
+
+def batch_stats(workdir: str, coordinator: str | None, nodes: list[str]) -> dict:
+    if coordinator:
+        queue = RemoteJobQueue(coordinator)
+        try:
+            return queue.stats(BATCH)
+        finally:
+            queue.close()
+    total = {state: 0 for state in JOB_STATES}
+    for node in nodes:
+        queue = ScrapeJobQueue(os.path.join(workdir, f"jobs_{node}.sqlite3"))
+        try:
+            for state, count in queue.stats(BATCH).items():
+                total[state] += count
+        finally:
+            queue.close()
+    return total
+
+
+async def wait_for_coordinator(coordinator: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(f"{coordinator}/config")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+def detail_requests(base_url: str) -> int:
+    return httpx.get(f"{base_url}/__stats").json().get("detail_requests", 0)
+
+
+def run(args, base_url: str, workdir: str) -> bool:
+    urls = detail_urls(base_url, args.pages)
+    duplicates = [url.rsplit("_", 1)[0] + "_duplicado" for url in urls[::DUPLICATE_EVERY]]
+    urls_path = os.path.join(workdir, "urls.txt")
+    Path(urls_path).write_text("\n".join(urls + duplicates) + "\n", encoding="utf-8")
+    database_url = f"sqlite:///{os.path.join(workdir, 'properties.db')}"
+    nodes = [f"node{i}" for i in range(1, args.nodes + 1)]
+    # Schema first: nodes starting together would race on CREATE TABLE
+    session_factory_for(database_url).kw["bind"].dispose()
+
+    coordinator, coordinator_process = None, None
+    if args.mode == "coordinator":
+        port = free_port()
+        coordinator = f"http://127.0.0.1:{port}"
+        coordinator_process = multiprocessing.Process(
+            target=_serve_coordinator, args=(os.path.join(workdir, "jobs.sqlite3"), port, args.rate_per_minute),
+            daemon=True)
+        coordinator_process.start()
+        asyncio.run(wait_for_coordinator(coordinator))
+        # The batch is enqueued once, before any node starts claiming
+        queue = RemoteJobQueue(coordinator)
+        queue.enqueue(BATCH, urls + duplicates)
+        queue.close()
+
+    node_args = (workdir, None if coordinator else urls_path, database_url, coordinator,
+                 None if coordinator else nodes, args.rate_per_minute)
+    requests_before = detail_requests(base_url)
+    start = time.perf_counter()
+    processes = {node: start_node(node, *node_args) for node in nodes}
+    try:
+        time.sleep(args.kill_after)
+        victim = nodes[-1]
+        logger.info(f"Killing {victim} (pid {processes[victim].pid}) after {args.kill_after:.1f}s")
+        processes[victim].kill()
+        processes[victim].join()
+        if args.mode == "sharded":
+            # Nobody else owns this shard: the node comes back and resumes from its queue file
+            processes[victim] = start_node(victim, *node_args)
+        else:
+            del processes[victim]
+        for process in processes.values():
+            process.join()
+        elapsed = time.perf_counter() - start
+        requests = detail_requests(base_url) - requests_before
+        stats = batch_stats(workdir, coordinator, nodes)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.kill()
+        if coordinator_process is not None:
+            coordinator_process.terminate()
+            coordinator_process.join()
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        rows = connection.scalar(select(func.count()).select_from(Property))
+        distinct = connection.scalar(select(func.count(func.distinct(Property.external_id))))
+    engine.dispose()
+    written = {
+        node: sum(1 for _ in open(os.path.join(workdir, f"{node}.jsonl"), encoding="utf-8"))
+        for node in nodes if os.path.exists(os.path.join(workdir, f"{node}.jsonl"))
+    }
+    total_jobs = len(urls) + len(duplicates)
+
+    logger.info(f"Mode {args.mode}: {total_jobs} jobs on {args.nodes} nodes in {elapsed:.1f}s "
+                f"({total_jobs / elapsed * 60:,.0f} pages/min)")
+    logger.info(f"Queue: {stats}")
+    logger.info(f"Results written per node: {written}")
+    logger.info(f"Property table: {rows} rows, {distinct} distinct IDs, {args.pages} properties expected")
+    # Every token of the budget plus the initial burst (the killed node's share counts too)
+    allowed = args.rate_per_minute / 60 * elapsed + burst_for(args.rate_per_minute) * (1 if coordinator else 2)
+    logger.info(f"Site saw {requests} detail requests ({requests / elapsed * 60:,.0f}/min, "
+                f"budget {args.rate_per_minute:,.0f}/min for all nodes)")
+    ok = stats["done"] == total_jobs and rows == distinct == args.pages
+    if not ok:
+        logger.error("Multi-node run did not converge to one row per property with every job done")
+    if requests > allowed:
+        logger.error(f"Nodes exceeded the shared per-host budget: {requests} requests, {allowed:,.0f} allowed")
+    return ok and requests <= allowed
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Multi-node scraping benchmark against the stand-in site")
+    parser.add_argument("--mode", choices=("coordinator", "sharded"), default="coordinator")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--kill-after", type=float, default=3.0, help="Seconds before killing the last node")
+    parser.add_argument("--rate-per-minute", type=float, default=3000.0, help="Per-host budget shared by all nodes")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+    if args.nodes < 2:
+        parser.error("--nodes must be at least 2")
+
+    args.host, args.port = "127.0.0.1", free_port()
+    server = multiprocessing.Process(target=_serve_site, args=(args,), daemon=True)
+    server.start()
+    base_url = f"http://{args.host}:{args.port}"
+    try:
+        asyncio.run(wait_for_site(base_url))
+        with tempfile.TemporaryDirectory(prefix="bench_multinode_") as workdir:
+            return run(args, base_url, workdir)
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
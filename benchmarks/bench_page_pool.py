@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Page recycling vs page-per-URL benchmark for the Century21 scraper.
+
+Serves the corpus locally and runs the same URLs twice: once creating and
+closing a page per URL, once reusing pooled pages (reset with about:blank).
+
+    python -m benchmarks.bench_page_pool --pages 300 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from app.integrations.century21.data_scraper import Century21RobustScraper
+from benchmarks.bench_browser_pool import corpus_urls, serve_corpus
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def bench_mode(recycle_pages: bool, concurrency: int, urls: list[str]) -> dict:
+    scraper = Century21RobustScraper(
+        concurrency,
+        parser_backend="lxml",
+        min_concurrency=concurrency,
+        max_concurrency=concurrency,
+        recycle_pages=recycle_pages,
+    )
+    try:
+        start = time.perf_counter()
+        results = await scraper.run(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.close()
+    failed = sum(1 for item in results if "error" in item)
+    return {"pages_per_sec": len(urls) / elapsed, "failed": failed}
+
+
+async def run_benchmark(args) -> bool:
+    server = serve_corpus()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = corpus_urls(base_url, args.pages)
+    logger.info(f"Serving corpus at {base_url}; {len(urls)} pages, concurrency {args.concurrency}")
+
+    results = {}
+    try:
+        for label, recycle_pages in (("page-per-URL", False), ("recycled pages", True)):
+            results[label] = await bench_mode(recycle_pages, args.concurrency, urls)
+            logger.info(
+                f"{label:.<30} {results[label]['pages_per_sec']:8.1f} pages/sec "
+                f"({results[label]['failed']} failed)"
+            )
+    finally:
+        server.shutdown()
+
+    speedup = results["recycled pages"]["pages_per_sec"] / results["page-per-URL"]["pages_per_sec"]
+    logger.info(f"Speedup recycled vs page-per-URL: {speedup:.2f}x")
+    return all(result["failed"] == 0 for result in results.values())
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Page recycling vs page-per-URL benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Pages in flight (fixed, AIMD disabled)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages per run")
+    args = parser.parse_args()
+    return asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark and parity check of the Century21 parser backends (bs4 vs lxml)."""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+from app.integrations.century21.data_scraper import Century21RobustScraper, PARSER_BACKENDS
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR) -> list[tuple[str, str]]:
+    """Load the saved detail pages as (url, html) pairs."""
+    return [
+        (f"file://{path.name}", path.read_text(encoding="utf-8"))
+        for path in sorted(corpus_dir.glob("*.html"))
+    ]
+
+
+def check_parity(corpus: list[tuple[str, str]]) -> bool:
+    """Every backend must produce exactly the same dict as the BeautifulSoup reference."""
+    reference = Century21RobustScraper(1, parser_backend="bs4")
+    ok = True
+    for backend in PARSER_BACKENDS:
+        if backend == "bs4":
+            continue
+        scraper = Century21RobustScraper(1, parser_backend=backend)
+        for url, html in corpus:
+            expected = reference.parse_property_html(html, url)
+            got = scraper.parse_property_html(html, url)
+            if repr(got) != repr(expected):
+                ok = False
+                differing = sorted(k for k in set(expected) | set(got) if expected.get(k) != got.get(k))
+                logger.error(f"❌ {backend} differs from bs4 on {url}: {differing}")
+    if ok:
+        logger.info(f"✓ Parity OK on {len(corpus)} pages")
+    return ok
+
+
+def bench_backend(backend: str, corpus: list[tuple[str, str]], iterations: int) -> float:
+    """Return pages/sec for one backend."""
+    scraper = Century21RobustScraper(1, parser_backend=backend)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for url, html in corpus:
+            scraper.parse_property_html(html, url)
+    elapsed = time.perf_counter() - start
+    return (iterations * len(corpus)) / elapsed
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the corpus per backend")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if not corpus:
+        logger.error(f"No HTML pages found in {CORPUS_DIR}")
+        return False
+
+    if not check_parity(corpus):
+        return False
+
+    results = {backend: bench_backend(backend, corpus, args.iterations) for backend in PARSER_BACKENDS}
+    for backend, pages_per_sec in results.items():
+        logger.info(f"{backend:.<10} {pages_per_sec:10.1f} pages/sec")
+    logger.info(f"Speedup lxml vs bs4: {results['lxml'] / results['bs4']:.2f}x")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
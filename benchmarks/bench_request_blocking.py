@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Request blocking benchmark for the Century21 scraper.
+
+Serves the corpus locally with extra sub-resources injected into every page
+(images, stylesheets, fonts and an analytics script, each with a small server
+delay) and compares the REQUEST_BLOCKING modes by per-page load time and by
+CPU time spent in the Python process.
+
+    python -m benchmarks.bench_request_blocking --pages 100 --assets 20
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from app.integrations.century21.data_scraper import Century21RobustScraper
+from app.integrations.century21.request_blocking import REQUEST_BLOCKING_MODES
+from benchmarks.bench_browser_pool import corpus_urls
+from benchmarks.bench_parser import CORPUS_DIR
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+ASSET_TYPES = ("jpg", "png", "css", "woff2")
+
+
+class _AssetHandler(SimpleHTTPRequestHandler):
+    assets = 20
+    asset_delay = 0.02
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/assets/"):
+            time.sleep(self.asset_delay)
+            self._respond(b"x" * 2048, "application/octet-stream")
+        elif path.endswith(".html"):
+            html = (CORPUS_DIR / path.lstrip("/")).read_text(encoding="utf-8")
+            tags = "".join(self._asset_tag(i) for i in range(self.assets))
+            tags += '<script src="/assets/www.googletagmanager.com/gtm.js"></script>'
+            self._respond(html.replace("</body>", tags + "</body>").encode("utf-8"), "text/html; charset=utf-8")
+        else:
+            super().do_GET()
+
+    def _asset_tag(self, i: int) -> str:
+        ext = ASSET_TYPES[i % len(ASSET_TYPES)]
+        url = f"/assets/{i}.{ext}?v=1"
+        if ext == "css":
+            return f'<link rel="stylesheet" href="{url}">'
+        if ext == "woff2":
+            return f'<link rel="preload" as="font" crossorigin href="{url}">'
+        return f'<img src="{url}">'
+
+    def _respond(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_with_assets(assets: int) -> ThreadingHTTPServer:
+    handler = type("Handler", (_AssetHandler,), {"assets": assets})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=str(CORPUS_DIR)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def bench_mode(mode: str, concurrency: int, urls: list[str]) -> dict:
+    scraper = Century21RobustScraper(
+        concurrency,
+        parser_backend="lxml",
+        min_concurrency=concurrency,
+        max_concurrency=concurrency,
+        request_blocking=mode,
+    )
+    try:
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        results = await scraper.run(urls)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+    finally:
+        scraper.close()
+    return {
+        "ms_per_page": elapsed * 1000 * concurrency / len(urls),
+        "python_cpu_ms_per_page": cpu * 1000 / len(urls),
+        "failed": sum(1 for item in results if "error" in item),
+    }
+
+
+async def run_benchmark(args) -> bool:
+    server = serve_with_assets(args.assets)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = corpus_urls(base_url, args.pages)
+    logger.info(f"Serving corpus at {base_url}; {len(urls)} pages with {args.assets} assets each")
+
+    ok = True
+    try:
+        for mode in args.modes:
+            result = await bench_mode(mode, args.concurrency, urls)
+            logger.info(
+                f"{mode:.<10} {result['ms_per_page']:8.1f} ms/page  "
+                f"{result['python_cpu_ms_per_page']:6.2f} ms Python CPU/page  ({result['failed']} failed)"
+            )
+            ok = ok and result["failed"] == 0
+    finally:
+        server.shutdown()
+    return ok
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Request blocking benchmark for the Century21 scraper")
+    parser.add_argument("--modes", nargs="+", default=list(REQUEST_BLOCKING_MODES), choices=REQUEST_BLOCKING_MODES)
+    parser.add_argument("--concurrency", type=int, default=4, help="Pages in flight (fixed, AIMD disabled)")
+    parser.add_argument("--pages", type=int, default=100, help="Pages per run")
+    parser.add_argument("--assets", type=int, default=20, help="Sub-resources injected into every page")
+    args = parser.parse_args()
+    return asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Load test of the Century21 scraper against the local stand-in site.
+
+Starts benchmarks.standin_site in a separate process (so its CPU is not
+counted against the scraper), drives the real Century21RobustScraper over
+synthetic detail pages and reports pages/min, p50/p95/p99 fetch latency, and
+CPU seconds and peak RSS per Chromium process tree:
+
+    python -m benchmarks.bench_scraper_load --pages 2000 --concurrency 16 --browsers 2 \\
+        --latency lognormal --latency-ms 200 --error-rate 0.01 --throttle-rps 40
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import sys
+import time
+
+import httpx
+import psutil
+
+from app.integrations.century21.data_scraper import Century21RobustScraper
+from benchmarks.standin_site import add_site_arguments, detail_urls, serve
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+class TimedScraper(Century21RobustScraper):
+    """Records the time of every fetch attempt (navigation to parse, inside the concurrency slot)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+
+    async def _fetch_page(self, url, page, slot=None):
+        start = time.perf_counter()
+        try:
+            return await super()._fetch_page(url, page, slot)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+class BrowserSampler:
+    """Samples CPU time and RSS of each Chromium process tree started by this process."""
+
+    def __init__(self):
+        self.peak_rss: dict[int, int] = {}
+        self.cpu_seconds: dict[int, dict[int, float]] = {}
+
+    @staticmethod
+    def _browser_roots() -> list[psutil.Process]:
+        roots = []
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                cmdline = proc.cmdline()
+            except psutil.Error:
+                continue
+            # The browser process itself; renderers, GPU and utility processes carry --type=
+            if cmdline and "chrom" in cmdline[0].lower() and not any(arg.startswith("--type=") for arg in cmdline):
+                roots.append(proc)
+        return roots
+
+    def sample(self) -> None:
+        for root in self._browser_roots():
+            try:
+                tree = [root, *root.children(recursive=True)]
+            except psutil.Error:
+                continue
+            rss = 0
+            cpu = self.cpu_seconds.setdefault(root.pid, {})
+            for proc in tree:
+                try:
+                    rss += proc.memory_info().rss
+                    times = proc.cpu_times()
+                    # Last reading per process: exited renderers keep their final value
+                    cpu[proc.pid] = times.user + times.system
+                except psutil.Error:
+                    continue
+            self.peak_rss[root.pid] = max(self.peak_rss.get(root.pid, 0), rss)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.sample)
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    def report(self) -> list[dict]:
+        return [
+            {
+                "pid": pid,
+                "cpu_s": round(sum(self.cpu_seconds.get(pid, {}).values()), 1),
+                "peak_rss_mb": round(self.peak_rss[pid] / 2 ** 20, 1),
+            }
+            for pid in self.peak_rss
+        ]
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve_process(args) -> None:
+    asyncio.run(serve(args))
+
+
+async def wait_for_site(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(f"{base_url}/__stats")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def run_load(args, base_url: str) -> bool:
+    urls = detail_urls(base_url, args.pages)
+    scraper = TimedScraper(
+        args.concurrency,
+        parser_backend="lxml",
+        browsers=args.browsers,
+        contexts_per_browser=args.contexts,
+        min_concurrency=args.concurrency if args.fixed else None,
+        max_concurrency=args.concurrency if args.fixed else None,
+        with_images=args.with_images,
+    )
+    sampler = BrowserSampler()
+    sampling = asyncio.create_task(sampler.run())
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        results = await scraper.run(urls)
+    finally:
+        elapsed = time.perf_counter() - start
+        sampling.cancel()
+        scraper.close()
+    python_cpu = time.process_time() - cpu_start
+
+    failed = sum(1 for item in results if "error" in item)
+    async with httpx.AsyncClient() as client:
+        site_stats = (await client.get(f"{base_url}/__stats")).json()
+
+    logger.info(f"{len(urls)} pages in {elapsed:.1f}s: {len(urls) / elapsed * 60:,.0f} pages/min, {failed} failed")
+    logger.info(
+        f"Fetch latency: p50 {percentile(scraper.latencies, 0.50) * 1000:.0f} ms, "
+        f"p95 {percentile(scraper.latencies, 0.95) * 1000:.0f} ms, "
+        f"p99 {percentile(scraper.latencies, 0.99) * 1000:.0f} ms over {len(scraper.latencies)} attempts"
+    )
+    logger.info(f"Concurrency: {scraper.limiter.stats()}; retries: {scraper.retry_counts}")
+    logger.info(f"Python process CPU: {python_cpu:.1f}s")
+    for browser in sampler.report():
+        logger.info(f"Browser pid {browser['pid']}: {browser['cpu_s']}s CPU, peak RSS {browser['peak_rss_mb']} MB")
+    logger.info(f"Stand-in site: {site_stats}")
+    return failed <= len(urls) * args.max_failed_rate
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Load test of the Century21 scraper against the stand-in site")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8, help="Initial (or, with --fixed, constant) concurrency")
+    parser.add_argument("--fixed", action="store_true", help="Disable AIMD and keep --concurrency constant")
+    parser.add_argument("--browsers", type=int, default=0, help="Chromium processes (0 = scraper default)")
+    parser.add_argument("--contexts", type=int, default=1)
+    parser.add_argument("--with-images", action="store_true", help="Also read gallery image URLs in the same navigation")
+    parser.add_argument("--max-failed-rate", type=float, default=0.01, help="Fail the run above this error share")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    args.host, args.port = "127.0.0.1", free_port()
+    server = multiprocessing.Process(target=_serve_process, args=(args,), daemon=True)
+    server.start()
+    base_url = f"http://{args.host}:{args.port}"
+    try:
+        asyncio.run(wait_for_site(base_url))
+        return asyncio.run(run_load(args, base_url))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the Century21 parser.
+
+Runs over the saved corpus (no network), reports per-function timings,
+pages/sec and peak memory for every parser backend, and fails when
+throughput drops below the stored baseline by more than the threshold.
+
+    python -m benchmarks.bench_suite                    # compare against baseline.json
+    python -m benchmarks.bench_suite --update-baseline  # record a new baseline
+"""
+
+import argparse
+import functools
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+from app.integrations.century21.data_scraper import Century21RobustScraper, PARSER_BACKENDS
+from benchmarks.bench_parser import check_parity, load_corpus
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25  # Fallar si el throughput cae más de un 25% respecto al baseline
+
+# Funciones instrumentadas (en el scraper y, si existen, en el parser rápido)
+TIMED_FUNCTIONS = [
+    "_parse_main_summary",
+    "_parse_details_and_features",
+    "_extract_detail_entries",
+    "_build_details_data",
+    "_parse_description_heuristics",
+    "_clean_description_text",
+    "_finalize_property_data",
+]
+
+
+def instrument(obj, names: list[str], timings: dict) -> None:
+    """Reemplaza los métodos indicados de `obj` por versiones que acumulan su tiempo en `timings`."""
+    for name in names:
+        method = getattr(obj, name, None)
+        if method is None:
+            continue
+
+        @functools.wraps(method)
+        def timed(*args, __method=method, __name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return __method(*args, **kwargs)
+            finally:
+                timings[__name] += time.perf_counter() - start
+
+        setattr(obj, name, timed)
+
+
+def profile_functions(backend: str, corpus: list[tuple[str, str]], iterations: int) -> dict:
+    """Tiempo medio por página (ms) de cada función instrumentada y del total."""
+    timings = defaultdict(float)
+    scraper = Century21RobustScraper(1, parser_backend=backend)
+    instrument(scraper, TIMED_FUNCTIONS, timings)
+    if scraper._fast_parser is not None:
+        instrument(scraper._fast_parser, TIMED_FUNCTIONS, timings)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for url, html in corpus:
+            scraper.parse_property_html(html, url)
+    timings["parse_property_html"] = time.perf_counter() - start
+
+    pages = iterations * len(corpus)
+    return {name: total * 1000 / pages for name, total in timings.items()}
+
+
+def measure_throughput(backend: str, corpus: list[tuple[str, str]], iterations: int) -> float:
+    """Pages/sec sin instrumentación."""
+    scraper = Century21RobustScraper(1, parser_backend=backend)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for url, html in corpus:
+            scraper.parse_property_html(html, url)
+    return iterations * len(corpus) / (time.perf_counter() - start)
+
+
+def measure_peak_memory(backend: str, corpus: list[tuple[str, str]]) -> float:
+    """
+    Pico de memoria (MB) asignada por Python durante una pasada del corpus.
+    tracemalloc no ve las asignaciones internas de libxml2, así que para lxml
+    solo refleja los objetos Python que crea el parser.
+    """
+    scraper = Century21RobustScraper(1, parser_backend=backend)
+    tracemalloc.start()
+    try:
+        for url, html in corpus:
+            scraper.parse_property_html(html, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> bool:
+    ok = True
+    for backend, result in results.items():
+        expected = baseline.get(backend, {}).get("pages_per_sec")
+        if not expected:
+            logger.warning(f"⚠ No baseline for backend '{backend}'")
+            continue
+        ratio = result["pages_per_sec"] / expected
+        if ratio < 1 - threshold:
+            ok = False
+            logger.error(
+                f"❌ {backend}: {result['pages_per_sec']:.1f} pages/sec is {(1 - ratio) * 100:.0f}% "
+                f"below baseline ({expected:.1f}, threshold {threshold * 100:.0f}%)"
+            )
+        else:
+            logger.info(f"✓ {backend}: {ratio * 100:.0f}% of baseline ({expected:.1f} pages/sec)")
+    return ok
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the Century21 parser")
+    parser.add_argument("--iterations", type=int, default=100, help="Passes over the corpus per measurement")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed throughput drop against the baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the current results as the new baseline")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if not corpus:
+        logger.error("Corpus is empty")
+        return False
+    logger.info(f"Corpus: {len(corpus)} pages, {sum(len(html) for _, html in corpus) / 1024:.0f} KB")
+
+    if not check_parity(corpus):
+        return False
+
+    results = {}
+    for backend in PARSER_BACKENDS:
+        logger.info(f"\n--- {backend} ---")
+        for name, ms in sorted(profile_functions(backend, corpus, args.iterations).items(), key=lambda kv: -kv[1]):
+            logger.info(f"{name:.<40} {ms:8.3f} ms/page")
+        results[backend] = {
+            "pages_per_sec": round(measure_throughput(backend, corpus, args.iterations), 1),
+            "peak_memory_mb": round(measure_peak_memory(backend, corpus), 2),
+        }
+        logger.info(f"{'pages/sec':.<40} {results[backend]['pages_per_sec']:8.1f}")
+        logger.info(f"{'peak memory (MB)':.<40} {results[backend]['peak_memory_mb']:8.2f}")
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        logger.info(f"Baseline written to {BASELINE_PATH}")
+        return True
+
+    if not BASELINE_PATH.exists():
+        logger.warning(f"⚠ {BASELINE_PATH} not found; run with --update-baseline to create it")
+        return True
+
+    logger.info("\n--- Baseline ---")
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    return compare_with_baseline(results, baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for century21mexico.com, for load-testing the scraper.
+
+Serves synthetic pages with the real markup structure:
+
+    /propiedad/<id>_<slug>                  detail page (#detallePropiedad, `row fw-bold` summary,
+                                            `col my-2` blocks, `my-1` details, gallery, og:description)
+    /v/resultados/<filters>?pagina=N        search results with listing cards (for the crawler)
+    /propiedades/<id>/<id>_<n>.jpg          gallery images (real JPEGs generated with Pillow)
+    /__stats                                request counters as JSON
+
+Every page is derived from the property ID, so the same URL always returns the
+same content. Latency follows a configurable distribution, and a share of the
+requests can be turned into 500 errors, stalls, or 429 responses once the
+request rate passes a throttle threshold.
+
+    python -m benchmarks.standin_site --port 8021 --latency lognormal --latency-ms 150 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import html
+import io
+import json
+import logging
+import math
+import random
+import re
+import time
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from aiohttp import web
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "pareto")
+CARDS_PER_PAGE = 20
+IMAGE_VARIANTS = 16
+
+PROPERTY_TYPES = ("Casa", "Departamento", "Terreno", "Oficina", "Local", "Bodega")
+OPERATIONS = ("Venta", "Renta")
+CITIES = (
+    ("Guadalajara", "Jalisco"), ("Zapopan", "Jalisco"), ("Monterrey", "Nuevo León"),
+    ("Acapulco de Juárez", "Guerrero"), ("Mérida", "Yucatán"), ("Querétaro", "Querétaro"),
+)
+NEIGHBORHOODS = ("Providencia", "Chapalita", "Del Valle", "Costa Azul", "Centro", "Las Américas", "Jardines del Sol")
+AMENITIES = (
+    "Alberca", "Gimnasio", "Seguridad 24 horas", "Elevador", "Vista al mar", "Jardín", "Roof garden",
+    "Área de juegos", "Cuarto de servicio", "Terraza", "Aire acondicionado", "Calentador solar",
+)
+DESCRIPTION_LINES = (
+    "Sala comedor con balcón", "Cocina integral con barra", "Medio baño de visitas",
+    "Recámara principal con vestidor y baño completo", "Dos recámaras secundarias",
+    "Patio de servicio techado", "Estudio con closet", "Cochera techada para dos autos",
+)
+NEARBY = ("Centro comercial", "Hospital", "Escuelas", "Parque", "Supermercado", "Transporte público")
+
+
+@dataclass
+class SiteOptions:
+    latency: str = "lognormal"
+    latency_ms: float = 150.0
+    latency_spread: float = 0.5
+    error_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall_seconds: float = 60.0
+    throttle_rps: float = 0.0
+    retry_after: int = 1
+    properties: int = 10_000
+    image_latency_ms: float = 20.0
+    image_edge: int = 1600
+    # False: the photo list only exists inside the lightbox script (no JSON to read from the DOM)
+    gallery_json: bool = True
+
+
+def sample_latency(options: SiteOptions, rng: random.Random) -> float:
+    """Seconds to wait before answering, drawn from the configured distribution (latency_ms = median)."""
+    median = options.latency_ms / 1000
+    if options.latency == "fixed":
+        return median
+    if options.latency == "uniform":
+        return rng.uniform(median * (1 - options.latency_spread), median * (1 + options.latency_spread))
+    if options.latency == "lognormal":
+        return rng.lognormvariate(math.log(median), options.latency_spread)
+    # pareto: heavy tail; alpha = 1 / spread, scaled so the median matches
+    alpha = 1 / options.latency_spread
+    return median / 2 ** (1 / alpha) * rng.paretovariate(alpha)
+
+
+def slugify(text: str) -> str:
+    text = text.lower()
+    for a, b in (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ñ", "n")):
+        text = text.replace(a, b)
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def property_facts(property_id: int) -> dict:
+    """Deterministic listing data for one property ID."""
+    rng = random.Random(property_id)
+    kind = rng.choice(PROPERTY_TYPES)
+    operation = rng.choice(OPERATIONS)
+    city, state = rng.choice(CITIES)
+    neighborhood = rng.choice(NEIGHBORHOODS)
+    price = rng.randrange(8_000, 60_000, 500) if operation == "Renta" else rng.randrange(900_000, 15_000_000, 50_000)
+    return {
+        "id": property_id,
+        "title": f"{kind} en {operation} en {neighborhood}, {city}",
+        "kind": kind,
+        "operation": operation,
+        "address": f"Calle {rng.randint(1, 120)} #{rng.randint(10, 999)}, {neighborhood}, {city}, {state}",
+        "price": price,
+        "construction": round(rng.uniform(45, 450), 1),
+        "land": rng.randint(60, 800),
+        "bedrooms": rng.randint(1, 5),
+        "bathrooms": rng.choice((1, 1.5, 2, 2.5, 3, 3.5)),
+        "parking": rng.randint(0, 4),
+        "year": rng.randint(1975, 2024),
+        "levels": rng.randint(1, 3),
+        "maintenance": rng.randrange(0, 5000, 250),
+        "amenities": rng.sample(AMENITIES, rng.randint(2, 7)),
+        "description": rng.sample(DESCRIPTION_LINES, rng.randint(3, 6)),
+        "nearby": rng.sample(NEARBY, rng.randint(2, 4)),
+        "photos": rng.randint(4, 40),
+    }
+
+
+def detail_path(facts: dict) -> str:
+    return f"/propiedad/{facts['id']}_{slugify(facts['title'])}"
+
+
+def photo_urls(base_url: str, facts: dict) -> list[str]:
+    return [f"{base_url}/propiedades/{facts['id']}/{facts['id']}_{n}.jpg" for n in range(1, facts["photos"] + 1)]
+
+
+def render_detail_page(facts: dict, base_url: str, gallery_json: bool = True) -> str:
+    """Detail page with the markup the parser reads (see benchmarks/corpus/detalle_venta_completo.html)."""
+    e = html.escape
+    photos = photo_urls(base_url, facts)
+    if gallery_json:
+        gallery_data = f'<script type="application/json" id="galeria-fotos">{json.dumps(photos)}</script>'
+        gallery_source = "JSON.parse(document.getElementById('galeria-fotos').textContent)"
+    else:
+        gallery_data, gallery_source = "", json.dumps(photos)
+    summary = [
+        ("Construcción", f"{facts['construction']} m²"),
+        ("Terreno", f"{facts['land']} m²"),
+        ("Recámaras", facts["bedrooms"]),
+        ("Baños", facts["bathrooms"]),
+        ("Estacionamientos", facts["parking"]),
+    ]
+    summary_html = "".join(
+        f'<div class="col my-2"><span class="text-muted">{label}</span> {value} <i class="fa-solid"></i></div>'
+        for label, value in summary
+    )
+    description = "<br>\n".join(
+        [f"{facts['kind']} en excelente ubicación.", "", "Planta Baja:"]
+        + [f"- {line}" for line in facts["description"]]
+        + ["", "Cercanías:"]
+        + [f"- {place}" for place in facts["nearby"]]
+        + ["", "*PRECIO A TRATAR*"]
+    )
+    details = [
+        (f"Precio de {facts['operation'].lower()}", f"${facts['price']:,} MXN"),
+        ("Tipo", facts["kind"]),
+        ("Año de construcción", facts["year"]),
+        ("Niveles", facts["levels"]),
+        ("Cuota de mantenimiento", f"${facts['maintenance']:,} MXN"),
+    ]
+    details_html = "".join(
+        f'<div class="col-sm-12 col-md-6 my-1">{label}: <span class="fw-bold">{value}</span></div>'
+        for label, value in details
+    )
+    amenities_html = "".join(
+        f'<div class="col-sm-12 col-md-6 col-lg-4 my-2"><i class="fa-solid fa-check"></i> {e(name)}</div>'
+        for name in facts["amenities"]
+    )
+    og_description = f"{facts['kind']} en excelente ubicación. " + " ".join(f"• {a}" for a in facts["amenities"])
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+  <meta charset="utf-8">
+  <title>{e(facts['title'])} | CENTURY 21 México</title>
+  <meta property="og:title" content="{e(facts['title'])}">
+  <meta property="og:description" content="{e(og_description)}">
+  <meta property="og:image" content="{photos[0]}">
+  <link rel="stylesheet" href="/css/bootstrap.min.css">
+</head>
+<body>
+  <main class="container">
+    <div id="detallePropiedad" class="row">
+      <div class="col-12 col-lg-8">
+        <div id="fotos" class="position-relative">
+          <img class="img-fluid w-100" src="{photos[0]}" alt="Foto 1">
+          <button type="button" class="btn btn-primary position-absolute bottom-0 end-0 m-3">{len(photos)} Fotos</button>
+        </div>
+        <div id="galeria" class="d-none"><img id="galeria-foto" alt="Galería"></div>
+        {gallery_data}
+        <script>
+          (function () {{
+            var fotos = {gallery_source};
+            var actual = 0, galeria = document.getElementById('galeria'), foto = document.getElementById('galeria-foto');
+            document.querySelector('#fotos img').addEventListener('click', function () {{
+              galeria.classList.remove('d-none'); foto.src = fotos[actual];
+            }});
+            document.addEventListener('keydown', function (ev) {{
+              if (ev.key !== 'ArrowRight' || galeria.classList.contains('d-none')) return;
+              actual = (actual + 1) % fotos.length; foto.src = fotos[actual];
+            }});
+          }})();
+        </script>
+        <h1 class="fs-2 mt-3">{e(facts['title'])}</h1>
+        <h5 class="fs-4 text-secondary">{facts['kind']} &middot; {facts['operation']}</h5>
+        <h6 class="small text-muted">{e(facts['address'])}</h6>
+        <h6 class="fs-3 fw-bold text-primary">${facts['price']:,} MXN</h6>
+        <div class="row fw-bold text-center border-top border-bottom py-2">{summary_html}</div>
+        <h4 class="mt-4">Descripción</h4>
+        <p class="text-muted" style="white-space: pre-line;">{description}</p>
+        <h4 class="mt-4">Detalles</h4>
+        <div class="row">{details_html}</div>
+        <h4 class="mt-4">Amenidades</h4>
+        <div class="row">{amenities_html}</div>
+      </div>
+    </div>
+  </main>
+</body>
+</html>"""
+
+
+def render_search_page(first_id: int, count: int, page: int, base_url: str) -> str:
+    cards = []
+    for property_id in range(first_id, first_id + count):
+        facts = property_facts(property_id)
+        cards.append(
+            f'<div class="col-md-4"><div class="card">'
+            f'<a href="{detail_path(facts)}"><img src="{photo_urls(base_url, facts)[0]}" alt=""></a>'
+            f'<div class="card-body"><h5 class="card-title">{html.escape(facts["title"])}</h5>'
+            f'<p class="fw-bold">${facts["price"]:,} MXN</p></div></div></div>'
+        )
+    next_link = f'<a rel="next" href="?pagina={page + 1}">Siguiente</a>' if cards else ""
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Resultados | CENTURY 21 México</title></head>
+<body><main class="container"><div class="row">{''.join(cards)}</div>{next_link}</main></body></html>"""
+
+
+def render_jpeg(variant: int, edge: int) -> bytes:
+    """A photo-sized JPEG (gradient plus noise, so it compresses like a photo)."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(variant)
+    width, height = edge, edge * 3 // 4
+    image = Image.effect_noise((width, height), 40 + variant).convert("RGB")
+    overlay = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    image = Image.blend(image, overlay, 0.6)
+    ImageDraw.Draw(image).rectangle((width // 4, height // 4, width // 2, height // 2), fill=(240, 240, 240))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+class StandInSite:
+    """aiohttp application plus the latency, error and throttle injection."""
+
+    def __init__(self, options: SiteOptions, seed: int = 0):
+        self.options = options
+        self.rng = random.Random(seed)
+        self.counters: Counter = Counter()
+        self._recent: deque[float] = deque()
+        self._images: list[bytes] = []
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/propiedad/{slug}", self.detail)
+        app.router.add_get("/v/resultados/{filters:.*}", self.search)
+        app.router.add_get("/propiedades/{id}/{name}", self.image)
+        app.router.add_get("/__stats", self.stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _throttled(self) -> bool:
+        if self.options.throttle_rps <= 0:
+            return False
+        now = time.monotonic()
+        self._recent.append(now)
+        while self._recent and self._recent[0] < now - 1:
+            self._recent.popleft()
+        return len(self._recent) > self.options.throttle_rps
+
+    async def _inject(self, kind: str) -> web.Response | None:
+        """Throttle, stall or fail the request as configured; None means serve it normally."""
+        self.counters[f"{kind}_requests"] += 1
+        if self._throttled():
+            self.counters["throttled"] += 1
+            return web.Response(status=429, headers={"Retry-After": str(self.options.retry_after)})
+        await asyncio.sleep(sample_latency(self.options, self.rng))
+        roll = self.rng.random()
+        if roll < self.options.stall_rate:
+            self.counters["stalled"] += 1
+            await asyncio.sleep(self.options.stall_seconds)
+        elif roll < self.options.stall_rate + self.options.error_rate:
+            self.counters["errors"] += 1
+            return web.Response(status=500, text="Internal Server Error")
+        return None
+
+    async def detail(self, request: web.Request) -> web.Response:
+        injected = await self._inject("detail")
+        if injected is not None:
+            return injected
+        match = re.match(r"(\d+)_", request.match_info["slug"])
+        if not match or not 1 <= int(match.group(1)) <= self.options.properties:
+            return web.Response(status=404, text="No encontrada")
+        page = render_detail_page(property_facts(int(match.group(1))), self.base_url, self.options.gallery_json)
+        return web.Response(text=page, content_type="text/html")
+
+    async def search(self, request: web.Request) -> web.Response:
+        injected = await self._inject("search")
+        if injected is not None:
+            return injected
+        page = int(request.query.get("pagina", "1") or 1)
+        first_id = (page - 1) * CARDS_PER_PAGE + 1
+        count = max(0, min(CARDS_PER_PAGE, self.options.properties - first_id + 1))
+        return web.Response(text=render_search_page(first_id, count, page, self.base_url), content_type="text/html")
+
+    async def image(self, request: web.Request) -> web.Response:
+        self.counters["image_requests"] += 1
+        await asyncio.sleep(self.options.image_latency_ms / 1000)
+        if not self._images:
+            # Generated once, in a thread; Pillow encoding is too slow for every request
+            self._images = await asyncio.to_thread(
+                lambda: [render_jpeg(i, self.options.image_edge) for i in range(IMAGE_VARIANTS)]
+            )
+        variant = zlib.crc32(request.match_info["name"].encode()) % IMAGE_VARIANTS
+        return web.Response(body=self._images[variant], content_type="image/jpeg")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.counters))
+
+
+def add_site_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command-line options for SiteOptions (shared with the load benchmark)."""
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Median server latency")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="uniform: ± fraction; lognormal: sigma; pareto: 1/alpha")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument("--stall-seconds", type=float, default=60.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0, help="Answer 429 above this rate (0 = never)")
+    parser.add_argument("--properties", type=int, default=10_000)
+    parser.add_argument("--no-gallery-json", dest="gallery_json", action="store_false",
+                        help="Keep the photo list inside the lightbox script only")
+
+
+def site_options(args) -> SiteOptions:
+    return SiteOptions(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        throttle_rps=args.throttle_rps,
+        properties=args.properties,
+        gallery_json=args.gallery_json,
+    )
+
+
+def detail_urls(base_url: str, count: int, first_id: int = 1) -> list[str]:
+    return [base_url + detail_path(property_facts(property_id)) for property_id in range(first_id, first_id + count)]
+
+
+async def serve(args) -> None:
+    site = StandInSite(site_options(args))
+    base_url = await site.start(args.host, args.port)
+    logger.info(f"Stand-in site at {base_url} (e.g. {detail_urls(base_url, 1)[0]})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await site.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Century21 stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8021)
+    add_site_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+
+
+class FakeClock:
+    """Reloj controlado por el test (time.time / time.perf_counter de un módulo)."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
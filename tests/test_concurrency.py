@@ -0,0 +1,83 @@
+import pytest
+
+from app.integrations.century21 import concurrency
+from app.integrations.century21.concurrency import AdaptiveLimiter, RequestSlot
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(clock, monkeypatch):
+    # Latencia cero salvo que el test avance el reloj
+    monkeypatch.setattr(concurrency.time, "perf_counter", clock)
+
+
+def finish(limiter, outcome="ok", epoch=None):
+    request = RequestSlot(limiter._epoch if epoch is None else epoch)
+    if outcome == "throttled":
+        request.timeout()
+    elif outcome == "error":
+        request.error()
+    limiter._record(request)
+
+
+def test_limit_grows_by_one_per_healthy_round():
+    limiter = AdaptiveLimiter(4, floor=1, ceiling=10)
+    for _ in range(3):
+        finish(limiter)
+    assert limiter.limit == 4
+    finish(limiter)
+    assert limiter.limit == 5
+    for _ in range(5):
+        finish(limiter)
+    assert limiter.limit == 6
+    assert limiter.increases == 2
+
+
+def test_limit_never_passes_the_ceiling():
+    limiter = AdaptiveLimiter(3, floor=1, ceiling=4)
+    for _ in range(50):
+        finish(limiter)
+    assert limiter.limit == 4
+
+
+def test_throttling_halves_the_limit_once_per_round():
+    limiter = AdaptiveLimiter(16, floor=2, ceiling=32)
+    started = [RequestSlot(limiter._epoch) for _ in range(5)]
+    for request in started:
+        request.timeout()
+        limiter._record(request)
+    # Los cinco empezaron antes del recorte: solo el primero recorta
+    assert limiter.limit == 8
+    assert limiter.decreases == 1
+    finish(limiter, "throttled")
+    assert limiter.limit == 4
+
+
+def test_backoff_stops_at_the_floor():
+    limiter = AdaptiveLimiter(8, floor=3, ceiling=32)
+    for _ in range(5):
+        finish(limiter, "throttled")
+    assert limiter.limit == 3
+
+
+def test_slow_p95_blocks_growth(clock):
+    limiter = AdaptiveLimiter(2, floor=1, ceiling=10, target_p95_seconds=1.0)
+    for _ in range(4):
+        request = RequestSlot(limiter._epoch)
+        clock.advance(5)
+        limiter._record(request)
+    assert limiter.limit == 2
+
+
+def test_errors_above_the_threshold_block_growth():
+    limiter = AdaptiveLimiter(2, floor=1, ceiling=10, max_error_rate=0.05)
+    for _ in range(4):
+        finish(limiter, "error")
+    assert limiter.limit == 2
+    assert limiter.decreases == 0
+
+
+def test_initial_limit_is_clamped_between_floor_and_ceiling():
+    assert AdaptiveLimiter(100, floor=2, ceiling=8).limit == 8
+    assert AdaptiveLimiter(1, floor=2, ceiling=8).limit == 2
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(4, floor=5, ceiling=4)
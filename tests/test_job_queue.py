@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from app.integrations.century21 import job_queue
+from app.integrations.century21.job_queue import ScrapeJobQueue
+
+URLS = [f"https://century21mexico.com/propiedad/{i}_casa" for i in range(1, 21)]
+
+
+@pytest.fixture
+def queue_path(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    return tmp_path / "jobs.sqlite3"
+
+
+def open_queue(path, worker_id, **kwargs):
+    return ScrapeJobQueue(path, lease_seconds=60, max_attempts=2, worker_id=worker_id, **kwargs)
+
+
+def test_enqueue_ignores_repeated_urls(queue_path):
+    queue = open_queue(queue_path, "a")
+    assert queue.enqueue("lote", URLS) == len(URLS)
+    assert queue.enqueue("lote", URLS[:5]) == 0
+    assert queue.enqueue("otro", URLS[:5]) == 5
+    assert queue.stats("lote")["pending"] == len(URLS)
+    queue.close()
+
+
+def test_claim_reserves_in_order_and_complete_marks_done(queue_path):
+    queue = open_queue(queue_path, "a")
+    queue.enqueue("lote", URLS[:3])
+    jobs = queue.claim("lote", 2)
+    assert [job["url"] for job in jobs] == URLS[:2]
+    assert all(job["attempts"] == 1 for job in jobs)
+    assert queue.complete(jobs[0]["id"])
+    assert not queue.complete(jobs[0]["id"])
+    assert queue.stats("lote") == {"pending": 1, "in_flight": 1, "done": 1, "failed": 0}
+    queue.close()
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue_path, clock):
+    first, second = open_queue(queue_path, "a"), open_queue(queue_path, "b")
+    first.enqueue("lote", URLS[:1])
+    [job] = first.claim("lote")
+    assert second.claim("lote") == []
+
+    # Mientras el lease se renueva el trabajo sigue siendo del primer worker
+    clock.advance(50)
+    assert first.heartbeat() == 1
+    clock.advance(50)
+    assert second.claim("lote") == []
+
+    clock.advance(61)
+    [reclaimed] = second.claim("lote")
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+    # El fallo del worker que perdió el lease no pisa al nuevo dueño
+    assert not first.fail(job["id"], "tarde")
+    assert second.stats("lote")["in_flight"] == 1
+    first.close()
+    second.close()
+
+
+def test_expired_lease_without_attempts_left_fails(queue_path, clock):
+    queue = open_queue(queue_path, "a")
+    queue.enqueue("lote", URLS[:1])
+    for _ in range(2):
+        assert len(queue.claim("lote")) == 1
+        clock.advance(61)
+    assert queue.claim("lote") == []
+    assert queue.stats("lote")["failed"] == 1
+    assert "lease expired" in queue.errors("lote")[0]["error"]
+    queue.close()
+
+
+def test_fail_retries_until_max_attempts(queue_path):
+    queue = open_queue(queue_path, "a")
+    queue.enqueue("lote", URLS[:1])
+    [job] = queue.claim("lote")
+    assert queue.fail(job["id"], "timeout")
+    assert queue.stats("lote")["pending"] == 1
+
+    [job] = queue.claim("lote")
+    assert queue.fail(job["id"], "timeout otra vez")
+    assert queue.stats("lote") == {"pending": 0, "in_flight": 0, "done": 0, "failed": 1}
+    assert queue.errors("lote") == [{"url": URLS[0], "error": "timeout otra vez"}]
+
+    assert queue.retry_failed("lote") == 1
+    assert queue.claim("lote")[0]["attempts"] == 1
+    queue.close()
+
+
+def test_release_returns_jobs_without_spending_an_attempt(queue_path):
+    queue = open_queue(queue_path, "a")
+    queue.enqueue("lote", URLS[:3])
+    queue.claim("lote", 3)
+    assert queue.release() == 3
+    assert queue.stats("lote")["pending"] == 3
+    assert all(job["attempts"] == 1 for job in queue.claim("lote", 3))
+    queue.close()
+
+
+def test_concurrent_claims_never_hand_out_a_job_twice(queue_path):
+    queues = [open_queue(queue_path, f"w{i}") for i in range(4)]
+    queues[0].enqueue("lote", URLS)
+    claimed: list[list[int]] = [[] for _ in queues]
+
+    def worker(index):
+        while jobs := queues[index].claim("lote", 3):
+            claimed[index].extend(job["id"] for job in jobs)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(queues))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [job_id for ids in claimed for job_id in ids]
+    assert len(ids) == len(URLS)
+    assert len(set(ids)) == len(URLS)
+    for queue in queues:
+        queue.close()
@@ -0,0 +1,70 @@
+import pytest
+
+from app.integrations.century21 import rate_limit
+from app.integrations.century21.rate_limit import HostRateLimiter, default_burst
+
+HOST = "century21mexico.com"
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+
+
+def test_burst_is_free_then_requests_are_spaced_by_the_rate():
+    limiter = HostRateLimiter(60, burst=3)
+    assert [limiter.reserve(HOST) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Cada request de más queda en deuda y espera un segundo más que el anterior
+    assert [limiter.reserve(HOST) for _ in range(3)] == pytest.approx([1.0, 2.0, 3.0])
+
+
+def test_tokens_refill_with_time_up_to_the_burst(clock):
+    limiter = HostRateLimiter(60, burst=2)
+    limiter.reserve(HOST)
+    limiter.reserve(HOST)
+    clock.advance(1)
+    assert limiter.reserve(HOST) == 0.0
+    assert limiter.reserve(HOST) == pytest.approx(1.0)
+    # Una pausa larga no acumula más que la ráfaga
+    clock.advance(3600)
+    assert [limiter.reserve(HOST) for _ in range(3)] == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_hosts_have_separate_buckets():
+    limiter = HostRateLimiter(60, burst=1)
+    assert limiter.reserve(HOST) == 0.0
+    assert limiter.reserve("img.century21mexico.com") == 0.0
+    assert limiter.reserve(HOST) == pytest.approx(1.0)
+
+
+def test_window_bucket_caps_the_long_run_total(clock):
+    limiter = HostRateLimiter(600, burst=100, window_requests=3, window_seconds=60)
+    assert [limiter.reserve(HOST) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.reserve(HOST) == pytest.approx(20.0)
+
+
+def test_debt_is_shared_across_limiters_on_the_same_state_file(tmp_path, clock):
+    state = tmp_path / "rate_limit.sqlite3"
+    first = HostRateLimiter(60, burst=2, state_path=state)
+    second = HostRateLimiter(60, burst=2, state_path=state)
+    waits = [first.reserve(HOST), second.reserve(HOST), first.reserve(HOST), second.reserve(HOST)]
+    assert waits == pytest.approx([0.0, 0.0, 1.0, 2.0])
+
+    # La deuda sobrevive a reabrir el archivo: un proceso nuevo no trae ráfaga propia
+    first.close()
+    third = HostRateLimiter(60, burst=2, state_path=state)
+    clock.advance(1)
+    assert third.reserve(HOST) == pytest.approx(2.0)
+    second.close()
+    third.close()
+
+
+def test_default_burst_is_ten_seconds_of_rate():
+    assert default_burst(120) == 20
+    assert default_burst(1) == 1
+    assert HostRateLimiter(120).buckets == [("rate", 2.0, 20)]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        HostRateLimiter(0)
@@ -0,0 +1,50 @@
+import pytest
+
+from app.integrations.century21.sharding import HashRing
+
+URLS = [f"https://century21mexico.com/propiedad/{i}_departamento-en-venta" for i in range(4000)]
+
+
+def assignment(ring):
+    return {url: ring.node_for(url) for url in URLS}
+
+
+def test_every_url_goes_to_exactly_one_shard():
+    ring = HashRing(["a", "b", "c"])
+    shards = {node: list(ring.shard(URLS, node)) for node in ring.nodes}
+    assert sorted(url for urls in shards.values() for url in urls) == sorted(URLS)
+    # Reparto razonablemente parejo con los nodos virtuales
+    assert all(len(urls) > len(URLS) / 3 * 0.7 for urls in shards.values())
+
+
+def test_assignment_is_deterministic_and_ignores_node_order():
+    assert assignment(HashRing(["a", "b", "c"])) == assignment(HashRing(["c", "a", "b"]))
+
+
+def test_same_listing_lands_on_the_same_node():
+    ring = HashRing(["a", "b", "c"])
+    assert ring.node_for("https://century21mexico.com/propiedad/591129_casa") == \
+        ring.node_for("https://century21mexico.com/propiedad/591129_casa-en-venta-renombrada")
+
+
+def test_adding_a_node_only_moves_urls_to_it():
+    before = assignment(HashRing(["a", "b", "c"]))
+    after = assignment(HashRing(["a", "b", "c", "d"]))
+    moved = [url for url in URLS if before[url] != after[url]]
+    assert all(after[url] == "d" for url in moved)
+    assert 0.15 < len(moved) / len(URLS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_urls():
+    before = assignment(HashRing(["a", "b", "c", "d"]))
+    after = assignment(HashRing(["a", "b", "c"]))
+    assert all(before[url] == "d" for url in URLS if before[url] != after[url])
+
+
+def test_invalid_rings_are_rejected():
+    with pytest.raises(ValueError):
+        HashRing([])
+    with pytest.raises(ValueError):
+        HashRing(["a", "a"])
+    with pytest.raises(ValueError):
+        list(HashRing(["a"]).shard(URLS, "b"))